@@ -0,0 +1,177 @@
+# backend/app/aggregates.py
+"""
+Incrementally maintained progress aggregates (course_stats / user_stats).
+
+Every progress write applies a delta in the same transaction, so the
+analytics endpoints read a handful of indexed rows instead of running a
+GROUP BY over the whole progress table.
+
+Backfill / repair:
+    python -m app.aggregates rebuild
+"""
+import argparse
+from typing import Optional
+
+from sqlalchemy import case, delete, false, func, insert, select, text
+from sqlalchemy.orm import Session
+
+from app import models, database
+
+
+def _is_active(completion: Optional[float]) -> int:
+    return 1 if (completion or 0) > 0 else 0
+
+
+def _upsert_delta(db: Session, model, key_column: str, key: int, count: int, total: float, active: int):
+    """
+    Atomic `col = col + delta` upsert (no read-modify-write race).
+    """
+    table = model.__table__
+    values = {key_column: key, "progress_count": count, "completion_sum": total, "active_count": active}
+    increments = {
+        "progress_count": table.c.progress_count + count,
+        "completion_sum": table.c.completion_sum + total,
+        "active_count": table.c.active_count + active,
+    }
+    if "avg_completion" in table.c:
+        values["avg_completion"] = total / count if count else 0.0
+        # RHS sees the pre-update values on both SQLite and Postgres
+        increments["avg_completion"] = func.coalesce(
+            (table.c.completion_sum + total) / func.nullif(table.c.progress_count + count, 0), 0.0
+        )
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as upsert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as upsert
+    else:
+        updated = db.execute(table.update().where(table.c[key_column] == key).values(**increments))
+        if updated.rowcount == 0:
+            db.execute(table.insert().values(**values))
+        return
+
+    statement = upsert(table).values(**values)
+    db.execute(statement.on_conflict_do_update(index_elements=[table.c[key_column]], set_=increments))
+
+
+def apply_progress_change(db: Session, user_id: int, course_id: int,
+                          old_completion: Optional[float] = None, new_completion: Optional[float] = None,
+                          created: bool = False):
+    """
+    Apply one progress insert/update to the aggregates. Call before the
+    commit that writes the progress row so both land in one transaction.
+    """
+    count = 1 if created else 0
+    total = (new_completion or 0) - (0 if created else (old_completion or 0))
+    active = _is_active(new_completion) - (0 if created else _is_active(old_completion))
+    if not (count or total or active):
+        return
+    if course_id is not None:
+        _upsert_delta(db, models.CourseStats, "course_id", course_id, count, total, active)
+    if user_id is not None:
+        _upsert_delta(db, models.UserStats, "user_id", user_id, count, total, active)
+
+
+# -------------------- Reads --------------------
+def top_courses(db: Session, limit: int = 5):
+    return (
+        db.query(models.Course.title, models.CourseStats.avg_completion)
+        .join(models.Course, models.Course.id == models.CourseStats.course_id)
+        .filter(models.CourseStats.progress_count > 0)
+        .order_by(models.CourseStats.avg_completion.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def active_users(db: Session, limit: int = 5):
+    return (
+        db.query(models.User.username, models.UserStats.active_count)
+        .join(models.User, models.User.id == models.UserStats.user_id)
+        .filter(models.UserStats.active_count > 0)
+        .order_by(models.UserStats.active_count.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+# -------------------- Backfill --------------------
+def rebuild(db: Session):
+    """
+    Recompute both aggregate tables from `progress` with set-based
+    INSERT ... SELECT, in one transaction.
+    """
+    completion = func.coalesce(models.Progress.completion_percentage, 0.0)
+    active = func.sum(case((completion > 0, 1), else_=0))
+
+    db.execute(delete(models.CourseStats))
+    db.execute(delete(models.UserStats))
+    db.execute(
+        insert(models.CourseStats).from_select(
+            ["course_id", "progress_count", "completion_sum", "active_count", "avg_completion"],
+            select(models.Progress.course_id, func.count(), func.sum(completion), active, func.avg(completion))
+            .where(models.Progress.course_id.isnot(None))
+            .group_by(models.Progress.course_id),
+        )
+    )
+    db.execute(
+        insert(models.UserStats).from_select(
+            ["user_id", "progress_count", "completion_sum", "active_count"],
+            select(models.Progress.user_id, func.count(), func.sum(completion), active)
+            .where(models.Progress.user_id.isnot(None))
+            .group_by(models.Progress.user_id),
+        )
+    )
+    db.commit()
+
+
+# Arbitrary key for pg_advisory_xact_lock ("aggr")
+BACKFILL_LOCK_ID = 0x61676772
+
+
+def _lock_for_backfill(db: Session):
+    """
+    Serialise the check-and-rebuild across workers starting at the same
+    time: a transaction-scoped advisory lock on Postgres, the database write
+    lock on SQLite (taken by a no-op DELETE; others wait on busy_timeout).
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        db.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": BACKFILL_LOCK_ID})
+    elif dialect == "sqlite":
+        db.execute(delete(models.CourseStats).where(false()))
+
+
+def ensure_backfilled(db: Session) -> bool:
+    """
+    First start after upgrading: aggregates are empty but progress is not.
+    Safe to call from every worker; only the first one rebuilds.
+    """
+    _lock_for_backfill(db)
+    has_progress = db.query(models.Progress.id).limit(1).first() is not None
+    has_stats = db.query(models.CourseStats.course_id).limit(1).first() is not None
+    if has_progress and not has_stats:
+        rebuild(db)  # commits, releasing the lock
+        return True
+    db.commit()
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain progress aggregates.")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args()
+
+    models.Base.metadata.create_all(bind=database.engine)
+    db = database.SessionLocal()
+    try:
+        rebuild(db)
+        print(f"✅ Rebuilt aggregates: {db.query(models.CourseStats).count()} courses, "
+              f"{db.query(models.UserStats).count()} users.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,53 @@
 # app/ai_chat.py
-import os
-import openai
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from dotenv import load_dotenv
+from typing import List, Optional
 
-# Load environment variables
-load_dotenv()
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 
-openai.api_key = os.getenv("OPENAI_API_KEY")
+from app import models
+from app.auth.oauth2 import get_optional_user
+from app.crud.chat_crud import save_chat_messages
+from app.llm_client import llm
+from app.streaming import sse_response
 
 router = APIRouter(prefix="/chat", tags=["Chatbot"])
 
 class ChatRequest(BaseModel):
     message: str
 
+def chat_messages(message: str) -> List[dict]:
+    return [
+        {"role": "system", "content": "You are an intelligent AI learning assistant."},
+        {"role": "user", "content": message}
+    ]
+
+def persist_exchange(user_id: Optional[int], message: str):
+    """on_complete hook: store the user prompt and the final AI reply."""
+    async def on_complete(reply: str) -> Optional[dict]:
+        if user_id is None:
+            return None
+        _, ai_id = await run_in_threadpool(save_chat_messages, user_id, [("user", message), ("ai", reply)])
+        return {"message_id": ai_id}
+    return on_complete
+
 @router.post("/")
 async def chat_with_ai(request: ChatRequest):
     try:
-        response = openai.ChatCompletion.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are an intelligent AI learning assistant."},
-                {"role": "user", "content": request.message}
-            ]
-        )
+        reply = await llm.chat(chat_messages(request.message))
 
-        return {"reply": response.choices[0].message.content.strip()}
+        return {"reply": reply}
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/stream")
+async def stream_chat_with_ai(request: ChatRequest, http_request: Request,
+                              current_user: Optional[models.User] = Depends(get_optional_user)):
+    """
+    Server-Sent Events: one `data` event per token, then a `done` event.
+    With a bearer token the exchange is saved to that user's chat history.
+    """
+    tokens = llm.stream_chat(chat_messages(request.message))
+    user_id = current_user.id if current_user else None
+    return sse_response(tokens, http_request, persist_exchange(user_id, request.message))
@@ -1,34 +1,96 @@
-import os
-from openai import OpenAI
-from dotenv import load_dotenv
+from typing import AsyncIterator, List, Optional
 
-load_dotenv()
+from app.llm_cache import make_key, recommendation_cache
+from app.llm_client import llm
+from app.singleflight import flight_group
 
-# Initialize OpenAI client
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-client = OpenAI(api_key=OPENAI_API_KEY)
+RECOMMENDATION_PARAMS = {"temperature": 0.7}
 
-def generate_ai_recommendation(user_name: str, progress_summary: str) -> str:
+# Identical prompts in flight at the same time share one LLM call
+recommendation_flight = flight_group("ai_recommendation")
+response_flight = flight_group("ai_response")
+
+
+def recommendation_messages(user_name: str, progress_summary: str) -> List[dict]:
+    prompt = f"""
+    The user {user_name} has the following learning progress:
+    {progress_summary}.
+    Suggest 2–3 personalized AI or ML courses to continue learning effectively.
+    """
+    return [
+        {"role": "system", "content": "You are an expert AI mentor."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def recommendation_cache_key(messages: List[dict]) -> str:
+    return make_key(llm.model, messages, **RECOMMENDATION_PARAMS)
+
+
+async def generate_ai_recommendation(user_name: str, progress_summary: str,
+                                     user_id: Optional[int] = None) -> str:
     """
     Generate personalized AI course recommendations or feedback.
+    Cached on a hash of the prompt inputs, so unchanged progress costs no LLM call;
+    concurrent identical misses are coalesced into one call.
     """
     try:
-        prompt = f"""
-        The user {user_name} has the following learning progress:
-        {progress_summary}.
-        Suggest 2–3 personalized AI or ML courses to continue learning effectively.
-        """
-
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are an expert AI mentor."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7
-        )
-
-        return response.choices[0].message.content.strip()
+        messages = recommendation_messages(user_name, progress_summary)
+        key = recommendation_cache_key(messages)
+        cached = await recommendation_cache.aget(key)
+        if cached is not None:
+            return cached
+
+        async def call_llm() -> str:
+            reply = await llm.chat(messages, **RECOMMENDATION_PARAMS)
+            if reply:
+                await recommendation_cache.aset(key, reply, user_id=user_id)
+            return reply
+
+        return await recommendation_flight.do(key, call_llm)
 
     except Exception as e:
         return f"Error generating AI recommendation: {e}"
+
+
+async def stream_ai_recommendation(user_name: str, progress_summary: str,
+                                   user_id: Optional[int] = None) -> AsyncIterator[str]:
+    """
+    Same prompt as `generate_ai_recommendation`, streamed token by token.
+    A cache hit is sent as a single chunk; a completed, non-empty stream
+    fills the cache.
+    """
+    messages = recommendation_messages(user_name, progress_summary)
+    key = recommendation_cache_key(messages)
+    cached = await recommendation_cache.aget(key)
+    if cached is not None:
+        yield cached
+        return
+
+    parts = []
+    tokens = llm.stream_chat(messages, **RECOMMENDATION_PARAMS)
+    try:
+        async for token in tokens:
+            parts.append(token)
+            yield token
+    finally:
+        await tokens.aclose()
+    reply = "".join(parts).strip()
+    if reply:
+        await recommendation_cache.aset(key, reply, user_id=user_id)
+
+
+async def generate_ai_response(prompt: str) -> str:
+    """
+    Free-form answer from the AI assistant. Concurrent identical prompts
+    (e.g. a whole class asking the same question) share one LLM call.
+    """
+    try:
+        messages = [
+            {"role": "system", "content": "You are an intelligent AI learning assistant."},
+            {"role": "user", "content": prompt}
+        ]
+        return await response_flight.do(make_key(llm.model, messages), lambda: llm.chat(messages))
+
+    except Exception as e:
+        return f"Error generating AI response: {e}"
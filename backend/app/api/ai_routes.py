@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from app.services.ai_service import generate_ai_response
+from app.ai_service import generate_ai_response
+from app.singleflight import coalescing_stats
 
 router = APIRouter(prefix="/ai", tags=["AI"])
 
@@ -8,8 +9,13 @@ class AIRequest(BaseModel):
     prompt: str
 
 @router.post("/chat")
-def chat_with_ai(request: AIRequest):
-    response = generate_ai_response(request.prompt)
+async def chat_with_ai(request: AIRequest):
+    response = await generate_ai_response(request.prompt)
     if response.startswith("Error"):
         raise HTTPException(status_code=500, detail=response)
     return {"response": response}
+
+@router.get("/stats/coalescing")
+def get_coalescing_stats():
+    """How many LLM calls were saved by request coalescing, per call type."""
+    return coalescing_stats()
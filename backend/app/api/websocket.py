@@ -0,0 +1,88 @@
+# backend/app/api/websocket.py
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, status
+from starlette.concurrency import run_in_threadpool
+
+from app import database
+from app.auth.oauth2 import websocket_user_id
+from app.ai_chat import chat_messages, persist_exchange
+from app.ai_service import stream_ai_recommendation
+from app.llm_client import llm
+from app.recommender import _progress_summary, persist_recommendation
+from app.streaming import websocket_token_stream
+
+router = APIRouter(tags=["Streaming"])
+
+
+def _load_progress_summary(user_id: int):
+    db = database.SessionLocal()
+    try:
+        return _progress_summary(user_id, db)
+    finally:
+        db.close()
+
+
+async def _authenticate(websocket: WebSocket):
+    """(ok, user id or None); a bad token rejects the handshake."""
+    try:
+        return True, await websocket_user_id(websocket)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return False, None
+
+
+# -----------------------------------------------------------------------------
+# Chat: send {"message": ...}, receive token frames.
+# Connect with ?token=<JWT> to have each exchange saved to your chat history.
+# Send {"type": "cancel"} mid-stream to stop the current reply; any other
+# message sent mid-stream is answered with {"type": "error", "code": "busy"}.
+# -----------------------------------------------------------------------------
+@router.websocket("/chat/ws")
+async def websocket_chat(websocket: WebSocket):
+    ok, user_id = await _authenticate(websocket)
+    if not ok:
+        return
+    await websocket.accept()
+    try:
+        while True:
+            request = await websocket.receive_json()
+            message = request.get("message") if isinstance(request, dict) else None
+            if not message:
+                await websocket.send_json({"type": "error", "detail": "Message is required"})
+                continue
+
+            outcome = await websocket_token_stream(
+                websocket,
+                llm.stream_chat(chat_messages(message)),
+                persist_exchange(user_id, message),
+            )
+            if outcome == "disconnect":
+                return
+    except WebSocketDisconnect:
+        return
+
+
+# -----------------------------------------------------------------------------
+# AI recommendations for one user, streamed once then closed.
+# Requires ?token=<JWT> for that user (the reply is saved to their history).
+# -----------------------------------------------------------------------------
+@router.websocket("/ai/ws/recommendations/{user_id}")
+async def websocket_ai_recommendations(websocket: WebSocket, user_id: int):
+    ok, current_user_id = await _authenticate(websocket)
+    if not ok:
+        return
+    if current_user_id != user_id:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    user_summary = await run_in_threadpool(_load_progress_summary, user_id)
+    if user_summary is None:
+        await websocket.send_json({"type": "error", "detail": "User not found"})
+        await websocket.close()
+        return
+    username, summary = user_summary
+
+    outcome = await websocket_token_stream(
+        websocket, stream_ai_recommendation(username, summary, user_id=user_id), persist_recommendation(user_id)
+    )
+    if outcome != "disconnect":
+        await websocket.close()
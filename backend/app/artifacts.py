@@ -0,0 +1,175 @@
+# backend/app/artifacts.py
+import json
+import os
+import shutil
+from datetime import datetime
+from typing import TYPE_CHECKING, List, Optional
+
+import numpy as np
+from scipy import sparse
+from dotenv import load_dotenv
+
+if TYPE_CHECKING:  # scikit-learn is imported when artifacts are loaded, not with the app
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+load_dotenv()
+
+# Versioned recommender artifacts written by ml_models/train_recommender.py
+ARTIFACT_DIR = os.getenv(
+    "RECOMMENDER_ARTIFACT_DIR",
+    os.path.join(os.path.dirname(__file__), "..", "..", "ml_models", "artifacts"),
+)
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+FORMAT_VERSION = 1
+
+
+class RecommenderArtifacts:
+    """
+    One trained version, loaded from disk. Arrays are memory-mapped, so
+    every worker process shares the same pages from the OS cache.
+    """
+
+    def __init__(self, version: str, manifest: dict, vectorizer: "TfidfVectorizer", matrix,
+                 course_ids: List[int], titles: List[str], neighbors: np.ndarray,
+                 neighbor_scores: np.ndarray, popularity: np.ndarray, path: str):
+        self.version = version
+        self.manifest = manifest
+        self.vectorizer = vectorizer
+        self.matrix = matrix
+        self.course_ids = course_ids
+        self.titles = titles
+        self.neighbors = neighbors
+        self.neighbor_scores = neighbor_scores
+        self.popularity = popularity
+        self.path = path
+
+
+# -------------------- Writing --------------------
+def _save_csr(path: str, name: str, matrix) -> dict:
+    matrix = sparse.csr_matrix(matrix)
+    for part in ("data", "indices", "indptr"):
+        np.save(os.path.join(path, f"{name}.{part}.npy"), getattr(matrix, part))
+    return {"shape": list(matrix.shape), "nnz": int(matrix.nnz)}
+
+
+def _write_atomic(path: str, text: str):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def write_artifacts(root: str, vectorizer: "TfidfVectorizer", matrix, course_ids, titles,
+                    neighbors: np.ndarray, neighbor_scores: np.ndarray, popularity: np.ndarray,
+                    fingerprint: str = "", search=None, extra: Optional[dict] = None, keep: int = 3) -> str:
+    """
+    Write a new artifact version and publish it by swapping the CURRENT
+    pointer. Readers never see a half-written version. `search` is an
+    optional prebuilt vector-search backend shipped alongside.
+    """
+    version = datetime.utcnow().strftime("v%Y%m%d%H%M%S%f")
+    os.makedirs(root, exist_ok=True)
+    staging = os.path.join(root, f".staging-{version}")
+    os.makedirs(staging)
+
+    with open(os.path.join(staging, "vocabulary.json"), "w") as f:
+        json.dump(vectorizer.get_feature_names_out().tolist(), f)
+    np.save(os.path.join(staging, "idf.npy"), vectorizer.idf_.astype(np.float64))
+    np.save(os.path.join(staging, "course_ids.npy"), np.asarray(course_ids, dtype=np.int64))
+    with open(os.path.join(staging, "titles.json"), "w") as f:
+        json.dump(list(titles), f)
+    np.save(os.path.join(staging, "neighbors.npy"), np.asarray(neighbors, dtype=np.int64))
+    np.save(os.path.join(staging, "neighbor_scores.npy"), np.asarray(neighbor_scores, dtype=np.float32))
+    np.save(os.path.join(staging, "popularity.npy"), np.asarray(popularity, dtype=np.float32))
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "version": version,
+        "created_at": datetime.utcnow().isoformat(),
+        "n_courses": len(course_ids),
+        "vocabulary_size": len(vectorizer.idf_),
+        "stop_words": vectorizer.stop_words,
+        "course_vectors": _save_csr(staging, "course_vectors", matrix),
+        "neighbors_k": int(np.asarray(neighbors).shape[1]) if len(course_ids) else 0,
+        "fingerprint": fingerprint,
+        **(extra or {}),
+    }
+    if search is not None:
+        search.save(os.path.join(staging, "search"), fingerprint)
+    _write_atomic(os.path.join(staging, MANIFEST_FILE), json.dumps(manifest, indent=2))
+
+    os.replace(staging, os.path.join(root, version))
+    _write_atomic(os.path.join(root, CURRENT_FILE), version)
+    prune_versions(root, keep)
+    return version
+
+
+def prune_versions(root: str, keep: int):
+    """
+    Delete all but the newest `keep` versions (never the current one).
+    Old mmaps stay valid for readers that still hold them on POSIX.
+    """
+    current = current_version(root)
+    versions = sorted(d for d in os.listdir(root) if d.startswith("v") and os.path.isdir(os.path.join(root, d)))
+    for version in versions[:-keep] if keep > 0 else []:
+        if version != current:
+            shutil.rmtree(os.path.join(root, version), ignore_errors=True)
+
+
+# -------------------- Reading --------------------
+def current_version(root: str = ARTIFACT_DIR) -> Optional[str]:
+    try:
+        with open(os.path.join(root, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def load_artifacts(root: str = ARTIFACT_DIR, version: Optional[str] = None,
+                   mmap_mode: Optional[str] = "r") -> Optional[RecommenderArtifacts]:
+    """
+    Load a version (default: CURRENT) with its arrays memory-mapped.
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    version = version or current_version(root)
+    if not version:
+        return None
+    path = os.path.join(root, version)
+    with open(os.path.join(path, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT_VERSION:
+        return None
+
+    def array(name):
+        return np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+
+    with open(os.path.join(path, "vocabulary.json")) as f:
+        vocabulary = json.load(f)
+    vectorizer = TfidfVectorizer(stop_words=manifest.get("stop_words"), vocabulary=vocabulary)
+    vectorizer.idf_ = np.asarray(array("idf"))
+
+    shape = tuple(manifest["course_vectors"]["shape"])
+    matrix = sparse.csr_matrix(
+        (array("course_vectors.data"), array("course_vectors.indices"), array("course_vectors.indptr")),
+        shape=shape,
+        copy=False,
+    )
+    with open(os.path.join(path, "titles.json")) as f:
+        titles = json.load(f)
+
+    return RecommenderArtifacts(
+        version=version,
+        manifest=manifest,
+        vectorizer=vectorizer,
+        matrix=matrix,
+        course_ids=array("course_ids").tolist(),
+        titles=titles,
+        neighbors=array("neighbors"),
+        neighbor_scores=array("neighbor_scores"),
+        popularity=array("popularity"),
+        path=path,
+    )
@@ -0,0 +1,183 @@
+# backend/app/auth/oauth2.py
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+from fastapi import Depends, HTTPException, WebSocket, status
+from fastapi.security import OAuth2PasswordBearer
+from jose import JWTError, jwt
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from starlette.concurrency import run_in_threadpool
+
+from app import models, database
+from app.auth import SECRET_KEY, ALGORITHM
+from app.instrumentation import note_active_user
+
+load_dotenv()
+
+# Verified JWTs kept in memory (each entry expires with the token's `exp`)
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+# How long a user row is served from memory before it is re-read
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "30"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login/")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login/", auto_error=False)
+
+_USER_COLUMNS = ("id", "username", "email")
+
+
+class _ExpiringLRU:
+    """
+    Bounded LRU where every entry carries its own expiry (epoch seconds).
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[str, Tuple[float, object]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value, expires_at: float):
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def stats(self) -> dict:
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+_token_cache = _ExpiringLRU(TOKEN_CACHE_SIZE)   # token -> claims
+_user_cache = _ExpiringLRU(USER_CACHE_SIZE)     # email -> {column: value}
+
+_credentials_error = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+
+# -------------------- Token Verification --------------------
+def verify_token(token: str) -> Dict:
+    """
+    Decode + verify a JWT, reusing the result for repeat requests with the
+    same token until it expires.
+    """
+    claims = _token_cache.get(token)
+    if claims is not None:
+        return claims
+    try:
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise _credentials_error
+    if claims.get("sub") is None:
+        raise _credentials_error
+    _token_cache.set(token, claims, float(claims.get("exp", time.time())))
+    return claims
+
+
+# -------------------- User Lookup --------------------
+def _load_user_row(db: Session, email: str) -> Optional[dict]:
+    user = db.query(models.User).filter(models.User.email == email).first()
+    return {c: getattr(user, c) for c in _USER_COLUMNS} if user else None
+
+
+def _attach(db: Session, row: dict) -> models.User:
+    """
+    Turn a cached row into a User bound to this request's session, without SQL.
+    Columns not cached (password) and relationships lazy-load on access.
+    """
+    user = models.User(**row)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+def invalidate_user(email: str):
+    _user_cache.pop(email)
+
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_on_change(mapper, connection, target):
+    invalidate_user(target.email)
+    previous = inspect(target).attrs.email.history.deleted
+    for email in previous or ():
+        invalidate_user(email)
+
+
+async def _user_row(db: Session, email: str) -> dict:
+    row = _user_cache.get(email)
+    if row is None:
+        row = await run_in_threadpool(_load_user_row, db, email)
+        if row is None:
+            raise _credentials_error
+        _user_cache.set(email, row, time.time() + USER_CACHE_TTL)
+    note_active_user(row["id"])
+    return row
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)) -> models.User:
+    """
+    Authenticated user for this request. The warm path (token and user both
+    cached) does no JWT decoding, no SQL and no thread hop.
+    """
+    row = await _user_row(db, verify_token(token)["sub"])
+    return _attach(db, row)
+
+
+async def get_optional_user(token: Optional[str] = Depends(optional_oauth2_scheme),
+                            db: Session = Depends(database.get_db)) -> Optional[models.User]:
+    """
+    Like get_current_user, but None for anonymous requests. A token that is
+    sent but invalid is still a 401.
+    """
+    if token is None:
+        return None
+    return await get_current_user(token, db)
+
+
+async def websocket_user_id(websocket: WebSocket) -> Optional[int]:
+    """
+    User id for a WebSocket handshake, from `?token=<JWT>` (browsers can't set
+    headers on WebSockets) or an `Authorization: Bearer` header. None when no
+    token was sent; raises the usual 401 HTTPException for a bad one.
+    """
+    token = websocket.query_params.get("token")
+    if not token:
+        scheme, _, value = websocket.headers.get("authorization", "").partition(" ")
+        token = value if scheme.lower() == "bearer" else None
+    if not token:
+        return None
+    email = verify_token(token)["sub"]
+    db = database.SessionLocal()
+    try:
+        return (await _user_row(db, email))["id"]
+    finally:
+        db.close()
+
+
+def cache_stats() -> dict:
+    return {"tokens": _token_cache.stats(), "users": _user_cache.stats()}
@@ -0,0 +1,176 @@
+# backend/app/career_paths.py
+"""
+Career path engine: course -> skill -> career.
+
+- course_skill (courses x skills, sparse) is derived once from course text
+  and cached until the catalog changes
+- skill_career (skills x careers) comes from the taxonomy below, with each
+  career's weights normalised to sum to 1
+- a learner's skill level is completion-weighted course coverage (capped at
+  1), and career scores are one matrix product - for one user or thousands
+"""
+import re
+import threading
+from typing import Dict, List, Sequence
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app import models
+
+# A course counts as completed (for career purposes) from this percentage
+COMPLETION_THRESHOLD = 80.0
+# Completed courses teaching a skill before it counts as fully covered
+SKILL_MASTERY_COURSES = 2.0
+
+# skill -> keywords matched (whole words) against course title / category / description
+SKILLS: Dict[str, List[str]] = {
+    "Python": ["python", "pandas", "programming"],
+    "Software Engineering": ["oop", "decorators", "async", "advanced python", "api"],
+    "Machine Learning": ["machine learning", "supervised", "unsupervised", "ml", "predictive"],
+    "Deep Learning": ["deep learning", "neural", "neural networks", "cnn", "cnns", "rnn", "rnns", "tensorflow"],
+    "NLP": ["nlp", "natural language", "text", "tokenization", "transformers", "chatbot", "language models",
+            "conversational"],
+    "Computer Vision": ["computer vision", "vision", "image", "object detection"],
+    "Data Analysis": ["data analysis", "data science", "visualization", "sql", "data cleaning", "analytics",
+                      "analyzing data"],
+    "Statistics": ["statistics", "probability", "forecasting", "time series"],
+    "Reinforcement Learning": ["reinforcement", "reward", "policy gradients"],
+    "AI Foundations": ["ai", "artificial intelligence", "introduction", "real-world applications"],
+}
+
+# career -> {skill: weight}
+CAREERS: Dict[str, Dict[str, float]] = {
+    "Machine Learning Engineer": {"Machine Learning": 1.0, "Deep Learning": 0.6, "Python": 0.6,
+                                  "Software Engineering": 0.4, "Statistics": 0.3},
+    "Data Scientist": {"Data Analysis": 1.0, "Statistics": 0.9, "Machine Learning": 0.7, "Python": 0.6},
+    "Data Analyst": {"Data Analysis": 1.0, "Statistics": 0.6, "Python": 0.3},
+    "NLP Engineer": {"NLP": 1.0, "Deep Learning": 0.6, "Machine Learning": 0.4, "Python": 0.3},
+    "Computer Vision Engineer": {"Computer Vision": 1.0, "Deep Learning": 0.7, "Machine Learning": 0.3,
+                                 "Python": 0.3},
+    "AI Research Scientist": {"Deep Learning": 0.8, "Reinforcement Learning": 0.8, "Machine Learning": 0.7,
+                              "Statistics": 0.5},
+    "AI Product Manager": {"AI Foundations": 1.0, "Data Analysis": 0.3, "Machine Learning": 0.3},
+    "Python Developer": {"Python": 1.0, "Software Engineering": 0.8},
+}
+
+SKILL_NAMES = list(SKILLS)
+CAREER_NAMES = list(CAREERS)
+
+_SKILL_PATTERNS = [
+    re.compile(r"\b(" + "|".join(re.escape(k) for k in sorted(keywords, key=len, reverse=True)) + r")\b")
+    for keywords in SKILLS.values()
+]
+
+
+def _skill_career_matrix() -> np.ndarray:
+    matrix = np.zeros((len(SKILL_NAMES), len(CAREER_NAMES)), dtype=np.float64)
+    for j, weights in enumerate(CAREERS.values()):
+        for skill, weight in weights.items():
+            matrix[SKILL_NAMES.index(skill), j] = weight
+    return matrix / matrix.sum(axis=0, keepdims=True)
+
+
+SKILL_CAREER = _skill_career_matrix()
+
+
+def course_skills(text: str) -> np.ndarray:
+    """
+    0/1 vector of the skills a course teaches.
+    """
+    text = text.lower()
+    return np.array([1.0 if p.search(text) else 0.0 for p in _SKILL_PATTERNS])
+
+
+def rank_careers(skill_levels: np.ndarray, top_n: int = 3) -> List[List[dict]]:
+    """
+    (n_users x n_skills) skill levels in [0, 1] -> top careers per user.
+    """
+    # Rounded so float noise can't reorder ties; ties keep taxonomy order
+    scores = np.round(skill_levels @ SKILL_CAREER, 6)  # (n_users x n_careers), in [0, 1]
+    top = np.argsort(-scores, axis=1, kind="stable")[:, :top_n]
+    results = []
+    for i, columns in enumerate(top):
+        ranked = []
+        for j in columns:
+            if scores[i, j] <= 0:
+                break
+            matched = [s for s in CAREERS[CAREER_NAMES[j]] if skill_levels[i, SKILL_NAMES.index(s)] > 0]
+            ranked.append({"career": CAREER_NAMES[j], "score": round(float(scores[i, j]), 3),
+                           "matched_skills": matched})
+        results.append(ranked)
+    return results
+
+
+class CareerPathEngine:
+    """
+    Holds the course -> skill matrix for the current catalog. Rebuilt only
+    when the catalog changes (course count / max id).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        # (course_id -> row, course_skill matrix), swapped as one tuple so readers never mix catalogs
+        self._state = ({}, sparse.csr_matrix((0, len(SKILL_NAMES))))
+
+    def sync(self, db: Session) -> "CareerPathEngine":
+        version = tuple(db.execute(select(func.count(models.Course.id), func.max(models.Course.id))).one())
+        if version == self._version:
+            return self
+        with self._lock:
+            if version != self._version:
+                rows = db.execute(select(
+                    models.Course.id, models.Course.title, models.Course.category, models.Course.description
+                ).order_by(models.Course.id)).all()
+                vectors = [course_skills(" ".join(filter(None, r[1:]))) for r in rows]
+                course_skill = sparse.csr_matrix(
+                    np.vstack(vectors) if vectors else np.zeros((0, len(SKILL_NAMES)))
+                )
+                self._state = ({r.id: i for i, r in enumerate(rows)}, course_skill)
+                self._version = version
+        return self
+
+    def skill_levels(self, completions: Sequence[Dict[int, float]]) -> np.ndarray:
+        """
+        One {course_id: completion %} dict per user -> (n_users x n_skills),
+        each skill in [0, 1] (1 = SKILL_MASTERY_COURSES completed courses).
+        """
+        row_of, course_skill = self._state
+        row_idx, col_idx, weights = [], [], []
+        for i, courses in enumerate(completions):
+            for course_id, completion in courses.items():
+                if course_id in row_of:
+                    row_idx.append(i)
+                    col_idx.append(row_of[course_id])
+                    weights.append(min(completion or 0.0, 100.0) / 100.0)
+        membership = sparse.csr_matrix(
+            (weights, (row_idx, col_idx)), shape=(len(completions), len(row_of))
+        )
+        levels = membership @ course_skill
+        levels = levels.toarray() if sparse.issparse(levels) else np.asarray(levels)
+        return np.minimum(levels / SKILL_MASTERY_COURSES, 1.0)
+
+    def recommend(self, completions: Sequence[Dict[int, float]], top_n: int = 3) -> List[List[dict]]:
+        return rank_careers(self.skill_levels(completions), top_n)
+
+
+def completed_courses_for_users(db: Session, user_ids: Sequence[int],
+                                threshold: float = COMPLETION_THRESHOLD) -> Dict[int, Dict[int, float]]:
+    """
+    {user_id: {course_id: completion}} for completed courses, in one query.
+    """
+    rows = db.execute(
+        select(models.Progress.user_id, models.Progress.course_id, models.Progress.completion_percentage)
+        .where(models.Progress.user_id.in_(list(user_ids)),
+               models.Progress.completion_percentage >= threshold)
+    )
+    completed: Dict[int, Dict[int, float]] = {uid: {} for uid in user_ids}
+    for user_id, course_id, completion in rows:
+        completed[user_id][course_id] = completion
+    return completed
+
+
+shared_engine = CareerPathEngine()
@@ -0,0 +1,148 @@
+# backend/app/chat_context.py
+import os
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app import models, database
+from app.crud.chat_crud import get_chat_page
+from app.llm_client import LLMError, llm
+from app.singleflight import flight_group
+
+# Token budget for history sent with each prompt (summary + recent turns)
+CHAT_CONTEXT_TOKENS = int(os.getenv("CHAT_CONTEXT_TOKENS", "2000"))
+# Messages that fell out of the window before the summary is refreshed
+CHAT_SUMMARY_MIN_MESSAGES = int(os.getenv("CHAT_SUMMARY_MIN_MESSAGES", "10"))
+# Upper bound on messages folded into the summary in one LLM call
+CHAT_SUMMARY_BATCH = int(os.getenv("CHAT_SUMMARY_BATCH", "40"))
+
+SYSTEM_PROMPT = "You are an intelligent AI learning assistant."
+
+summary_flight = flight_group("chat_summary")
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """
+    Rough token count (~4 characters per token); avoids a tokenizer dependency.
+    """
+    return len(text or "") // 4 + 1
+
+
+def _as_chat(message: models.ChatMessage) -> dict:
+    return {"role": "assistant" if message.sender == "ai" else "user", "content": message.message}
+
+
+# -------------------- Context Window --------------------
+def build_context_window(db: Session, user_id: int, new_message: str,
+                         budget: int = CHAT_CONTEXT_TOKENS, page_size: int = 50) -> Tuple[List[dict], Optional[int]]:
+    """
+    Prompt messages for the next turn: system prompt, the stored rolling
+    summary, then as many of the newest messages as fit in `budget` tokens.
+    History is read newest-first through the keyset index and reading stops
+    as soon as the budget is spent, so cost does not grow with history.
+    Returns (messages, window start): the id of the oldest message included,
+    or - when even the newest unsummarized message did not fit - one past it,
+    so everything before the window can still be summarized. None when there
+    is nothing outside the window to summarize.
+    """
+    summary = db.get(models.ChatSummary, user_id)
+    summarized_up_to = summary.last_message_id if summary else 0
+    remaining = budget - estimate_tokens(new_message) - estimate_tokens(summary.summary if summary else "")
+
+    history: List[models.ChatMessage] = []
+    dropped: Optional[models.ChatMessage] = None  # newest unsummarized message left out
+    before = None
+    while remaining > 0:
+        page, next_cursor = get_chat_page(db, user_id, limit=page_size, before=before)
+        for message in reversed(page):  # newest first
+            cost = estimate_tokens(message.message)
+            if message.id <= summarized_up_to or cost > remaining:
+                if message.id > summarized_up_to:
+                    dropped = message
+                remaining = 0
+                break
+            remaining -= cost
+            history.append(message)
+        if not next_cursor or not page:
+            break
+        before = (page[0].timestamp, page[0].id)
+    history.reverse()
+
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+    if summary and summary.summary:
+        messages.append({"role": "system", "content": f"Summary of the earlier conversation: {summary.summary}"})
+    messages.extend(_as_chat(m) for m in history)
+    messages.append({"role": "user", "content": new_message})
+    if history:
+        window_start_id = history[0].id
+    else:
+        window_start_id = dropped.id + 1 if dropped else None
+    return messages, window_start_id
+
+
+# -------------------- Rolling Summary --------------------
+def _pending_for_summary(user_id: int, window_start_id: int) -> Tuple[str, List[models.ChatMessage]]:
+    db = database.SessionLocal()
+    try:
+        summary = db.get(models.ChatSummary, user_id)
+        pending = (
+            db.query(models.ChatMessage)
+            .filter(models.ChatMessage.user_id == user_id)
+            .filter(models.ChatMessage.id > (summary.last_message_id if summary else 0))
+            .filter(models.ChatMessage.id < window_start_id)
+            .order_by(models.ChatMessage.id)
+            .limit(CHAT_SUMMARY_BATCH)
+            .all()
+        )
+        return (summary.summary if summary else ""), pending
+    finally:
+        db.close()
+
+
+def _store_summary(user_id: int, text: str, last_message_id: int):
+    db = database.SessionLocal()
+    try:
+        summary = db.get(models.ChatSummary, user_id)
+        if summary is None:
+            summary = models.ChatSummary(user_id=user_id)
+            db.add(summary)
+        summary.summary = text
+        summary.last_message_id = last_message_id
+        db.commit()
+    finally:
+        db.close()
+
+
+async def _refresh_summary(user_id: int, window_start_id: int):
+    previous, pending = await run_in_threadpool(_pending_for_summary, user_id, window_start_id)
+    if len(pending) < CHAT_SUMMARY_MIN_MESSAGES:
+        return
+    transcript = "\n".join(f"{m.sender}: {m.message}" for m in pending)
+    try:
+        text = await llm.chat(
+            [
+                {"role": "system", "content": "You maintain a concise running summary of a tutoring conversation."},
+                {"role": "user", "content": (
+                    f"Current summary:\n{previous or '(none)'}\n\nNew messages:\n{transcript}\n\n"
+                    "Return the updated summary in under 200 words, keeping the learner's goals, "
+                    "progress and open questions."
+                )},
+            ],
+            temperature=0.2,
+        )
+    except LLMError as e:
+        # Keep the existing summary; the same messages are retried on the next refresh
+        print(f"⚠️ Chat summary refresh failed for user {user_id}: {e}")
+        return
+    await run_in_threadpool(_store_summary, user_id, text, pending[-1].id)
+
+
+async def refresh_summary(user_id: int, window_start_id: Optional[int]):
+    """
+    Background task: fold messages that dropped out of the context window
+    into the stored summary. One refresh per user at a time.
+    """
+    if window_start_id is None:
+        return
+    await summary_flight.do(str(user_id), lambda: _refresh_summary(user_id, window_start_id))
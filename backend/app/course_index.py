@@ -0,0 +1,256 @@
+# backend/app/course_index.py
+import hashlib
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy.orm import Session
+
+from app import models
+from app.artifacts import ARTIFACT_DIR, current_version, load_artifacts
+from app.vector_search import VECTOR_INDEX_DIR, VectorSearchBackend, load_backend, make_backend
+
+if TYPE_CHECKING:  # scikit-learn is imported on the first index build, not with the app
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+
+def course_text(category: Optional[str], description: Optional[str]) -> str:
+    """
+    Text used to vectorize a course (category + description).
+    """
+    return f"{category or ''} {description or ''}".strip()
+
+
+# Seconds between checks for a newly published artifact version
+ARTIFACT_CHECK_INTERVAL = float(os.getenv("ARTIFACT_CHECK_INTERVAL", "30"))
+
+
+def catalog_fingerprint(course_ids: Sequence[int], texts: Sequence[str]) -> str:
+    digest = hashlib.sha1()
+    for cid, text in zip(course_ids, texts):
+        digest.update(f"{cid}\x1f{text}\x1e".encode())
+    return digest.hexdigest()
+
+
+# -------------------- Index Snapshot --------------------
+class IndexState:
+    """
+    Immutable view of the course index. Readers grab one snapshot and use it
+    for the whole request, so a concurrent rebuild never mixes two versions.
+    """
+
+    def __init__(self, vectorizer=None, matrix=None, course_ids=None, titles=None, search=None,
+                 neighbors=None, neighbor_scores=None, popularity=None, version=None):
+        self.vectorizer: Optional["TfidfVectorizer"] = vectorizer
+        self.matrix = matrix  # CSR (n_courses x vocab), rows are L2-normalised
+        self.search: Optional[VectorSearchBackend] = search  # k-NN over the same rows
+        self.course_ids: List[int] = list(course_ids or [])
+        self.titles: List[str] = list(titles or [])
+        self.row_of: Dict[int, int] = {cid: i for i, cid in enumerate(self.course_ids)}
+        self.max_id: int = max(self.course_ids, default=0)
+        # Optional precomputed data from a trained artifact version
+        self.neighbors: Optional[np.ndarray] = neighbors  # (n_trained x k) course ids
+        self.neighbor_scores: Optional[np.ndarray] = neighbor_scores
+        self.popularity: Optional[np.ndarray] = popularity  # one prior per row
+        self.version: Optional[str] = version
+
+    @property
+    def is_empty(self) -> bool:
+        return self.vectorizer is None or not self.course_ids
+
+    def rows_for(self, course_ids: Sequence[int]) -> List[int]:
+        return [self.row_of[cid] for cid in course_ids if cid in self.row_of]
+
+    def transform(self, texts: Sequence[str]):
+        return self.vectorizer.transform(texts)
+
+    def similarity(self, query_vectors, rows: Optional[Sequence[int]] = None) -> np.ndarray:
+        """
+        Cosine similarity of query vectors against (a subset of) the catalog.
+        Rows are already L2-normalised, so a dot product is enough.
+        """
+        matrix = self.matrix if rows is None else self.matrix[rows]
+        scores = matrix @ query_vectors.T
+        if sparse.issparse(scores):
+            scores = scores.toarray()
+        return np.asarray(scores).T  # (n_queries x n_rows)
+
+    def nearest(self, rows: Sequence[int], k: int):
+        """
+        k nearest courses for each row: read from the trained neighbour graph
+        when it covers the rows, otherwise one batched k-NN search.
+        """
+        graph = self.neighbors
+        if graph is not None and k <= graph.shape[1] and max(rows) < len(graph):
+            return self.neighbor_scores[rows, :k], graph[rows, :k]
+        return self.search.search(self.matrix[rows], k)
+
+    def popular_ids(self, n: int) -> Optional[List[int]]:
+        if self.popularity is None or not len(self.popularity):
+            return None
+        top = np.argsort(-np.asarray(self.popularity), kind="stable")[:n]
+        return [self.course_ids[i] for i in top]
+
+
+# -------------------- Shared Course Index --------------------
+class CourseIndex:
+    """
+    TF-IDF course vectors fitted once and shared by every recommender path.
+    New courses are transformed with the fitted vocabulary and appended, so
+    requests only ever run a transform plus a similarity lookup.
+    """
+
+    def __init__(self, artifact_root: str = ARTIFACT_DIR):
+        self._lock = threading.Lock()
+        self._state = IndexState()
+        self._artifact_root = artifact_root
+        self._checked_at = 0.0
+
+    def snapshot(self) -> IndexState:
+        return self._state
+
+    def build_from_records(self, course_ids: List[int], titles: List[str], texts: List[str],
+                           persist_dir: Optional[str] = None) -> IndexState:
+        """
+        Fit the vectorizer on the given catalog and swap it in atomically.
+        With `persist_dir`, the k-NN backend is reloaded from disk when it was
+        built from the same catalog, and saved there otherwise.
+        """
+        state = IndexState()
+        if course_ids:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+
+            vectorizer = TfidfVectorizer(stop_words="english")
+            try:
+                matrix = vectorizer.fit_transform(texts).tocsr()
+                fingerprint = catalog_fingerprint(course_ids, texts)
+                search = load_backend(persist_dir, fingerprint)
+                if search is None:
+                    search = make_backend().build(matrix, course_ids)
+                    if persist_dir:
+                        search.save(persist_dir, fingerprint)
+                state = IndexState(vectorizer, matrix, course_ids, titles, search)
+            except ValueError:
+                # Empty vocabulary (e.g. only stop words) - leave the index empty
+                pass
+        with self._lock:
+            self._state = state
+        return state
+
+    def build(self, db: Session) -> IndexState:
+        """
+        (Re)build the index from the Course table.
+        """
+        rows = (
+            db.query(models.Course.id, models.Course.title, models.Course.category, models.Course.description)
+            .order_by(models.Course.id)
+            .all()
+        )
+        return self.build_from_records(
+            [r.id for r in rows],
+            [r.title for r in rows],
+            [course_text(r.category, r.description) for r in rows],
+            persist_dir=VECTOR_INDEX_DIR,
+        )
+
+    def add_courses(self, courses: Sequence[models.Course]) -> IndexState:
+        """
+        Append courses without refitting. Terms unseen at fit time are ignored
+        until the next full rebuild.
+        """
+        with self._lock:
+            state = self._state
+            new = [c for c in courses if c.id not in state.row_of]
+            if not new:
+                return state
+            if not state.is_empty:
+                vectors = state.transform([course_text(c.category, c.description) for c in new])
+                self._state = IndexState(
+                    state.vectorizer,
+                    sparse.vstack([state.matrix, vectors], format="csr"),
+                    state.course_ids + [c.id for c in new],
+                    state.titles + [c.title for c in new],
+                    state.search.extended(vectors, [c.id for c in new]),
+                    state.neighbors,
+                    state.neighbor_scores,
+                    None if state.popularity is None
+                    else np.concatenate([state.popularity, np.zeros(len(new), dtype=np.float32)]),
+                    state.version,
+                )
+                return self._state
+
+        # Nothing fitted yet - fit on what we have
+        return self.build_from_records(
+            [c.id for c in new],
+            [c.title for c in new],
+            [course_text(c.category, c.description) for c in new],
+        )
+
+    def add_course(self, course: models.Course) -> IndexState:
+        return self.add_courses([course])
+
+    # -------------------- Trained Artifacts --------------------
+    def load_artifacts(self, version: Optional[str] = None) -> Optional[IndexState]:
+        """
+        Swap in a trained artifact version (memory-mapped). Returns None when
+        no usable version exists.
+        """
+        artifacts = load_artifacts(self._artifact_root, version)
+        if artifacts is None or not artifacts.course_ids:
+            return None
+        search = load_backend(os.path.join(artifacts.path, "search"), artifacts.manifest.get("fingerprint", ""))
+        if search is None:
+            search = make_backend().build(artifacts.matrix, artifacts.course_ids)
+        state = IndexState(
+            artifacts.vectorizer, artifacts.matrix, artifacts.course_ids, artifacts.titles, search,
+            artifacts.neighbors, artifacts.neighbor_scores, artifacts.popularity, artifacts.version,
+        )
+        with self._lock:
+            self._state = state
+        return state
+
+    def maybe_reload(self, interval: float = ARTIFACT_CHECK_INTERVAL):
+        """
+        Hot-swap to a newer artifact version if the CURRENT pointer moved.
+        Checked at most once per `interval` seconds (one small file read).
+        """
+        now = time.monotonic()
+        if now - self._checked_at < interval:
+            return
+        self._checked_at = now
+        version = current_version(self._artifact_root)
+        if version and version != self._state.version:
+            self.load_artifacts(version)
+
+    def warm_start(self, db: Session) -> IndexState:
+        """
+        Startup: prefer the latest trained artifacts, fall back to fitting
+        on the Course table, then pick up courses added since training.
+        """
+        self._checked_at = time.monotonic()
+        if self.load_artifacts() is None:
+            return self.build(db)
+        return self.sync(db)
+
+    def sync(self, db: Session) -> IndexState:
+        """
+        Pick up courses inserted by another worker or a seed script.
+        Costs one indexed range query when nothing changed.
+        """
+        self.maybe_reload()
+        state = self._state
+        if state.is_empty:
+            return self.build(db)
+        new = (
+            db.query(models.Course)
+            .filter(models.Course.id > state.max_id)
+            .order_by(models.Course.id)
+            .all()
+        )
+        return self.add_courses(new) if new else state
+
+
+shared_index = CourseIndex()
@@ -0,0 +1,255 @@
+# backend/app/course_search.py
+"""
+Full-text course search over title / category / description.
+
+- SQLite:   FTS5 external-content table `courses_fts`, kept in sync by
+            triggers on `courses`, ranked with bm25
+- Postgres: generated `courses.search_vector` tsvector + GIN index, ranked
+            with ts_rank
+
+Both sides tokenise without stemming (unicode61 / 'simple'), so they match
+the same words; typing a prefix ("pyth", "learn") matches whole words via
+prefix queries. Title matches rank above category, above description.
+
+Every match is scored, ordered by (score, id) so pages are stable. Cost
+therefore grows with the number of matches (roughly 2us each on SQLite):
+selective queries take a few milliseconds, a term matching a third of a
+100k-course catalog takes ~50 ms.
+
+The index is maintained by the database itself (triggers / generated
+column), so ORM writes, bulk Core inserts and raw SQL all stay in sync.
+
+Backfill / repair:
+    python -m app.course_search rebuild
+"""
+import argparse
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app import models
+
+MAX_TERMS = 8
+MIN_PREFIX = 2  # single letters match whole words only ("c", not every word starting with c)
+MAX_PAGE_SIZE = 100
+
+# Column weights: title, category, description
+_SQLITE_WEIGHTS = "10.0, 4.0, 1.0"
+_SQLITE_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS courses_fts USING fts5(
+        title, category, description,
+        content='courses', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')""",
+    """CREATE TRIGGER IF NOT EXISTS courses_fts_ai AFTER INSERT ON courses BEGIN
+        INSERT INTO courses_fts(rowid, title, category, description)
+        VALUES (new.id, new.title, new.category, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS courses_fts_ad AFTER DELETE ON courses BEGIN
+        INSERT INTO courses_fts(courses_fts, rowid, title, category, description)
+        VALUES ('delete', old.id, old.title, old.category, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS courses_fts_au AFTER UPDATE ON courses BEGIN
+        INSERT INTO courses_fts(courses_fts, rowid, title, category, description)
+        VALUES ('delete', old.id, old.title, old.category, old.description);
+        INSERT INTO courses_fts(rowid, title, category, description)
+        VALUES (new.id, new.title, new.category, new.description);
+    END""",
+]
+_POSTGRES_DDL = [
+    """ALTER TABLE courses ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(category, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'C')
+    ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_courses_search_vector ON courses USING GIN (search_vector)",
+]
+
+
+# -------------------- Index Maintenance --------------------
+def ensure_search_index(connection: Connection) -> bool:
+    """
+    Create the index (and its triggers) if missing; True when it was just
+    created and backfilled from the existing rows. Idempotent.
+    """
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'courses_fts'")
+        ).first() is not None
+        for statement in _SQLITE_DDL:
+            connection.execute(text(statement))
+        if not exists:
+            connection.execute(text("INSERT INTO courses_fts(courses_fts) VALUES ('rebuild')"))
+        return not exists
+    if dialect == "postgresql":
+        exists = connection.execute(text(
+            "SELECT 1 FROM information_schema.columns WHERE table_name = 'courses' AND column_name = 'search_vector'"
+        )).first() is not None
+        for statement in _POSTGRES_DDL:
+            connection.execute(text(statement))
+        return not exists
+    return False
+
+
+def rebuild(connection: Connection):
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        ensure_search_index(connection)
+        connection.execute(text("INSERT INTO courses_fts(courses_fts) VALUES ('rebuild')"))
+    elif dialect == "postgresql":
+        # Generated column: recomputed by the database; just make sure it exists
+        ensure_search_index(connection)
+        connection.execute(text("REINDEX INDEX ix_courses_search_vector"))
+
+
+@event.listens_for(models.Course.__table__, "after_create")
+def _create_search_index(target, connection, **kw):
+    ensure_search_index(connection)
+
+
+@event.listens_for(models.Course.__table__, "before_drop")
+def _drop_search_index(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        connection.execute(text("DROP TABLE IF EXISTS courses_fts"))
+
+
+# -------------------- Query Building --------------------
+def search_terms(query: str) -> List[str]:
+    return re.findall(r"\w+", (query or "").lower())[:MAX_TERMS]
+
+
+def _fts5_query(terms: List[str], prefix: bool, column: Optional[str] = None) -> str:
+    # Every term quoted, so user input can't inject FTS5 operators
+    expression = " ".join(f'"{t}"' + ("*" if prefix and len(t) >= MIN_PREFIX else "") for t in terms)
+    return f"{column} : ({expression})" if column else expression
+
+
+def _tsquery(terms: List[str], prefix: bool, weight: str = "") -> str:
+    # \w+ terms need no escaping; "pyth:*A" = prefix "pyth" in weight-A (title) lexemes
+    def lexeme(t):
+        label = ("*" if prefix and len(t) >= MIN_PREFIX else "") + weight
+        return f"{t}:{label}" if label else t
+    return " & ".join(lexeme(t) for t in terms)
+
+
+# -------------------- Search --------------------
+_COURSE_COLUMNS = "c.id, c.title, c.category, c.description"
+
+
+def search_courses(db: Session, query: str, page: int = 1, page_size: int = 20,
+                   prefix: bool = True) -> Tuple[int, List[dict]]:
+    """
+    (total matches, one page of hits best-first). Each hit has the course
+    fields plus `score` (higher is better).
+    """
+    terms = search_terms(query)
+    if not terms:
+        return 0, []
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    params = {"limit": page_size, "offset": (max(page, 1) - 1) * page_size}
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "sqlite":
+        params["q"] = _fts5_query(terms, prefix)
+        total = db.execute(text("SELECT count(*) FROM courses_fts WHERE courses_fts MATCH :q"), params).scalar()
+        # Rank rowids only, then fetch the page's courses
+        rows = db.execute(text(
+            f"SELECT {_COURSE_COLUMNS}, -r.rank AS score FROM ("
+            f"  SELECT rowid, bm25(courses_fts, {_SQLITE_WEIGHTS}) AS rank FROM courses_fts "
+            "  WHERE courses_fts MATCH :q ORDER BY rank, rowid LIMIT :limit OFFSET :offset"
+            ") r JOIN courses c ON c.id = r.rowid ORDER BY r.rank, c.id"
+        ), params).mappings().all()
+    elif dialect == "postgresql":
+        params["q"] = _tsquery(terms, prefix)
+        total = db.execute(text(
+            "SELECT count(*) FROM courses WHERE search_vector @@ to_tsquery('simple', :q)"
+        ), params).scalar()
+        rows = db.execute(text(
+            f"SELECT {_COURSE_COLUMNS}, ts_rank(c.search_vector, query) AS score "
+            "FROM courses c, to_tsquery('simple', :q) query WHERE c.search_vector @@ query "
+            "ORDER BY score DESC, c.id LIMIT :limit OFFSET :offset"
+        ), params).mappings().all()
+    else:
+        return _search_like(db, terms, params)
+    return total, [dict(r) for r in rows]
+
+
+def _search_like(db: Session, terms: List[str], params: dict) -> Tuple[int, List[dict]]:
+    """Other engines: unindexed substring match, title order."""
+    query = db.query(models.Course)
+    for term in terms:
+        pattern = f"%{term}%"
+        query = query.filter(models.Course.title.ilike(pattern) | models.Course.category.ilike(pattern)
+                             | models.Course.description.ilike(pattern))
+    total = query.count()
+    courses = query.order_by(models.Course.title, models.Course.id).limit(params["limit"]).offset(params["offset"])
+    return total, [{"id": c.id, "title": c.title, "category": c.category, "description": c.description,
+                    "score": 0.0} for c in courses]
+
+
+def suggest_titles(db: Session, query: str, limit: int = 8) -> List[dict]:
+    """
+    Typeahead: courses whose title has words starting with every typed term,
+    best title match first (bm25 / ts_rank favour short titles).
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+    params = {"limit": max(1, min(limit, 25))}
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        params["q"] = _fts5_query(terms, prefix=True, column="title")
+        sql = ("SELECT c.id, c.title FROM ("
+               "  SELECT rowid, rank FROM courses_fts WHERE courses_fts MATCH :q ORDER BY rank, rowid LIMIT :limit"
+               ") r JOIN courses c ON c.id = r.rowid ORDER BY r.rank, c.id")
+    elif dialect == "postgresql":
+        params["q"] = _tsquery(terms, prefix=True, weight="A")
+        sql = ("SELECT c.id, c.title FROM courses c, to_tsquery('simple', :q) query "
+               "WHERE c.search_vector @@ query ORDER BY ts_rank(c.search_vector, query) DESC, c.id LIMIT :limit")
+    else:
+        _, hits = _search_like(db, terms, {"limit": params["limit"], "offset": 0})
+        return [{"id": h["id"], "title": h["title"]} for h in hits]
+    return [dict(r) for r in db.execute(text(sql), params).mappings()]
+
+
+def courses_in_category(db: Session, category: str, limit: int = 3) -> List[models.Course]:
+    """
+    Courses whose category contains words starting with the given terms
+    (indexed replacement for `category ILIKE '%...%'`).
+    """
+    terms = search_terms(category)
+    if not terms:
+        return []
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        ids = db.execute(text(
+            "SELECT rowid FROM courses_fts WHERE courses_fts MATCH :q LIMIT :limit"
+        ), {"q": _fts5_query(terms, prefix=True, column="category"), "limit": limit}).scalars().all()
+    elif dialect == "postgresql":
+        ids = db.execute(text(
+            "SELECT id FROM courses WHERE search_vector @@ to_tsquery('simple', :q) LIMIT :limit"
+        ), {"q": _tsquery(terms, prefix=True, weight="B"), "limit": limit}).scalars().all()
+    else:
+        return db.query(models.Course).filter(models.Course.category.ilike(f"%{category}%")).limit(limit).all()
+    courses = db.query(models.Course).filter(models.Course.id.in_(ids)).all()
+    return sorted(courses, key=lambda c: ids.index(c.id))
+
+
+def main():
+    from app import database
+
+    parser = argparse.ArgumentParser(description="Maintain the course search index.")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args()
+
+    models.Base.metadata.create_all(bind=database.engine)
+    with database.engine.begin() as connection:
+        rebuild(connection)
+    print("✅ Rebuilt the course search index.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# backend/app/crud/chat_crud.py
+import base64
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+
+from app import models, database
+
+
+def save_chat_message(db: Session, user_id: int, sender: str, message: str) -> models.ChatMessage:
+    chat_message = models.ChatMessage(user_id=user_id, sender=sender, message=message)
+    db.add(chat_message)
+    db.commit()
+    db.refresh(chat_message)
+    return chat_message
+
+
+def save_chat_messages(user_id: int, messages: Iterable[Tuple[str, str]]) -> List[int]:
+    """
+    Persist (sender, message) pairs in one transaction with a short-lived
+    session. Used once a streamed reply has finished; returns the new ids.
+    """
+    db = database.SessionLocal()
+    try:
+        rows = [models.ChatMessage(user_id=user_id, sender=sender, message=message) for sender, message in messages]
+        db.add_all(rows)
+        db.commit()
+        return [row.id for row in rows]
+    finally:
+        db.close()
+
+
+# -------------------- Keyset Pagination --------------------
+def encode_cursor(message: models.ChatMessage) -> str:
+    raw = f"{message.timestamp.isoformat()}|{message.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Raises ValueError on a malformed cursor.
+    """
+    try:
+        timestamp, message_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+        return datetime.fromisoformat(timestamp), int(message_id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def get_chat_page(db: Session, user_id: int, limit: int = 50,
+                  before: Optional[Tuple[datetime, int]] = None) -> Tuple[List[models.ChatMessage], Optional[str]]:
+    """
+    One page of a user's history, newest page first, walked with a
+    (timestamp, id) keyset on ix_chat_messages_user_ts_id - no OFFSET scans.
+    Returns (messages oldest-first, cursor for the next older page or None).
+    """
+    query = db.query(models.ChatMessage).filter(models.ChatMessage.user_id == user_id)
+    if before is not None:
+        query = query.filter(tuple_(models.ChatMessage.timestamp, models.ChatMessage.id) < tuple_(*before))
+    rows = (
+        query.order_by(models.ChatMessage.timestamp.desc(), models.ChatMessage.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    page = rows[:limit]
+    next_cursor = encode_cursor(page[-1]) if len(rows) > limit else None
+    return list(reversed(page)), next_cursor
@@ -0,0 +1,45 @@
+# backend/app/crud/metrics_crud.py
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.metrics import AIMetric
+from app import metric_rollups
+
+
+def save_metric(db: Session, data: dict) -> AIMetric:
+    """
+    Insert one metrics sample (and fold it into the rollups) and commit.
+    """
+    data = {"created_at": datetime.utcnow(), **data}
+    metric = AIMetric(**data)
+    db.add(metric)
+    metric_rollups.apply_samples(db, [data])
+    db.commit()
+    db.refresh(metric)
+    return metric
+
+
+def save_metrics(db: Session, rows: List[dict]) -> int:
+    """
+    Insert many samples with one executemany, update the rollups, and commit once.
+    """
+    if not rows:
+        return 0
+    now = datetime.utcnow()
+    rows = [{"created_at": now, **row} for row in rows]
+    db.execute(AIMetric.__table__.insert(), rows)
+    metric_rollups.apply_samples(db, rows)
+    db.commit()
+    return len(rows)
+
+
+def get_metric_history(db: Session, start: Optional[datetime] = None,
+                       end: Optional[datetime] = None, limit: int = 100) -> List[AIMetric]:
+    query = db.query(AIMetric)
+    if start is not None:
+        query = query.filter(AIMetric.created_at >= start)
+    if end is not None:
+        query = query.filter(AIMetric.created_at < end)
+    return query.order_by(AIMetric.created_at.asc()).limit(limit).all()
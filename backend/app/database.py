@@ -1,9 +1,150 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+import os
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./ai_learning.db"
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.orm import declarative_base, sessionmaker
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL,connect_args={"check_same_thread":False})
+load_dotenv()
+
+# -------------------- Configuration --------------------
+# Local runs default to SQLite. To use Postgres, set the POSTGRES_* variables
+# (docker-compose does; credentials are escaped here), or DATABASE_URL, which
+# is used as-is and must already be URL-encoded (e.g. "@" in a password -> %40).
+def _database_url() -> str:
+    if os.getenv("DATABASE_URL"):
+        return os.getenv("DATABASE_URL")
+    if os.getenv("POSTGRES_DB"):
+        # URL.create escapes credentials containing @ / : etc.
+        return URL.create(
+            "postgresql",
+            username=os.getenv("POSTGRES_USER", "postgres"),
+            password=os.getenv("POSTGRES_PASSWORD") or None,
+            host=os.getenv("POSTGRES_HOST", "db"),
+            port=int(os.getenv("POSTGRES_PORT", "5432")),
+            database=os.getenv("POSTGRES_DB"),
+        ).render_as_string(hide_password=False)
+    return "sqlite:///./ai_learning.db"
+
+SQLALCHEMY_DATABASE_URL = _database_url()
+
+# Postgres pool
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+
+# SQLite pragmas
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+SQL_ECHO = os.getenv("SQL_ECHO", "false").lower() == "true"
+
+
+# -------------------- Engine Profiles --------------------
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    WAL lets readers run alongside the writer; synchronous=NORMAL is safe with
+    WAL and avoids an fsync per commit; mmap serves reads from the page cache.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    backend = make_url(url).get_backend_name()
+    if backend == "sqlite":
+        options = {"connect_args": {"check_same_thread": False}} if not is_async else {}
+        return {"echo": SQL_ECHO, **options}
+    if backend == "postgresql":
+        if is_async:  # asyncpg
+            connect_args = {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+        else:  # psycopg2
+            connect_args = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+        return {
+            "echo": SQL_ECHO,
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_timeout": DB_POOL_TIMEOUT,
+            "pool_recycle": DB_POOL_RECYCLE,
+            "pool_pre_ping": True,
+            "connect_args": connect_args,
+        }
+    return {"echo": SQL_ECHO, "pool_pre_ping": True}
+
+
+def make_engine(url: str = SQLALCHEMY_DATABASE_URL):
+    engine = create_engine(url, **engine_options(url))
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", _sqlite_pragmas)
+    return engine
+
+
+engine = make_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
+
+
+def get_db():
+    """
+    The one request-scoped Session dependency used by every router.
+    """
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# -------------------- Async Sessions --------------------
+# For async routes that want to await the database directly instead of
+# going through run_in_threadpool. Needs asyncpg (Postgres) or aiosqlite.
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+_async_engine = None
+_AsyncSessionLocal = None
+
+
+def async_database_url(url: str = SQLALCHEMY_DATABASE_URL) -> str:
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(f"No async driver configured for {backend}")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+def get_async_engine():
+    """
+    Created on first use, so the async drivers are only needed by apps that use them.
+    """
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        url = async_database_url()
+        _async_engine = create_async_engine(url, **engine_options(url, is_async=True))
+        if _async_engine.dialect.name == "sqlite":
+            event.listen(_async_engine.sync_engine, "connect", _sqlite_pragmas)
+        _AsyncSessionLocal = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
+
+async def get_async_db():
+    """
+    AsyncSession dependency: `db: AsyncSession = Depends(database.get_async_db)`.
+    """
+    get_async_engine()
+    async with _AsyncSessionLocal() as db:
+        yield db
+
+
+async def dispose_engines():
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    engine.dispose()
@@ -0,0 +1,254 @@
+# backend/app/export_jobs.py
+"""
+Background export jobs for the AI metrics exports.
+
+- submit(): returns at once; rendering runs on a bounded process pool, so
+  CPU-heavy Excel/PDF work never holds the serving process's GIL
+- job state lives on disk (<job_id>.json next to the file), so any API
+  worker can report status or serve the download
+- job_id is a hash of (format, filters, data high-water mark): a repeat
+  request for unchanged data is served from the finished file instantly
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+load_dotenv()
+
+EXPORT_DIR = os.getenv("EXPORT_DIR", "./exports")
+EXPORT_MAX_WORKERS = int(os.getenv("EXPORT_MAX_WORKERS", "2"))
+EXPORT_MAX_PENDING = int(os.getenv("EXPORT_MAX_PENDING", "16"))
+EXPORT_CACHE_TTL = float(os.getenv("EXPORT_CACHE_TTL", str(24 * 3600)))
+# How often (seconds) submit() sweeps EXPORT_DIR for expired exports
+EXPORT_PRUNE_INTERVAL = float(os.getenv("EXPORT_PRUNE_INTERVAL", "300"))
+
+FORMATS = {
+    "csv": ("csv", "text/csv"),
+    "excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "pdf": ("pdf", "application/pdf"),
+}
+PROGRESS_INTERVAL = 0.5  # seconds between status-file writes
+STALE_AFTER = 120.0      # a queued/running job with no status update for this long is presumed dead
+HEARTBEAT_INTERVAL = STALE_AFTER / 4  # running jobs refresh their status at least this often
+
+
+class ExportQueueFull(Exception):
+    """Raised when EXPORT_MAX_PENDING jobs are already queued or running."""
+
+
+# -------------------- Job State (on disk) --------------------
+def _status_path(job_id: str) -> str:
+    return os.path.join(EXPORT_DIR, f"{job_id}.json")
+
+
+def file_path(job_id: str, fmt: str, gzip: bool = False) -> str:
+    ext = FORMATS[fmt][0] + (".gz" if fmt == "csv" and gzip else "")
+    return os.path.join(EXPORT_DIR, f"{job_id}.{ext}")
+
+
+def _write_status(job_id: str, **fields) -> dict:
+    status = read_status(job_id) or {"job_id": job_id}
+    status.update(fields, updated_at=datetime.utcnow().isoformat())
+    tmp = f"{_status_path(job_id)}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(status, f)
+    os.replace(tmp, _status_path(job_id))
+    return status
+
+
+def read_status(job_id: str) -> Optional[dict]:
+    try:
+        with open(_status_path(job_id)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+# -------------------- Worker (runs in a pool process) --------------------
+def run_export_job(job_id: str, fmt: str, start: Optional[datetime], end: Optional[datetime],
+                   keys: List[str], gzip: bool, rows_total: int):
+    from app import database
+    from app.metrics_export import write_metrics_csv, write_metrics_excel, write_metrics_pdf
+
+    writers = {"csv": write_metrics_csv, "excel": write_metrics_excel, "pdf": write_metrics_pdf}
+    last_write = [0.0]
+    status_lock = threading.Lock()
+    stop = threading.Event()
+
+    def write_status(**fields):
+        with status_lock:
+            _write_status(job_id, **fields)
+
+    def progress(rows_done: int):
+        now = time.monotonic()
+        if now - last_write[0] >= PROGRESS_INTERVAL:
+            last_write[0] = now
+            write_status(rows_done=rows_done)
+
+    def heartbeat():
+        # Keeps updated_at fresh while no rows are being reported, e.g. during
+        # workbook.save() / pdf.save(), so the job is not taken for dead
+        while not stop.wait(HEARTBEAT_INTERVAL):
+            write_status()
+
+    path = file_path(job_id, fmt, gzip)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    write_status(status="running", started_at=datetime.utcnow().isoformat())
+    threading.Thread(target=heartbeat, name=f"export-heartbeat-{job_id}", daemon=True).start()
+    db = database.SessionLocal()
+    try:
+        with open(tmp, "wb") as out:
+            if fmt == "csv":
+                write_metrics_csv(db, start, end, keys, out, gzip=gzip, progress=progress)
+            else:
+                writers[fmt](db, start, end, keys, out, progress=progress)
+        os.replace(tmp, path)  # publish atomically; readers never see a partial file
+    except Exception as e:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        write_status(status="failed", error=repr(e))
+        raise
+    finally:
+        stop.set()
+        db.close()
+    write_status(status="done", rows_done=rows_total, size_bytes=os.path.getsize(path),
+                  finished_at=datetime.utcnow().isoformat())
+
+
+# -------------------- Pool / Submission (API process) --------------------
+_lock = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+_running: Dict[str, Future] = {}
+_last_prune = 0.0
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: don't fork a process holding DB connections / event-loop threads
+        _pool = ProcessPoolExecutor(EXPORT_MAX_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def shutdown():
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def data_high_water_mark(db: Session, start: Optional[datetime], end: Optional[datetime]):
+    """
+    (max id, row count) of the filtered range - one indexed aggregate query.
+    Changes whenever rows are added to (or removed from) the range.
+    """
+    from app.models.metrics import AIMetric
+
+    query = select(func.max(AIMetric.id), func.count(AIMetric.id))
+    if start is not None:
+        query = query.where(AIMetric.created_at >= start)
+    if end is not None:
+        query = query.where(AIMetric.created_at < end)
+    max_id, count = db.execute(query).one()
+    return max_id or 0, count
+
+
+def make_job_id(fmt: str, start, end, keys: List[str], gzip: bool, high_water_mark) -> str:
+    payload = json.dumps([fmt, str(start), str(end), keys, gzip, list(high_water_mark)])
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+def prune_cache(ttl: float = EXPORT_CACHE_TTL):
+    """
+    Drop finished exports (file + status) not touched for `ttl` seconds.
+    """
+    global _last_prune
+    _last_prune = time.monotonic()
+    cutoff = time.time() - ttl
+    for name in os.listdir(EXPORT_DIR):
+        job_id, _, ext = name.partition(".")
+        if ext.endswith(".tmp"):
+            # left behind by a worker that was killed mid-render
+            path = os.path.join(EXPORT_DIR, name)
+            if job_id not in _running and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+            continue
+        if ext != "json" or job_id in _running:
+            continue
+        status = read_status(job_id) or {}
+        paths = [_status_path(job_id)]
+        if status.get("format") in FORMATS:
+            paths.append(file_path(job_id, status["format"], status.get("gzip", False)))
+        try:
+            if max(os.path.getmtime(p) for p in paths if os.path.exists(p)) < cutoff:
+                for p in paths:
+                    if os.path.exists(p):
+                        os.remove(p)
+        except (FileNotFoundError, ValueError):
+            pass
+
+
+def _in_progress_elsewhere(status: Optional[dict]) -> bool:
+    """
+    Another API worker process is already rendering this job.
+    """
+    if not status or status.get("status") not in ("queued", "running"):
+        return False
+    updated = datetime.fromisoformat(status["updated_at"])
+    return (datetime.utcnow() - updated).total_seconds() < STALE_AFTER
+
+
+def submit(db: Session, fmt: str, start: Optional[datetime], end: Optional[datetime],
+           keys: List[str], gzip: bool = False) -> dict:
+    """
+    Queue an export (or return the cached / already-running one).
+    """
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    high_water_mark = data_high_water_mark(db, start, end)
+    job_id = make_job_id(fmt, start, end, keys, gzip, high_water_mark)
+    path = file_path(job_id, fmt, gzip)
+
+    with _lock:
+        status = read_status(job_id)
+        if status and status.get("status") == "done" and os.path.exists(path):
+            os.utime(path)  # keep hot exports in the cache
+            return {**status, "cached": True}
+        if job_id in _running or _in_progress_elsewhere(status):
+            return {**status, "cached": False}
+        if len(_running) >= EXPORT_MAX_PENDING:
+            raise ExportQueueFull(f"{len(_running)} exports already in progress")
+
+        status = _write_status(
+            job_id, status="queued", format=fmt, gzip=gzip, columns=keys,
+            start=start.isoformat() if start else None, end=end.isoformat() if end else None,
+            rows_done=0, rows_total=high_water_mark[1], error=None,
+            created_at=datetime.utcnow().isoformat(),
+        )
+        future = _get_pool().submit(run_export_job, job_id, fmt, start, end, keys, gzip, high_water_mark[1])
+        _running[job_id] = future
+
+    def finished(f: Future):
+        with _lock:
+            _running.pop(job_id, None)
+        if f.cancelled():
+            # Still queued when the pool shut down; f.exception() would raise
+            _write_status(job_id, status="failed", error="cancelled at shutdown")
+        elif f.exception() is not None and (read_status(job_id) or {}).get("status") != "failed":
+            # e.g. the worker process died before it could record the error
+            _write_status(job_id, status="failed", error=repr(f.exception()))
+
+    future.add_done_callback(finished)
+    if time.monotonic() - _last_prune >= EXPORT_PRUNE_INTERVAL:
+        prune_cache()
+    return {**status, "cached": False}
@@ -0,0 +1,93 @@
+# backend/app/import_profile.py
+"""
+Cold-start import profile.
+
+    python -m app.import_profile                    # top modules + packages for `import app.main`
+    python -m app.import_profile --budget-ms 2000   # exit 1 if the import takes longer
+    python -m app.import_profile --json
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter (so
+nothing is cached in this process) and summarises the per-module timings.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def profile_imports(module: str = "app.main") -> Dict:
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    modules: List[dict] = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+        })
+
+    packages: Dict[str, float] = defaultdict(float)
+    for m in modules:
+        packages[m["module"].split(".")[0]] += m["self_ms"]
+
+    target = next((m for m in reversed(modules) if m["module"] == module), None)
+    return {
+        "module": module,
+        "import_ms": round(target["cumulative_ms"], 1) if target else None,
+        "interpreter_wall_ms": round(wall_ms, 1),
+        "modules_imported": len(modules),
+        "packages": {p: round(ms, 1) for p, ms in sorted(packages.items(), key=lambda kv: -kv[1])},
+        "modules": sorted(modules, key=lambda m: -m["cumulative_ms"]),
+    }
+
+
+def print_report(report: Dict, top: int):
+    print(f"⏱️  import {report['module']}: {report['import_ms']} ms "
+          f"({report['modules_imported']} modules; interpreter wall time {report['interpreter_wall_ms']} ms)")
+    print(f"\n📦 Packages by self time (top {top}):")
+    for package, ms in list(report["packages"].items())[:top]:
+        print(f"  {ms:>9.1f} ms  {package}")
+    print(f"\n🧩 Modules by cumulative time (top {top}):")
+    for m in report["modules"][:top]:
+        print(f"  {m['cumulative_ms']:>9.1f} ms  (self {m['self_ms']:>7.1f})  {'  ' * m['depth']}{m['module']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report import time per module for a cold start.")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--budget-ms", type=float, help="fail when the import takes longer than this")
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    args = parser.parse_args()
+
+    report = profile_imports(args.module)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, args.top)
+
+    if args.budget_ms is not None and report["import_ms"] is not None and report["import_ms"] > args.budget_ms:
+        print(f"\n❌ import {args.module} took {report['import_ms']} ms (budget {args.budget_ms:.0f} ms)",
+              file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
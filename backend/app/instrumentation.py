@@ -0,0 +1,364 @@
+# backend/app/instrumentation.py
+"""
+In-process metrics for the hot paths.
+
+- HTTP: per-route latency histogram, request counter, in-flight gauge (ASGI middleware)
+- DB: query count and time per statement type (SQLAlchemy cursor events)
+- LLM: call latency, outcome and token counts (AsyncLLMClient)
+- Recommender: per-stage timings (`with stage("..."):`)
+
+Each metric keeps one shard per thread, and a thread only ever writes its
+own shard, so recording is a dict lookup and a few additions with no lock.
+Readers (the /metrics scrape, the live sampler) sum the shards.
+
+GET /metrics renders everything in the Prometheus text format, and
+LiveSampler turns the last tick's numbers into the AIMetric row that the
+ai-metrics stream stores and broadcasts.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# How long a user counts as active after their last authenticated request
+ACTIVE_USER_WINDOW = 300.0
+
+
+# -------------------- Metric Types --------------------
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._shards_lock = threading.Lock()  # only taken the first time a thread records
+        REGISTRY.append(self)
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+            return shard
+
+    def _snapshot_shards(self) -> List[dict]:
+        with self._shards_lock:
+            return list(self._shards)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, labels: Tuple = ()):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0.0) + amount
+
+    def collect(self) -> Dict[Tuple, float]:
+        totals: Dict[Tuple, float] = {}
+        for shard in self._snapshot_shards():
+            for labels, value in list(shard.items()):
+                totals[labels] = totals.get(labels, 0.0) + value
+        return totals
+
+
+class Gauge(Counter):
+    """Up/down counter (e.g. in-flight requests): per-thread deltas that sum to the current value."""
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, labels: Tuple = ()):
+        self.inc(-amount, labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, labels: Tuple = ()):
+        shard = self._shard()
+        entry = shard.get(labels)
+        if entry is None:
+            # [per-bucket counts (+Inf last), sum, count]
+            entry = shard[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    @contextmanager
+    def time(self, labels: Tuple = ()) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, labels)
+
+    def collect(self) -> Dict[Tuple, list]:
+        totals: Dict[Tuple, list] = {}
+        for shard in self._snapshot_shards():
+            for labels, (counts, total, count) in list(shard.items()):
+                merged = totals.setdefault(labels, [[0] * (len(self.buckets) + 1), 0.0, 0])
+                merged[0] = [a + b for a, b in zip(merged[0], counts)]
+                merged[1] += total
+                merged[2] += count
+        return totals
+
+    def merged(self) -> list:
+        """All label sets added together: [bucket counts, sum, count]."""
+        merged = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        for counts, total, count in self.collect().values():
+            merged[0] = [a + b for a, b in zip(merged[0], counts)]
+            merged[1] += total
+            merged[2] += count
+        return merged
+
+
+def bucket_quantile(q: float, buckets: Sequence[float], counts: Sequence[int]) -> Optional[float]:
+    """
+    Quantile from per-bucket counts, interpolated linearly inside the bucket
+    (same estimate as Prometheus' histogram_quantile).
+    """
+    total = sum(counts)
+    if total <= 0:
+        return None
+    rank = q * total
+    seen = 0
+    for i, count in enumerate(counts):
+        if count and seen + count >= rank:
+            if i == len(buckets):  # +Inf bucket
+                return buckets[-1]
+            lower = buckets[i - 1] if i > 0 else 0.0
+            return lower + (buckets[i] - lower) * (rank - seen) / count
+        seen += count
+    return buckets[-1]
+
+
+REGISTRY: List[_Metric] = []
+
+http_requests = Counter("http_requests_total", "HTTP requests served.", ("method", "route", "status"))
+http_latency = Histogram("http_request_duration_seconds", "HTTP request latency, until the last body byte.",
+                         ("method", "route"))
+http_in_flight = Gauge("http_requests_in_flight", "HTTP requests currently being served.")
+
+db_queries = Counter("db_queries_total", "SQL statements executed.", ("statement",))
+db_latency = Histogram("db_query_duration_seconds", "SQL statement execution time.", ("statement",),
+                       buckets=DB_BUCKETS)
+
+llm_requests = Counter("llm_requests_total", "LLM API calls.", ("operation", "outcome"))
+llm_latency = Histogram("llm_request_duration_seconds", "LLM API call latency (streams: until the last token).",
+                        ("operation",), buckets=LLM_BUCKETS)
+llm_tokens = Counter("llm_tokens_total", "LLM tokens (streams count completion chunks).", ("kind",))
+
+recommender_stage_latency = Histogram("recommender_stage_duration_seconds", "Recommender pipeline stage time.",
+                                      ("stage",), buckets=DB_BUCKETS)
+
+
+# -------------------- Recording Helpers --------------------
+def stage(name: str):
+    """`with stage("ml.knn"): ...` - time one recommender stage."""
+    return recommender_stage_latency.time((name,))
+
+
+def record_llm_call(operation: str, seconds: float, outcome: str, prompt_tokens: int = 0,
+                    completion_tokens: int = 0):
+    """outcome: ok | error | cancelled"""
+    llm_requests.inc(1, (operation, outcome))
+    llm_latency.observe(seconds, (operation,))
+    if prompt_tokens:
+        llm_tokens.inc(prompt_tokens, ("prompt",))
+    if completion_tokens:
+        llm_tokens.inc(completion_tokens, ("completion",))
+
+
+_last_seen_users: Dict[int, float] = {}
+
+
+def note_active_user(user_id: int):
+    # One dict assignment per authenticated request
+    _last_seen_users[user_id] = time.time()
+
+
+def active_users(window: float = ACTIVE_USER_WINDOW) -> int:
+    cutoff = time.time() - window
+    for user_id, seen in list(_last_seen_users.items()):
+        if seen < cutoff:
+            _last_seen_users.pop(user_id, None)
+    return len(_last_seen_users)
+
+
+# -------------------- SQLAlchemy Hooks --------------------
+def _statement_kind(statement: str) -> str:
+    head = statement.lstrip()[:6].upper()
+    return head if head in ("SELECT", "INSERT", "UPDATE", "DELETE") else "OTHER"
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._instrumentation_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_instrumentation_started", None)
+    if started is None:
+        return
+    kind = (_statement_kind(statement),)
+    db_queries.inc(1, kind)
+    db_latency.observe(time.perf_counter() - started, kind)
+
+
+# -------------------- ASGI Middleware --------------------
+class InstrumentationMiddleware:
+    """
+    Times every HTTP request (including streamed bodies) and labels it with
+    the matched route template, so /progress/user/1 and /progress/user/2
+    share one series.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        http_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_in_flight.dec()
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            http_latency.observe(elapsed, (scope["method"], path))
+            http_requests.inc(1, (scope["method"], path, str(status["code"])))
+
+
+# -------------------- Prometheus Exposition --------------------
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render_prometheus() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        samples = metric.collect()
+        if isinstance(metric, Histogram):
+            for labels, (counts, total, count) in sorted(samples.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(list(metric.buckets) + ["+Inf"], counts):
+                    cumulative += bucket_count
+                    le = f'le="{bound}"'
+                    lines.append(f"{metric.name}_bucket{_format_labels(metric.labelnames, labels, le)} {cumulative}")
+                lines.append(f"{metric.name}_sum{_format_labels(metric.labelnames, labels)} {_format_value(total)}")
+                lines.append(f"{metric.name}_count{_format_labels(metric.labelnames, labels)} {count}")
+        else:
+            if not samples and not metric.labelnames:
+                samples = {(): 0.0}
+            for labels, value in sorted(samples.items()):
+                lines.append(f"{metric.name}{_format_labels(metric.labelnames, labels)} {_format_value(value)}")
+    lines.append("# HELP active_users Distinct authenticated users in the last window.")
+    lines.append("# TYPE active_users gauge")
+    lines.append(f"active_users {active_users()}")
+    return "\n".join(lines) + "\n"
+
+
+# -------------------- AIMetric Sampling --------------------
+class LiveSampler:
+    """
+    Called once per ai-metrics tick; each call covers the requests since the
+    previous call:
+      latency_ms      - p95 HTTP latency
+      success_rate    - share of requests that did not fail with a 5xx
+      llm_error_rate  - share of LLM calls that failed
+    (each None when the window had no requests / LLM calls to measure)
+      users_active    - distinct authenticated users in the last ACTIVE_USER_WINDOW
+      api_calls_today - HTTP requests since UTC midnight (this process)
+    accuracy / loss are model-quality metrics and are left to whatever
+    records training and evaluation runs.
+    """
+
+    def __init__(self):
+        self._buckets = [0] * (len(http_latency.buckets) + 1)
+        self._requests = 0.0
+        self._errors = 0.0
+        self._llm_calls = 0.0
+        self._llm_errors = 0.0
+        self._day = datetime.utcnow().date()
+        self._day_start_requests = 0.0
+
+    def __call__(self) -> dict:
+        counts = http_latency.merged()[0]
+        requests = errors = 0.0
+        for (_, _, status), value in http_requests.collect().items():
+            requests += value
+            if status.startswith("5"):
+                errors += value
+        llm_calls = llm_errors = 0.0
+        for (_, outcome), value in llm_requests.collect().items():
+            llm_calls += value
+            if outcome == "error":
+                llm_errors += value
+
+        window = [now - before for now, before in zip(counts, self._buckets)]
+        window_requests = requests - self._requests
+        window_errors = errors - self._errors
+        window_llm = llm_calls - self._llm_calls
+        p95 = bucket_quantile(0.95, http_latency.buckets, window)
+
+        today = datetime.utcnow().date()
+        if today != self._day:
+            self._day, self._day_start_requests = today, self._requests
+
+        sample = {
+            "latency_ms": round(p95 * 1000, 2) if p95 is not None else None,
+            "success_rate": round(1 - window_errors / window_requests, 4) if window_requests else None,
+            "llm_error_rate": round((llm_errors - self._llm_errors) / window_llm, 4) if window_llm else None,
+            "users_active": active_users(),
+            "api_calls_today": int(requests - self._day_start_requests),
+        }
+        self._buckets, self._requests, self._errors = counts, requests, errors
+        self._llm_calls, self._llm_errors = llm_calls, llm_errors
+        return sample
+
+
+live_sample = LiveSampler()
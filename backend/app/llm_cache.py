@@ -0,0 +1,217 @@
+# backend/app/llm_cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+
+load_dotenv()
+
+# memory | sqlite | none
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "memory")
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "3600"))
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "1024"))
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "./llm_cache.db")
+# How often (seconds) the disk cache deletes expired rows, checked on writes
+LLM_CACHE_PURGE_INTERVAL = float(os.getenv("LLM_CACHE_PURGE_INTERVAL", "300"))
+
+
+def make_key(*parts, **params) -> str:
+    """
+    Stable hash of the prompt inputs (messages, model, temperature, ...).
+    """
+    payload = json.dumps({"parts": parts, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResponseCache(ABC):
+    """
+    Key -> response text with TTL expiry. Entries can be tagged with a
+    user id so that all of a user's entries are dropped in one call.
+    Async callers use `aget` / `aset`, which run backends that do I/O in
+    the threadpool instead of on the event loop.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: str, user_id: Optional[int] = None, ttl: Optional[float] = None):
+        ...
+
+    @abstractmethod
+    def invalidate_user(self, user_id: int):
+        ...
+
+    @abstractmethod
+    def clear(self):
+        ...
+
+    async def aget(self, key: str) -> Optional[str]:
+        return await run_in_threadpool(self.get, key)
+
+    async def aset(self, key: str, value: str, user_id: Optional[int] = None, ttl: Optional[float] = None):
+        await run_in_threadpool(self.set, key, value, user_id, ttl)
+
+
+# -------------------- No-op --------------------
+class NullCache(ResponseCache):
+    def get(self, key):
+        return None
+
+    def set(self, key, value, user_id=None, ttl=None):
+        pass
+
+    def invalidate_user(self, user_id):
+        pass
+
+    def clear(self):
+        pass
+
+    async def aget(self, key):
+        return None
+
+    async def aset(self, key, value, user_id=None, ttl=None):
+        pass
+
+
+# -------------------- In-process LRU --------------------
+class LRUCache(ResponseCache):
+    """
+    Bounded in-process LRU; one instance per worker.
+    """
+
+    def __init__(self, maxsize: int = LLM_CACHE_SIZE, ttl: float = LLM_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, value, user_id)
+        self._by_user: Dict[int, Set[str]] = {}
+
+    def _drop(self, key: str):
+        _, _, user_id = self._data.pop(key)
+        if user_id is not None:
+            keys = self._by_user.get(user_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_user[user_id]
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                self._drop(key)
+                return None
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, user_id=None, ttl=None):
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (time.monotonic() + (ttl if ttl is not None else self.ttl), value, user_id)
+            if user_id is not None:
+                self._by_user.setdefault(user_id, set()).add(key)
+            while len(self._data) > self.maxsize:
+                self._drop(next(iter(self._data)))
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in list(self._by_user.get(user_id, ())):
+                self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._by_user.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    # In memory: no I/O, so no threadpool hop
+    async def aget(self, key):
+        return self.get(key)
+
+    async def aset(self, key, value, user_id=None, ttl=None):
+        self.set(key, value, user_id, ttl)
+
+
+# -------------------- SQLite / disk --------------------
+class SQLiteCache(ResponseCache):
+    """
+    Disk-backed cache shared by every worker on the host and kept across
+    restarts. Lookups are primary-key reads on a WAL-mode SQLite file.
+    Expired rows are deleted on open and then at most every `purge_interval`
+    seconds, on a write.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH, ttl: float = LLM_CACHE_TTL,
+                 purge_interval: float = LLM_CACHE_PURGE_INTERVAL):
+        self.path = path
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, user_id INTEGER, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_user_id ON llm_cache (user_id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_expires_at ON llm_cache (expires_at)")
+        self.purge_expired()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM llm_cache WHERE key = ? AND expires_at >= ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, user_id=None, ttl=None):
+        expires_at = time.time() + (ttl if ttl is not None else self.ttl)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, user_id, value, expires_at) VALUES (?, ?, ?, ?)",
+                (key, user_id, value, expires_at),
+            )
+        if time.monotonic() - self._last_purge >= self.purge_interval:
+            self.purge_expired()
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache WHERE user_id = ?", (user_id,))
+
+    def purge_expired(self):
+        with self._lock:
+            self._last_purge = time.monotonic()
+            self._conn.execute("DELETE FROM llm_cache WHERE expires_at < ?", (time.time(),))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+
+
+def make_cache(backend: str = LLM_CACHE_BACKEND) -> ResponseCache:
+    if backend == "memory":
+        return LRUCache()
+    if backend == "sqlite":
+        return SQLiteCache()
+    if backend == "none":
+        return NullCache()
+    raise ValueError(f"Unknown LLM cache backend: {backend}")
+
+
+# Cache for per-user AI recommendations
+recommendation_cache = make_cache()
@@ -0,0 +1,208 @@
+# backend/app/llm_client.py
+import asyncio
+import json
+import os
+import random
+import time
+from contextlib import aclosing
+from typing import AsyncIterator, List, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+from app.instrumentation import record_llm_call
+
+load_dotenv()
+
+# Point LLM_BASE_URL at a local mock server to test without OpenAI
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1"))
+LLM_API_KEY = os.getenv("OPENAI_API_KEY")
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+
+RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """Raised when the LLM call fails after all retries."""
+
+
+class AsyncLLMClient:
+    """
+    Non-blocking chat-completions client shared by the whole app.
+
+    - one pooled `httpx.AsyncClient` (keep-alive connections are reused)
+    - a semaphore caps concurrent upstream calls per worker
+    - per-call timeout, retries with exponential backoff + full jitter
+      (honours `Retry-After` on 429/503)
+    """
+
+    def __init__(self, base_url: str = LLM_BASE_URL, api_key: Optional[str] = LLM_API_KEY,
+                 model: str = LLM_MODEL, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 timeout: float = LLM_TIMEOUT, max_retries: int = LLM_MAX_RETRIES,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    # -------------------- Connection Pool --------------------
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=headers,
+                timeout=httpx.Timeout(self.timeout, connect=min(self.timeout, 5.0)),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+                transport=self._transport,
+            )
+        return self._client
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    # -------------------- Retries --------------------
+    def _backoff(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except (TypeError, ValueError):
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def _post(self, path: str, payload: dict, timeout: Optional[float] = None) -> dict:
+        last_error: Optional[Exception] = None
+        for attempt in range(self.max_retries + 1):
+            response = None
+            try:
+                async with self.semaphore:
+                    response = await self.client.post(
+                        path, json=payload, timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT
+                    )
+                if response.status_code < 400:
+                    return response.json()
+                last_error = LLMError(f"LLM API returned {response.status_code}: {response.text[:200]}")
+                if response.status_code not in RETRY_STATUS:
+                    break
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                last_error = LLMError(f"LLM API request failed: {e!r}")
+            if attempt < self.max_retries:
+                await asyncio.sleep(self._backoff(attempt, response))
+        raise last_error
+
+    # -------------------- Public API --------------------
+    async def chat_completion(self, messages: List[dict], model: Optional[str] = None,
+                              timeout: Optional[float] = None, **params) -> dict:
+        """
+        Raw chat-completions response (OpenAI-compatible JSON).
+        """
+        payload = {"model": model or self.model, "messages": messages, **params}
+        started = time.perf_counter()
+        try:
+            data = await self._post("/chat/completions", payload, timeout=timeout)
+        except LLMError:
+            record_llm_call("chat", time.perf_counter() - started, "error")
+            raise
+        usage = (data.get("usage") if isinstance(data, dict) else None) or {}
+        record_llm_call("chat", time.perf_counter() - started, "ok",
+                        prompt_tokens=usage.get("prompt_tokens", 0),
+                        completion_tokens=usage.get("completion_tokens", 0))
+        return data
+
+    async def chat(self, messages: List[dict], model: Optional[str] = None,
+                   timeout: Optional[float] = None, **params) -> str:
+        """
+        Reply text of a chat completion.
+        """
+        data = await self.chat_completion(messages, model=model, timeout=timeout, **params)
+        try:
+            return data["choices"][0]["message"]["content"].strip()
+        except (KeyError, IndexError, TypeError, AttributeError) as e:
+            raise LLMError(f"Unexpected LLM response: {data!r}") from e
+
+    async def stream_chat(self, messages: List[dict], model: Optional[str] = None,
+                          timeout: Optional[float] = None, **params) -> AsyncIterator[str]:
+        """
+        Yield reply tokens as the model produces them (server-sent events).
+        Retries only happen before the first token. Closing the generator
+        (e.g. the client went away) closes the upstream connection too.
+        """
+        started = time.perf_counter()
+        tokens, outcome = 0, "error"
+        try:
+            async with aclosing(self._stream_chat(messages, model, timeout, **params)) as stream:
+                async for token in stream:
+                    tokens += 1
+                    yield token
+            outcome = "ok"
+        except (GeneratorExit, asyncio.CancelledError):
+            outcome = "cancelled"  # consumer went away; not an upstream failure
+            raise
+        finally:
+            record_llm_call("stream", time.perf_counter() - started, outcome, completion_tokens=tokens)
+
+    async def _stream_chat(self, messages: List[dict], model: Optional[str] = None,
+                           timeout: Optional[float] = None, **params) -> AsyncIterator[str]:
+        payload = {"model": model or self.model, "messages": messages, "stream": True, **params}
+        last_error: Optional[Exception] = None
+        for attempt in range(self.max_retries + 1):
+            response = None
+            started = False
+            try:
+                async with self.semaphore:
+                    async with self.client.stream(
+                        "POST", "/chat/completions", json=payload,
+                        timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+                    ) as response:
+                        if response.status_code >= 400:
+                            body = await response.aread()
+                            last_error = LLMError(f"LLM API returned {response.status_code}: {body[:200]!r}")
+                            if response.status_code not in RETRY_STATUS:
+                                raise last_error
+                        else:
+                            async for line in response.aiter_lines():
+                                if not line.startswith("data:"):
+                                    continue
+                                data = line[len("data:"):].strip()
+                                if data == "[DONE]":
+                                    return
+                                choices = json.loads(data).get("choices") or [{}]
+                                token = (choices[0].get("delta") or {}).get("content")
+                                if token:
+                                    started = True
+                                    yield token
+                            return
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                last_error = LLMError(f"LLM API request failed: {e!r}")
+                if started:
+                    raise last_error from e
+            if attempt < self.max_retries:
+                await asyncio.sleep(self._backoff(attempt, response))
+        raise last_error
+
+
+llm = AsyncLLMClient()
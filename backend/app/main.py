@@ -1,61 +1,149 @@
 # backend/main.py
 
 from fastapi import FastAPI, Depends, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+import asyncio
+import json
+import os
+import time
 
 # -------------------- Internal Imports --------------------
-from app import models, schemas, database, utils, auth, recommender
+from app import models, schemas, database, utils, auth, recommender, aggregates, career_paths, instrumentation, query_profiler
+from app import course_search  # registers the search-index DDL on the courses table
+from app.course_index import shared_index as course_index
+from app.llm_cache import recommendation_cache
+from app.llm_client import llm
 from app.recommender import router as ai_router          # AI recommender endpoints
 from app.api import ai_routes                            # Additional AI routes
+from app.api import websocket as ws_routes               # Streaming WebSocket routes
 from app.ai_chat import router as chat_router             # Chatbot routes
+from app.routes import chat_routes                        # Authenticated chat (history, send)
+from app.routes import analytics as analytics_routes      # Metrics history, exports, live metrics
 
 # -------------------- Initialize Application --------------------
 app = FastAPI(title="AI Learning Platform Backend")
+app.add_middleware(instrumentation.InstrumentationMiddleware)  # latency / in-flight / status per route
+if query_profiler.SQL_PROFILE:
+    app.add_middleware(query_profiler.QueryProfilerMiddleware)  # X-Query-* debug headers
 
 # -------------------- Include Routers --------------------
 app.include_router(ai_router)          # Recommender endpoints
 app.include_router(ai_routes.router)   # AI API endpoints
 app.include_router(chat_router)        # Chatbot endpoints
+app.include_router(ws_routes.router)   # Token streaming over WebSocket
+app.include_router(chat_routes.router) # Authenticated chat with history
+app.include_router(analytics_routes.router)  # Metrics history / exports
 
 # -------------------- Create Database Tables --------------------
 models.Base.metadata.create_all(bind=database.engine)
+with database.engine.begin() as connection:
+    course_search.ensure_search_index(connection)  # existing databases: add + backfill the index
 
 # -------------------- Database Dependency --------------------
-def get_db():
+get_db = database.get_db
+
+# -------------------- Warm-up --------------------
+# background: load models in a worker thread once startup is done, so the server
+#             starts accepting connections right away (default)
+# blocking:   load them before serving the first request
+# off:        load on first use
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "background").lower()
+
+def warm_up():
+    """Load trained artifacts (or fit the TF-IDF index) and the career matrix; imports scikit-learn."""
+    started = time.perf_counter()
     db = database.SessionLocal()
     try:
-        yield db
+        course_index.warm_start(db)
+        career_paths.shared_engine.sync(db)
     finally:
         db.close()
+    print(f"🔥 Warm-up finished in {time.perf_counter() - started:.2f}s")
+
+async def _warm_up_in_background():
+    await asyncio.sleep(0)  # let startup finish first
+    try:
+        await run_in_threadpool(warm_up)
+    except Exception as e:
+        print(f"⚠️ Warm-up failed, models will load on first use: {e!r}")
+
+@app.on_event("startup")
+async def schedule_warm_up():
+    if STARTUP_WARMUP == "blocking":
+        await run_in_threadpool(warm_up)
+    elif STARTUP_WARMUP == "background":
+        app.state.warm_up_task = asyncio.create_task(_warm_up_in_background())
+
+@app.on_event("startup")
+def backfill_aggregates():
+    """First start after upgrading: fill course_stats / user_stats from progress."""
+    db = database.SessionLocal()
+    try:
+        aggregates.ensure_backfilled(db)
+    finally:
+        db.close()
+
+# -------------------- LLM Client --------------------
+@app.on_event("shutdown")
+async def close_llm_client():
+    """Release pooled LLM connections."""
+    await llm.aclose()
+
+# -------------------- Database Engines --------------------
+@app.on_event("shutdown")
+async def close_database():
+    """Return pooled connections (sync and async engines)."""
+    await database.dispose_engines()
 
 # -------------------- Root Route --------------------
 @app.get("/")
 def home():
     return {"message": "AI Learning Platform is running!"}
 
+# -------------------- Prometheus Metrics --------------------
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return PlainTextResponse(instrumentation.render_prometheus(), media_type="text/plain; version=0.0.4")
+
 # -------------------- User Registration --------------------
 @app.post("/register/", response_model=schemas.UserResponse)
-def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    existing_user = db.query(models.User).filter(models.User.email == user.email).first()
+async def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+    existing_user = await run_in_threadpool(
+        lambda: db.query(models.User).filter(models.User.email == user.email).first()
+    )
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_pw = utils.hash_password(user.password)
+    # bcrypt runs on the dedicated hashing pool, not the event loop
+    hashed_pw = await utils.hash_password_async(user.password)
     new_user = models.User(username=user.username, email=user.email, password=hashed_pw)
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+
+    def save():
+        db.add(new_user)
+        db.commit()
+        db.refresh(new_user)
+    await run_in_threadpool(save)
     return new_user
 
 # -------------------- User Login --------------------
 @app.post("/login/")
-def login_user(user: schemas.UserLogin, db: Session = Depends(get_db)):
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
-    if not db_user or not utils.verify_password(user.password, db_user.password):
+async def login_user(user: schemas.UserLogin, db: Session = Depends(get_db)):
+    db_user = await run_in_threadpool(
+        lambda: db.query(models.User).filter(models.User.email == user.email).first()
+    )
+    valid, new_hash = await utils.verify_and_update_async(user.password, db_user.password) if db_user else (False, None)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    if new_hash:
+        # Hash was made with an older cost factor - upgrade it transparently
+        def rehash():
+            db_user.password = new_hash
+            db.commit()
+        await run_in_threadpool(rehash)
+
     token = auth.create_access_token({"sub": db_user.email})
     return {"access_token": token, "token_type": "bearer"}
 
@@ -66,22 +154,43 @@ def create_course(course: schemas.CourseCreate, db: Session = Depends(get_db)):
     db.add(new_course)
     db.commit()
     db.refresh(new_course)
+    course_index.add_course(new_course)
     return new_course
 
 @app.get("/courses/", response_model=list[schemas.CourseResponse])
 def get_courses(db: Session = Depends(get_db)):
     return db.query(models.Course).all()
 
+@app.get("/courses/search", response_model=schemas.CourseSearchPage)
+@query_profiler.query_budget_limit(2, max_repeats=1)
+def search_courses(q: str, page: int = 1, page_size: int = 20, prefix: bool = True, db: Session = Depends(get_db)):
+    """Ranked full-text search over title / category / description."""
+    page_size = max(1, min(page_size, course_search.MAX_PAGE_SIZE))
+    total, hits = course_search.search_courses(db, q, page=page, page_size=page_size, prefix=prefix)
+    return {"query": q, "total": total, "page": max(page, 1), "page_size": page_size, "results": hits}
+
+@app.get("/courses/suggest")
+@query_profiler.query_budget_limit(1, max_repeats=1)
+def suggest_courses(q: str, limit: int = 8, db: Session = Depends(get_db)):
+    """Typeahead: course titles matching what has been typed so far."""
+    return course_search.suggest_titles(db, q, limit)
+
 # -------------------- User Progress --------------------
 @app.post("/progress/", response_model=schemas.ProgressResponse)
 def create_progress(progress: schemas.ProgressCreate, db: Session = Depends(get_db)):
     new_progress = models.Progress(**progress.dict())
     db.add(new_progress)
+    aggregates.apply_progress_change(
+        db, new_progress.user_id, new_progress.course_id,
+        new_completion=new_progress.completion_percentage, created=True,
+    )
     db.commit()
     db.refresh(new_progress)
+    recommendation_cache.invalidate_user(new_progress.user_id)
     return new_progress
 
 @app.get("/progress/user/{user_id}", response_model=list[schemas.ProgressResponse])
+@query_profiler.query_budget_limit(1, max_repeats=1)
 def get_user_progress(user_id: int, db: Session = Depends(get_db)):
     return db.query(models.Progress).filter(models.Progress.user_id == user_id).all()
 
@@ -91,53 +200,58 @@ def update_progress(progress_id: int, updated: schemas.ProgressCreate, db: Sessi
     if not progress:
         raise HTTPException(status_code=404, detail="Progress record not found")
 
+    aggregates.apply_progress_change(
+        db, progress.user_id, progress.course_id,
+        old_completion=progress.completion_percentage, new_completion=updated.completion_percentage,
+    )
     progress.completion_percentage = updated.completion_percentage
     progress.status = updated.status
     db.commit()
     db.refresh(progress)
+    recommendation_cache.invalidate_user(progress.user_id)
     return progress
 
 # -------------------- Interest-Based Recommender --------------------
 @app.get("/recommend/interest/")
-def recommend_by_interest(interest: str):
-    results = recommender.recommend_courses_by_interest(interest)
+@query_profiler.query_budget_limit(2, max_repeats=1)
+def recommend_by_interest(interest: str, db: Session = Depends(get_db)):
+    results = recommender.recommend_courses_by_interest(interest, db)
     return {"recommendations": results}
 
 # -------------------- Personalized Recommender --------------------
 @app.get("/recommend/personalized/{user_id}", response_model=list[schemas.CourseResponse])
+@query_profiler.query_budget_limit(4, max_repeats=1)
 def recommend_personalized(user_id: int, db: Session = Depends(get_db)):
     courses = recommender.recommend_courses_for_user(user_id, db)
     if not courses:
         raise HTTPException(status_code=404, detail="No courses found for recommendation")
     return courses
 
+@app.post("/recommend/personalized/batch")
+def recommend_personalized_batch(request: schemas.BatchRecommendationRequest, db: Session = Depends(get_db)):
+    """Score many users in one pass; streams one NDJSON line per user."""
+    rows = recommender.iter_recommendations_for_users(request.user_ids, db, top_n=request.top_n)
+    return StreamingResponse(
+        (json.dumps(row) + "\n" for row in rows),
+        media_type="application/x-ndjson",
+    )
+
 # -------------------- Analytics Endpoints --------------------
 @app.get("/analytics/top-courses/")
+@query_profiler.query_budget_limit(1, max_repeats=1)
 def top_courses(db: Session = Depends(get_db), limit: int = 5):
-    results = (
-        db.query(models.Course.title, func.avg(models.Progress.completion_percentage).label("avg_completion"))
-        .join(models.Progress, models.Course.id == models.Progress.course_id)
-        .group_by(models.Course.id)
-        .order_by(func.avg(models.Progress.completion_percentage).desc())
-        .limit(limit)
-        .all()
-    )
+    # Reads the incrementally maintained course_stats table (see app/aggregates.py)
+    results = aggregates.top_courses(db, limit)
     return [{"title": r[0], "avg_completion": round(r[1], 2)} for r in results]
 
 @app.get("/analytics/active-users/")
+@query_profiler.query_budget_limit(1, max_repeats=1)
 def active_users(db: Session = Depends(get_db), limit: int = 5):
-    results = (
-        db.query(models.User.username, func.count(models.Progress.id).label("courses_count"))
-        .join(models.Progress, models.User.id == models.Progress.user_id)
-        .filter(models.Progress.completion_percentage > 0)
-        .group_by(models.User.id)
-        .order_by(func.count(models.Progress.id).desc())
-        .limit(limit)
-        .all()
-    )
+    results = aggregates.active_users(db, limit)
     return [{"username": r[0], "courses_count": r[1]} for r in results]
 
 @app.get("/analytics/user-progress/{user_id}")
+@query_profiler.query_budget_limit(1, max_repeats=1)
 def user_progress_summary(user_id: int, db: Session = Depends(get_db)):
     progress_data = (
         db.query(models.Course.title, models.Progress.completion_percentage, models.Progress.status)
@@ -151,24 +265,36 @@ def user_progress_summary(user_id: int, db: Session = Depends(get_db)):
 
 # -------------------- Career & Adaptive Learning --------------------
 @app.get("/career/recommend/{user_id}")
+@query_profiler.query_budget_limit(4, max_repeats=1)
 def career_recommendation(user_id: int, db: Session = Depends(get_db)):
     """Recommend possible AI/ML career paths based on user's completed courses."""
-    progress = db.query(models.Progress).filter(models.Progress.user_id == user_id).all()
+    progress = recommender.user_course_progress(user_id, db)
     if not progress:
         raise HTTPException(status_code=404, detail="No progress found for this user")
 
-    completed_courses = [
-        db.query(models.Course).filter(models.Course.id == p.course_id).first().title
-        for p in progress if p.completion_percentage >= 80
-    ]
+    completed = {
+        course_id: completion for course_id, _, completion in progress
+        if (completion or 0) >= career_paths.COMPLETION_THRESHOLD
+    }
+    completed_courses = [title for course_id, title, _ in progress if course_id in completed]
 
     if not completed_courses:
         return {"message": "Complete at least one course to get career recommendations"}
 
-    recommendations = recommender.recommend_career_paths(completed_courses)
+    recommendations = recommender.recommend_career_paths(completed, db)
     return {"completed_courses": completed_courses, "career_recommendations": recommendations}
 
+@app.post("/career/recommend/batch")
+def career_recommendation_batch(request: schemas.BatchRecommendationRequest, db: Session = Depends(get_db)):
+    """Career paths for many users (or everyone); streams one NDJSON line per user."""
+    rows = recommender.iter_career_paths_for_users(request.user_ids, db, top_n=request.top_n)
+    return StreamingResponse(
+        (json.dumps(row) + "\n" for row in rows),
+        media_type="application/x-ndjson",
+    )
+
 @app.get("/learning/insights/{user_id}")
+@query_profiler.query_budget_limit(1, max_repeats=1)
 def adaptive_learning_insights(user_id: int, db: Session = Depends(get_db)):
     """Provide adaptive feedback based on user performance."""
     progress = db.query(models.Progress).filter(models.Progress.user_id == user_id).all()
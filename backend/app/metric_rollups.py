@@ -0,0 +1,250 @@
+# backend/app/metric_rollups.py
+"""
+1-minute / 1-hour / 1-day rollups of the AI metrics.
+
+Every batch of saved samples is folded into its three buckets in the same
+transaction (min / max / sum / count, plus a mergeable quantile sketch for
+p95), so /analytics/history can answer any range with a bounded number of
+points from one indexed table. Averages divide by the number of samples
+that had a value for that metric (idle ticks store None).
+
+Backfill / repair:
+    python -m app.metric_rollups rebuild
+"""
+import argparse
+import json
+import math
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.metrics import AIMetric, AIMetricRollup
+
+load_dotenv()
+
+# resolution -> bucket width in seconds (finest first)
+RESOLUTIONS = {"1m": 60, "1h": 3600, "1d": 86400}
+ROLLUP_METRICS = ("accuracy", "loss", "latency_ms", "success_rate", "llm_error_rate")
+# Upper bound on points returned when the resolution is picked automatically
+HISTORY_MAX_POINTS = int(os.getenv("HISTORY_MAX_POINTS", "500"))
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def bucket_start(timestamp: datetime, seconds: int) -> datetime:
+    offset = int((timestamp - _EPOCH).total_seconds()) // seconds * seconds
+    return _EPOCH + timedelta(seconds=offset)
+
+
+# -------------------- Quantile Sketch --------------------
+class QuantileSketch:
+    """
+    Log-bucketed histogram (DDSketch-style): any quantile is within
+    `relative_accuracy` of the true value, and two sketches merge by adding
+    counts - which is what lets hourly/daily p95 be built incrementally.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, counts: Optional[Dict[int, int]] = None, zeros: int = 0):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.counts: Dict[int, int] = counts or {}
+        self.zeros = zeros  # values <= 0
+
+    def add(self, value: float, n: int = 1):
+        if value <= 0:
+            self.zeros += n
+            return
+        index = math.ceil(math.log(value) / self.log_gamma)
+        self.counts[index] = self.counts.get(index, 0) + n
+
+    def quantile(self, q: float) -> Optional[float]:
+        total = self.zeros + sum(self.counts.values())
+        if total == 0:
+            return None
+        rank = q * (total - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if rank < seen:
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.counts) / (self.gamma + 1)
+
+    def to_dict(self) -> dict:
+        return {"z": self.zeros, "c": {str(k): v for k, v in self.counts.items()}}
+
+    @classmethod
+    def from_dict(cls, data: Optional[dict]) -> "QuantileSketch":
+        data = data or {}
+        return cls(counts={int(k): v for k, v in data.get("c", {}).items()}, zeros=data.get("z", 0))
+
+
+# -------------------- Folding Samples Into Buckets --------------------
+def _fold(rollup: AIMetricRollup, samples: List[dict]):
+    """
+    Add raw samples to one rollup row (in place).
+    """
+    sketches = json.loads(rollup.sketches or "{}")
+    rollup.count = (rollup.count or 0) + len(samples)
+    for metric in ROLLUP_METRICS:
+        values = [s[metric] for s in samples if s.get(metric) is not None]
+        if not values:
+            continue
+        low, high = min(values), max(values)
+        current_min = getattr(rollup, f"{metric}_min")
+        current_max = getattr(rollup, f"{metric}_max")
+        setattr(rollup, f"{metric}_min", low if current_min is None else min(current_min, low))
+        setattr(rollup, f"{metric}_max", high if current_max is None else max(current_max, high))
+        setattr(rollup, f"{metric}_sum", (getattr(rollup, f"{metric}_sum") or 0.0) + sum(values))
+        setattr(rollup, f"{metric}_count", (getattr(rollup, f"{metric}_count") or 0) + len(values))
+
+        sketch = QuantileSketch.from_dict(sketches.get(metric))
+        for value in values:
+            sketch.add(value)
+        sketches[metric] = sketch.to_dict()
+        setattr(rollup, f"{metric}_p95", sketch.quantile(0.95))
+    rollup.sketches = json.dumps(sketches, separators=(",", ":"))
+
+
+def _new_rollup(resolution: str, start: datetime) -> AIMetricRollup:
+    zeros = {f"{metric}_{field}": 0 for metric in ROLLUP_METRICS for field in ("sum", "count")}
+    return AIMetricRollup(resolution=resolution, bucket_start=start, count=0, sketches="{}", **zeros)
+
+
+def apply_samples(db: Session, rows: Iterable[dict]):
+    """
+    Fold newly saved samples (dicts with `created_at`) into every resolution.
+    Call before the commit that inserts them, so both land together.
+    """
+    groups = defaultdict(list)
+    for row in rows:
+        for resolution, seconds in RESOLUTIONS.items():
+            groups[(resolution, bucket_start(row["created_at"], seconds))].append(row)
+
+    by_resolution = defaultdict(list)
+    for resolution, start in groups:
+        by_resolution[resolution].append(start)
+
+    for resolution, starts in by_resolution.items():
+        existing = {
+            r.bucket_start: r
+            for r in db.execute(
+                select(AIMetricRollup)
+                .where(AIMetricRollup.resolution == resolution, AIMetricRollup.bucket_start.in_(starts))
+                .with_for_update()
+            ).scalars()
+        }
+        for start in starts:
+            samples = groups[(resolution, start)]
+            rollup = existing.get(start)
+            if rollup is not None:
+                _fold(rollup, samples)
+                continue
+            rollup = _new_rollup(resolution, start)
+            _fold(rollup, samples)
+            try:
+                with db.begin_nested():
+                    db.add(rollup)
+            except IntegrityError:
+                # Another writer created the bucket first - fold into theirs
+                rollup = db.execute(
+                    select(AIMetricRollup)
+                    .where(AIMetricRollup.resolution == resolution, AIMetricRollup.bucket_start == start)
+                    .with_for_update()
+                ).scalar_one()
+                _fold(rollup, samples)
+    db.flush()
+
+
+# -------------------- Reads --------------------
+def choose_resolution(start: datetime, end: datetime, max_points: int = HISTORY_MAX_POINTS) -> str:
+    """
+    Finest resolution that keeps the range within `max_points` buckets.
+    """
+    span = max((end - start).total_seconds(), 0)
+    for resolution, seconds in RESOLUTIONS.items():
+        if span / seconds <= max_points:
+            return resolution
+    return list(RESOLUTIONS)[-1]
+
+
+def get_rollup_history(db: Session, resolution: str, start: Optional[datetime], end: Optional[datetime],
+                       limit: int) -> List[dict]:
+    query = select(AIMetricRollup).where(AIMetricRollup.resolution == resolution)
+    if start is not None:
+        query = query.where(AIMetricRollup.bucket_start >= bucket_start(start, RESOLUTIONS[resolution]))
+    if end is not None:
+        query = query.where(AIMetricRollup.bucket_start <= end)
+    query = query.order_by(AIMetricRollup.bucket_start.asc()).limit(limit)
+
+    points = []
+    for r in db.execute(query).scalars():
+        point = {"timestamp": r.bucket_start, "resolution": resolution, "count": r.count}
+        for metric in ROLLUP_METRICS:
+            total, count = getattr(r, f"{metric}_sum"), getattr(r, f"{metric}_count")
+            point[metric] = round(total / count, 4) if count else None  # avg
+            point[f"{metric}_min"] = getattr(r, f"{metric}_min")
+            point[f"{metric}_max"] = getattr(r, f"{metric}_max")
+            point[f"{metric}_p95"] = getattr(r, f"{metric}_p95")
+        points.append(point)
+    return points
+
+
+# -------------------- Backfill --------------------
+def rebuild(db: Session, batch_size: int = 5000):
+    """
+    Recompute every rollup from the raw table. Rows are read in time order
+    with a server-side cursor, and each bucket is written as soon as it is
+    complete, so memory stays constant.
+    """
+    db.execute(delete(AIMetricRollup))
+    current: Dict[str, AIMetricRollup] = {}  # resolution -> bucket being filled
+    columns = [AIMetric.created_at] + [getattr(AIMetric, m) for m in ROLLUP_METRICS]
+    query = select(*columns).order_by(AIMetric.created_at.asc(), AIMetric.id.asc())
+
+    for partition in db.execute(query.execution_options(yield_per=batch_size)).partitions():
+        pending = defaultdict(list)  # resolution -> samples not yet folded into current[resolution]
+        for row in partition:
+            sample = dict(zip(["created_at", *ROLLUP_METRICS], row))
+            for resolution, seconds in RESOLUTIONS.items():
+                start = bucket_start(sample["created_at"], seconds)
+                rollup = current.get(resolution)
+                if rollup is None or rollup.bucket_start != start:
+                    if rollup is not None:
+                        _fold(rollup, pending.pop(resolution, []))
+                        db.add(rollup)
+                    current[resolution] = _new_rollup(resolution, start)
+                pending[resolution].append(sample)
+        for resolution, samples in pending.items():
+            _fold(current[resolution], samples)
+        db.flush()
+    for rollup in current.values():
+        db.add(rollup)
+    db.commit()
+
+
+def main():
+    from app import database, models
+
+    parser = argparse.ArgumentParser(description="Maintain AI metric rollups.")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args()
+
+    models.Base.metadata.create_all(bind=database.engine)
+    db = database.SessionLocal()
+    try:
+        rebuild(db)
+        print(f"✅ Rebuilt {db.query(AIMetricRollup).count()} rollup buckets.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# backend/app/metrics_broadcaster.py
+import asyncio
+import os
+from datetime import datetime
+from typing import Callable, Optional, Set
+
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+
+from app import database
+from app.instrumentation import live_sample
+from app.crud.metrics_crud import save_metrics
+
+load_dotenv()
+
+METRICS_TICK_SECONDS = float(os.getenv("METRICS_TICK_SECONDS", "3"))
+# Messages buffered per subscriber before it is considered too slow and dropped
+METRICS_SUBSCRIBER_QUEUE = int(os.getenv("METRICS_SUBSCRIBER_QUEUE", "10"))
+
+
+def persist_samples(rows):
+    db = database.SessionLocal()
+    try:
+        save_metrics(db, rows)
+    finally:
+        db.close()
+
+
+class Subscription:
+    """
+    One consumer's bounded queue. `None` in the queue means "you were
+    dropped" (closed broadcaster or too slow to keep up).
+    """
+
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = False
+
+    async def get(self) -> Optional[dict]:
+        return await self.queue.get()
+
+    def close(self):
+        # Make room for the sentinel without blocking the producer
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class MetricsBroadcaster:
+    """
+    Single producer, many consumers.
+
+    One background task samples the live request / DB / LLM metrics
+    (app/instrumentation.py) once per tick, stores them with one insert,
+    and fans the sample out to every subscriber's queue without awaiting
+    any of them. A subscriber whose queue is full is dropped, so a
+    stuck client never delays the rest. The producer runs only while there
+    are subscribers.
+    """
+
+    def __init__(self, tick: float = METRICS_TICK_SECONDS, queue_size: int = METRICS_SUBSCRIBER_QUEUE,
+                 sample: Callable[[], dict] = live_sample, persist: Callable = persist_samples):
+        self.tick = tick
+        self.queue_size = queue_size
+        self.sample = sample
+        self.persist = persist
+        self.subscribers: Set[Subscription] = set()
+        self.dropped_total = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self.queue_size)
+        self.subscribers.add(subscription)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self.subscribers.discard(subscription)
+
+    def publish(self, message: dict):
+        for subscription in list(self.subscribers):
+            try:
+                subscription.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                subscription.dropped = True
+                self.subscribers.discard(subscription)
+                self.dropped_total += 1
+                subscription.close()
+
+    async def _run(self):
+        while self.subscribers:
+            data = self.sample()
+            try:
+                # One insert per tick, however many dashboards are watching
+                await run_in_threadpool(self.persist, [data])
+            except Exception as e:
+                print(f"⚠️ Could not save AI metrics: {e!r}")
+            self.publish({"timestamp": datetime.now().isoformat(), **data})
+            await asyncio.sleep(self.tick)
+
+    async def stop(self):
+        for subscription in list(self.subscribers):
+            subscription.close()
+        self.subscribers.clear()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self.subscribers),
+            "dropped_total": self.dropped_total,
+            "producer_running": self._task is not None and not self._task.done(),
+        }
+
+
+metrics_broadcaster = MetricsBroadcaster()
@@ -0,0 +1,197 @@
+# backend/app/metrics_export.py
+"""
+Renderers for the AI metrics exports (CSV / Excel / PDF).
+
+Used by the streaming endpoints in routes/analytics.py and by the
+background export jobs (app/export_jobs.py), which run them in worker
+processes - so nothing here depends on FastAPI. openpyxl and reportlab are
+imported by their writers, so only processes that render Excel / PDF pay
+for them.
+"""
+import csv
+import io
+import zlib
+from datetime import datetime
+from typing import Callable, Iterator, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.metrics import AIMetric
+
+# column key -> (header, AIMetric attribute)
+EXPORT_COLUMNS = {
+    "timestamp": ("Timestamp", "created_at"),
+    "accuracy": ("Accuracy", "accuracy"),
+    "loss": ("Loss", "loss"),
+    "latency_ms": ("Latency (ms)", "latency_ms"),
+    "success_rate": ("Success Rate", "success_rate"),
+    "llm_error_rate": ("LLM Error Rate", "llm_error_rate"),
+    "users_active": ("Users Active", "users_active"),
+    "api_calls_today": ("API Calls", "api_calls_today"),
+}
+EXPORT_BATCH_SIZE = 2000        # rows fetched per server-side cursor round trip
+CSV_FLUSH_BYTES = 64 * 1024     # size of each chunk written to the socket
+SPOOL_MAX_BYTES = 8 * 1024 * 1024  # Excel/PDF files larger than this spill to disk
+PDF_ROW_HEIGHT = 14
+
+
+def iter_metric_rows(
+    db: Session, start: Optional[datetime], end: Optional[datetime], keys: List[str],
+    batch_size: int = EXPORT_BATCH_SIZE, progress: Optional[Callable[[int], None]] = None,
+) -> Iterator[List[tuple]]:
+    """
+    Yield batches of row tuples (only the selected columns, in `keys` order).
+    `yield_per` streams results through a server-side cursor, so only one
+    batch is held in memory no matter how large the table is.
+    `progress(rows_so_far)` is called after every batch.
+    """
+    query = select(*[getattr(AIMetric, EXPORT_COLUMNS[k][1]) for k in keys])
+    if start is not None:
+        query = query.where(AIMetric.created_at >= start)
+    if end is not None:
+        query = query.where(AIMetric.created_at < end)
+    query = query.order_by(AIMetric.created_at.asc(), AIMetric.id.asc())
+
+    result = db.execute(query.execution_options(yield_per=batch_size))
+    rows = 0
+    try:
+        for partition in result.partitions():
+            yield partition
+            rows += len(partition)
+            if progress is not None:
+                progress(rows)
+    finally:
+        result.close()
+
+
+def format_cell(key: str, value):
+    if key == "timestamp" and value is not None:
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return value
+
+
+def iter_csv_chunks(db: Session, start, end, keys: List[str], gzip: bool = False,
+                    progress: Optional[Callable[[int], None]] = None) -> Iterator[bytes]:
+    """
+    Encode rows to CSV and yield ~CSV_FLUSH_BYTES chunks (optionally gzipped)
+    as soon as they are ready.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None  # wbits=31 -> gzip container
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([EXPORT_COLUMNS[k][0] for k in keys])
+
+    def flush() -> bytes:
+        data = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        return compressor.compress(data) if compressor else data
+
+    for batch in iter_metric_rows(db, start, end, keys, progress=progress):
+        writer.writerows([format_cell(k, v) for k, v in zip(keys, row)] for row in batch)
+        if buffer.tell() >= CSV_FLUSH_BYTES:
+            chunk = flush()
+            if chunk:
+                yield chunk
+
+    tail = flush()
+    if compressor:
+        tail += compressor.flush()
+    if tail:
+        yield tail
+
+
+def iter_file(f, chunk_size: int = CSV_FLUSH_BYTES) -> Iterator[bytes]:
+    """
+    Stream a (spooled) temp file and close it when done.
+    """
+    try:
+        f.seek(0)
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        f.close()
+
+
+def write_metrics_csv(db: Session, start, end, keys: List[str], out, gzip: bool = False,
+                      progress: Optional[Callable[[int], None]] = None):
+    for chunk in iter_csv_chunks(db, start, end, keys, gzip=gzip, progress=progress):
+        out.write(chunk)
+
+
+def write_metrics_excel(db: Session, start, end, keys: List[str], out,
+                        progress: Optional[Callable[[int], None]] = None):
+    """
+    Stream rows into a write-only workbook: rows are serialised as they are
+    appended instead of being kept as cell objects.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("AI Metrics")
+    sheet.append([EXPORT_COLUMNS[k][0] for k in keys])
+    for batch in iter_metric_rows(db, start, end, keys, progress=progress):
+        for row in batch:
+            sheet.append([format_cell(k, v) for k, v in zip(keys, row)])
+    workbook.save(out)
+
+
+def write_metrics_pdf(db: Session, start, end, keys: List[str], out, title: str = "AI Metrics Report",
+                      progress: Optional[Callable[[int], None]] = None):
+    """
+    Render one small table per page (header repeated on each) and emit the
+    page straight away, so layout cost is linear in rows and only the
+    current page's rows are held in memory.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    from reportlab.platypus import Table, TableStyle
+
+    width, height = A4
+    margin = 36
+    pdf = canvas.Canvas(out, pagesize=A4, pageCompression=1)
+    pdf.setTitle(title)
+    header = [EXPORT_COLUMNS[k][0] for k in keys]
+    style = TableStyle([
+        ("FONTSIZE", (0, 0), (-1, -1), 8),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+    ])
+    col_width = (width - 2 * margin) / len(keys)
+    page_number = 0
+
+    def draw_page(rows):
+        nonlocal page_number
+        page_number += 1
+        top = height - margin
+        if page_number == 1:
+            pdf.setFont("Helvetica-Bold", 16)
+            pdf.drawString(margin, top - 16, title)
+            top -= 36
+        table = Table([header] + rows, colWidths=col_width, rowHeights=PDF_ROW_HEIGHT, style=style)
+        _, table_height = table.wrapOn(pdf, width - 2 * margin, top - margin)
+        table.drawOn(pdf, margin, top - table_height)
+        pdf.setFont("Helvetica", 8)
+        pdf.drawRightString(width - margin, margin / 2, f"Page {page_number}")
+        pdf.showPage()
+
+    def rows_per_page():
+        usable = height - 2 * margin - (36 if page_number == 0 else 0)
+        return int(usable // PDF_ROW_HEIGHT) - 1  # minus the header row
+
+    page = []
+    for batch in iter_metric_rows(db, start, end, keys, progress=progress):
+        for row in batch:
+            page.append([round(v, 3) if isinstance(v, float) else format_cell(k, v) for k, v in zip(keys, row)])
+            if len(page) >= rows_per_page():
+                draw_page(page)
+                page = []
+    if page or page_number == 0:
+        draw_page(page)
+    pdf.save()
@@ -1,32 +0,0 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Float
-from sqlalchemy.orm import relationship
-from .database import Base
-
-class User(Base):
-    __tablename__ = "users"
-    id = Column(Integer, primary_key=True, index=True)
-    username = Column(String, unique=True, index=True, nullable=False)
-    email = Column(String, unique=True, index=True, nullable=False)
-    password = Column(String, nullable=False)
-
-    progress = relationship("Progress", back_populates="user")
-
-class Course(Base):
-    __tablename__ = "courses"
-    id = Column(Integer, primary_key=True, index=True)
-    title = Column(String, nullable=False)
-    description = Column(Text)
-    category = Column(String, nullable=False)
-
-    progress = relationship("Progress", back_populates="course")
-
-class Progress(Base):
-    __tablename__ = "progress"
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
-    course_id = Column(Integer, ForeignKey("courses.id"))
-    completion_percentage = Column(Float, default=0.0)
-    status = Column(String, default="Not Started")  # e.g. In Progress, Completed
-
-    user = relationship("User", back_populates="progress")
-    course = relationship("Course", back_populates="progress")
@@ -0,0 +1,74 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Float, DateTime, Index
+from sqlalchemy.orm import relationship
+from app.database import Base
+
+class User(Base):
+    __tablename__ = "users"
+    id = Column(Integer, primary_key=True, index=True)
+    username = Column(String, unique=True, index=True, nullable=False)
+    email = Column(String, unique=True, index=True, nullable=False)
+    password = Column(String, nullable=False)
+
+    progress = relationship("Progress", back_populates="user")
+    chat_messages = relationship("ChatMessage", back_populates="user")
+
+class Course(Base):
+    __tablename__ = "courses"
+    id = Column(Integer, primary_key=True, index=True)
+    title = Column(String, nullable=False)
+    description = Column(Text)
+    category = Column(String, nullable=False)
+
+    progress = relationship("Progress", back_populates="course")
+
+class Progress(Base):
+    __tablename__ = "progress"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    course_id = Column(Integer, ForeignKey("courses.id"))
+    completion_percentage = Column(Float, default=0.0)
+    status = Column(String, default="Not Started")  # e.g. In Progress, Completed
+
+    user = relationship("User", back_populates="progress")
+    course = relationship("Course", back_populates="progress")
+
+class CourseStats(Base):
+    """Per-course progress aggregates, maintained with every progress write."""
+    __tablename__ = "course_stats"
+    course_id = Column(Integer, ForeignKey("courses.id"), primary_key=True)
+    progress_count = Column(Integer, nullable=False, default=0)
+    completion_sum = Column(Float, nullable=False, default=0.0)
+    active_count = Column(Integer, nullable=False, default=0)  # completion > 0
+    avg_completion = Column(Float, nullable=False, default=0.0, index=True)
+
+class UserStats(Base):
+    """Per-user progress aggregates, maintained with every progress write."""
+    __tablename__ = "user_stats"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    progress_count = Column(Integer, nullable=False, default=0)
+    completion_sum = Column(Float, nullable=False, default=0.0)
+    active_count = Column(Integer, nullable=False, default=0, index=True)  # completion > 0
+
+class ChatMessage(Base):
+    __tablename__ = "chat_messages"
+    # Keyset pagination / context window reads walk this index backwards
+    __table_args__ = (Index("ix_chat_messages_user_ts_id", "user_id", "timestamp", "id"),)
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    sender = Column(String, nullable=False)  # "user" or "ai"
+    message = Column(Text, nullable=False)
+    timestamp = Column(DateTime, default=datetime.utcnow)
+
+    user = relationship("User", back_populates="chat_messages")
+
+class ChatSummary(Base):
+    """Rolling summary of a user's chat history older than the context window."""
+    __tablename__ = "chat_summaries"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    summary = Column(Text, nullable=False, default="")
+    last_message_id = Column(Integer, nullable=False, default=0)  # newest message folded in
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+# Imported last so every table is registered on Base before create_all()
+from app.models.metrics import AIMetric, AIMetricRollup  # noqa: E402,F401
@@ -0,0 +1,64 @@
+# backend/app/models/metrics.py
+from datetime import datetime
+from sqlalchemy import Column, Integer, Float, DateTime, String, Text, Index
+from app.database import Base
+
+class AIMetric(Base):
+    """One sample of the AI performance metrics shown on the dashboard."""
+    __tablename__ = "ai_metrics"
+    id = Column(Integer, primary_key=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True, nullable=False)
+    accuracy = Column(Float)        # model quality (training / evaluation runs)
+    loss = Column(Float)
+    latency_ms = Column(Float)      # p95 HTTP latency (live sampler)
+    success_rate = Column(Float)    # share of HTTP requests without a 5xx
+    llm_error_rate = Column(Float)  # share of LLM calls that failed
+    users_active = Column(Integer)
+    api_calls_today = Column(Integer)
+
+class AIMetricRollup(Base):
+    """
+    Pre-aggregated AIMetric bucket (1m / 1h / 1d), maintained as samples
+    are saved (see app/metric_rollups.py).
+    """
+    __tablename__ = "ai_metric_rollups"
+    id = Column(Integer, primary_key=True)
+    resolution = Column(String(4), nullable=False)
+    bucket_start = Column(DateTime, nullable=False)
+    count = Column(Integer, nullable=False, default=0)  # all samples in the bucket
+
+    accuracy_min = Column(Float)
+    accuracy_max = Column(Float)
+    accuracy_sum = Column(Float, nullable=False, default=0.0)
+    accuracy_count = Column(Integer, nullable=False, default=0)  # samples that had a value
+    accuracy_p95 = Column(Float)
+
+    loss_min = Column(Float)
+    loss_max = Column(Float)
+    loss_sum = Column(Float, nullable=False, default=0.0)
+    loss_count = Column(Integer, nullable=False, default=0)
+    loss_p95 = Column(Float)
+
+    latency_ms_min = Column(Float)
+    latency_ms_max = Column(Float)
+    latency_ms_sum = Column(Float, nullable=False, default=0.0)
+    latency_ms_count = Column(Integer, nullable=False, default=0)
+    latency_ms_p95 = Column(Float)
+
+    success_rate_min = Column(Float)
+    success_rate_max = Column(Float)
+    success_rate_sum = Column(Float, nullable=False, default=0.0)
+    success_rate_count = Column(Integer, nullable=False, default=0)
+    success_rate_p95 = Column(Float)
+
+    llm_error_rate_min = Column(Float)
+    llm_error_rate_max = Column(Float)
+    llm_error_rate_sum = Column(Float, nullable=False, default=0.0)
+    llm_error_rate_count = Column(Integer, nullable=False, default=0)
+    llm_error_rate_p95 = Column(Float)
+
+    sketches = Column(Text, nullable=False, default="{}")  # mergeable quantile sketches, JSON
+
+    __table_args__ = (
+        Index("ix_ai_metric_rollups_resolution_bucket", "resolution", "bucket_start", unique=True),
+    )
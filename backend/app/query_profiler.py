@@ -0,0 +1,229 @@
+# backend/app/query_profiler.py
+"""
+Per-request SQL profiling: how many statements a request ran, how long they
+took, and which identical statements were repeated (the N+1 signature).
+
+- SQL_PROFILE=true adds X-Query-Count / X-Query-Time-Ms / X-Query-Repeated
+  headers to every response and prints a warning for requests that repeat a
+  statement or exceed their declared budget (headers cover the queries run
+  before the response started; streamed bodies are not included)
+- @query_budget_limit(n) declares an endpoint's budget next to its route
+- `with query_budget(n): ...` fails with QueryBudgetExceeded when the block
+  runs more than n statements - for tests, e.g.
+
+      @pytest.fixture
+      def query_budget():
+          return query_profiler.query_budget
+
+      def test_career(client, query_budget):
+          with query_budget(3):
+              client.get("/career/recommend/1")
+
+  or `with enforce_route_budget(app, "GET", "/career/recommend/{user_id}")`
+  to use the budget declared on the route
+- SQL_EXPLAIN_SLOW_MS=<ms> prints the query plan of every SELECT slower than that
+"""
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+load_dotenv()
+
+SQL_PROFILE = os.getenv("SQL_PROFILE", "false").lower() == "true"
+# A statement run this many times in one request is reported as repeated
+SQL_REPEAT_THRESHOLD = int(os.getenv("SQL_REPEAT_THRESHOLD", "3"))
+SQL_EXPLAIN_SLOW_MS = float(os.getenv("SQL_EXPLAIN_SLOW_MS", "0"))  # 0 = off
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised by query_budget when a block runs more statements than allowed."""
+
+
+class QueryProfile:
+    """
+    Statements seen while a profile is active, grouped by SQL text (bound
+    parameters are not part of the text, so a query run once per row of a
+    loop shows up as one statement with a high count). Statements are also
+    recorded in the enclosing profile, if any (a request profiled by the
+    middleware inside a test's query_budget counts towards both).
+    """
+
+    def __init__(self, parent: Optional["QueryProfile"] = None):
+        self.counts: Counter = Counter()
+        self.times: Dict[str, float] = {}
+        self.parent = parent
+
+    def record(self, statement: str, seconds: float):
+        self.counts[statement] += 1
+        self.times[statement] = self.times.get(statement, 0.0) + seconds
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts.values())
+
+    @property
+    def total_ms(self) -> float:
+        return sum(self.times.values()) * 1000
+
+    def repeated(self, threshold: int = SQL_REPEAT_THRESHOLD) -> List[Tuple[str, int]]:
+        return [(s, n) for s, n in self.counts.most_common() if n >= threshold]
+
+    def report(self, limit: int = 10) -> str:
+        lines = [f"{self.count} queries, {self.total_ms:.1f} ms"]
+        for statement, n in self.counts.most_common(limit):
+            lines.append(f"  {n:>4}x {self.times[statement] * 1000:>8.1f} ms  {' '.join(statement.split())[:200]}")
+        return "\n".join(lines)
+
+
+# Context-local, so only statements run on behalf of the profiled code are
+# counted: TestClient and run_in_threadpool copy the caller's context into the
+# threads they use, while other requests, the warm-up and the metrics
+# broadcaster run in their own contexts.
+_current: ContextVar[Optional[QueryProfile]] = ContextVar("query_profile", default=None)
+
+
+# -------------------- SQLAlchemy Hooks --------------------
+def _explain(conn, statement: str, parameters, seconds: float):
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    try:
+        # Separate cursor: the original one still holds the query's results
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute(prefix + statement, parameters)
+            plan = "\n".join("    " + " | ".join(str(c) for c in row) for row in cursor.fetchall())
+        finally:
+            cursor.close()
+    except Exception as e:
+        plan = f"    (EXPLAIN failed: {e!r})"
+    print(f"🐢 Slow query ({seconds * 1000:.1f} ms): {' '.join(statement.split())[:500]}\n📋 Plan:\n{plan}")
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._profiler_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_profiler_started", None)
+    if started is None:
+        return
+    seconds = time.perf_counter() - started
+    profile = _current.get()
+    while profile is not None:
+        profile.record(statement, seconds)
+        profile = profile.parent
+    if (SQL_EXPLAIN_SLOW_MS and seconds * 1000 >= SQL_EXPLAIN_SLOW_MS and not executemany
+            and statement.lstrip()[:6].upper() == "SELECT"):
+        _explain(conn, statement, parameters, seconds)
+
+
+# -------------------- Budgets --------------------
+def query_budget_limit(max_queries: int, max_repeats: Optional[int] = None):
+    """
+    Declare an endpoint's query budget (read by the middleware and by
+    enforce_route_budget). Put it under the route decorator.
+    """
+    def decorator(endpoint):
+        endpoint.__query_budget__ = (max_queries, max_repeats)
+        return endpoint
+    return decorator
+
+
+def budget_violations(profile: QueryProfile, max_queries: int, max_repeats: Optional[int] = None) -> List[str]:
+    problems = []
+    if profile.count > max_queries:
+        problems.append(f"{profile.count} queries (budget {max_queries})")
+    if max_repeats is not None:
+        for statement, n in profile.counts.items():
+            if n > max_repeats:
+                problems.append(f"statement repeated {n}x (max {max_repeats}): {' '.join(statement.split())[:120]}")
+    return problems
+
+
+@contextmanager
+def profile_queries():
+    """Collect every statement run inside the block (and in work it hands off to other threads)."""
+    profile = QueryProfile(parent=_current.get())
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def query_budget(max_queries: int, max_repeats: Optional[int] = None):
+    with profile_queries() as profile:
+        yield profile
+    problems = budget_violations(profile, max_queries, max_repeats)
+    if problems:
+        raise QueryBudgetExceeded("; ".join(problems) + "\n" + profile.report())
+
+
+def route_budget(app, method: str, path: str) -> Tuple[int, Optional[int]]:
+    for route in app.routes:
+        if getattr(route, "path", None) == path and method.upper() in getattr(route, "methods", ()):
+            budget = getattr(route.endpoint, "__query_budget__", None)
+            if budget is None:
+                raise LookupError(f"{method} {path} has no declared query budget")
+            return budget
+    raise LookupError(f"No route {method} {path}")
+
+
+@contextmanager
+def enforce_route_budget(app, method: str, path: str):
+    max_queries, max_repeats = route_budget(app, method, path)
+    with query_budget(max_queries, max_repeats) as profile:
+        yield profile
+
+
+# -------------------- Debug Middleware --------------------
+class QueryProfilerMiddleware:
+    """
+    Profiles each HTTP request and reports it in response headers
+    (enabled with SQL_PROFILE=true).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = QueryProfile(parent=_current.get())
+        token = _current.set(profile)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                repeated = profile.repeated()
+                headers = list(message.get("headers", []))
+                headers += [
+                    (b"x-query-count", str(profile.count).encode()),
+                    (b"x-query-time-ms", f"{profile.total_ms:.2f}".encode()),
+                    (b"x-query-repeated", str(len(repeated)).encode()),
+                ]
+                budget = getattr(getattr(scope.get("route"), "endpoint", None), "__query_budget__", None)
+                problems = budget_violations(profile, *budget) if budget else []
+                if problems:
+                    headers.append((b"x-query-budget", b"exceeded"))
+                if repeated or problems:
+                    print(f"⚠️ {scope['method']} {scope['path']}: {'; '.join(problems) or 'repeated statements'}\n"
+                          f"{profile.report()}")
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
@@ -1,91 +1,206 @@
 # backend/app/recommender.py
-from typing import List
+from typing import Dict, Iterator, List, Optional, Sequence
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.neighbors import NearestNeighbors
-import pandas as pd
+from scipy import sparse
 import numpy as np
 
-from fastapi import APIRouter, Depends
-from app import models, database
-from app.ai_service import generate_ai_recommendation
+from fastapi import APIRouter, Depends, HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+from app import models, database, career_paths, course_search
+from app.course_index import CourseIndex, IndexState, shared_index
+from app.instrumentation import stage
+from app.auth.oauth2 import get_current_user
+from app.ai_service import generate_ai_recommendation, stream_ai_recommendation
+from app.crud.chat_crud import save_chat_messages
+from app.streaming import sse_response
 
 
 # -------------------------------------------------------
 # 🌟 1️⃣ Free-text Interest Recommender (Day 5)
 # -------------------------------------------------------
-def recommend_courses_by_interest(interest: str):
-    """
-    Recommend courses based on free-text input using TF-IDF similarity.
-    """
-    course_data = [
-        {"title": "Python for Beginners", "description": "Learn Python programming from scratch"},
-        {"title": "Machine Learning Fundamentals", "description": "Supervised and unsupervised learning"},
-        {"title": "Deep Learning with TensorFlow", "description": "Neural networks and CNNs"},
-        {"title": "AI for Everyone", "description": "Introduction to artificial intelligence"},
-        {"title": "Data Science with Python", "description": "Data analysis, visualization, and pandas"},
-        {"title": "Natural Language Processing", "description": "Text analysis and language models"},
-    ]
-
-    corpus = [c["description"] for c in course_data] + [interest]
-    vectorizer = TfidfVectorizer(stop_words="english")
-    vectors = vectorizer.fit_transform(corpus)
-    similarity = cosine_similarity(vectors[-1], vectors[:-1]).flatten()
-    top_indices = similarity.argsort()[-3:][::-1]
-    recommendations = [course_data[i]["title"] for i in top_indices]
+SAMPLE_COURSES = [
+    {"title": "Python for Beginners", "description": "Learn Python programming from scratch"},
+    {"title": "Machine Learning Fundamentals", "description": "Supervised and unsupervised learning"},
+    {"title": "Deep Learning with TensorFlow", "description": "Neural networks and CNNs"},
+    {"title": "AI for Everyone", "description": "Introduction to artificial intelligence"},
+    {"title": "Data Science with Python", "description": "Data analysis, visualization, and pandas"},
+    {"title": "Natural Language Processing", "description": "Text analysis and language models"},
+]
+
+# Fallback index over the sample catalog, used until real courses exist
+_sample_index = CourseIndex()
+
+
+def _interest_index(db: Optional[Session] = None) -> IndexState:
+    state = shared_index.sync(db) if db is not None else shared_index.snapshot()
+    if not state.is_empty:
+        return state
+    if _sample_index.snapshot().is_empty:
+        _sample_index.build_from_records(
+            list(range(1, len(SAMPLE_COURSES) + 1)),
+            [c["title"] for c in SAMPLE_COURSES],
+            [c["description"] for c in SAMPLE_COURSES],
+        )
+    return _sample_index.snapshot()
+
+
+def recommend_courses_by_interest(interest: str, db: Optional[Session] = None, top_n: int = 3):
+    """
+    Recommend courses based on free-text input using TF-IDF similarity
+    against the shared, pre-fitted course index.
+    """
+    with stage("interest.index_sync"):
+        state = _interest_index(db)
+    with stage("interest.similarity"):
+        similarity = state.similarity(state.transform([interest]))[0]
+        top_indices = similarity.argsort()[-top_n:][::-1]
+    recommendations = [state.titles[i] for i in top_indices]
     return recommendations
 
 
 # -------------------------------------------------------
 # 🌟 2️⃣ Personalized Course Recommender (Day 6)
 # -------------------------------------------------------
-def recommend_courses_for_user(user_id: int, db: Session) -> List[models.Course]:
+def recommend_courses_for_user(user_id: int, db: Session, top_n: int = 3) -> List[models.Course]:
     """
     Personalized recommendation based on:
     - User progress (incomplete courses)
-    - Course similarity using TF-IDF
+    - Course similarity using the shared TF-IDF index
     """
-    # Get all courses
-    courses = db.query(models.Course).all()
-    courses_df = pd.DataFrame([{
-        "id": c.id,
-        "title": c.title,
-        "category": c.category,
-        "description": c.description
-    } for c in courses])
+    with stage("personalized.index_sync"):
+        state = shared_index.sync(db)
+    if state.is_empty:
+        return []
 
     # Get user progress
-    progress = db.query(models.Progress).filter(models.Progress.user_id == user_id).all()
-    progress_df = pd.DataFrame([{
-        "course_id": p.course_id,
-        "completion": p.completion_percentage
-    } for p in progress])
+    with stage("personalized.progress_query"):
+        progress = (
+            db.query(models.Progress.course_id, models.Progress.completion_percentage)
+            .filter(models.Progress.user_id == user_id)
+            .all()
+        )
 
     # Find incomplete courses
-    incomplete_ids = progress_df[progress_df.completion < 100]["course_id"].tolist()
+    incomplete_ids = [p.course_id for p in progress if (p.completion_percentage or 0) < 100]
     if not incomplete_ids:
-        incomplete_ids = courses_df["id"].tolist()
+        incomplete_ids = state.course_ids
 
-    filtered_courses = courses_df[courses_df["id"].isin(incomplete_ids)]
+    rows = state.rows_for(incomplete_ids)
+    if not rows:
+        return []
 
-    # TF-IDF on category + description
-    filtered_courses["text"] = filtered_courses["category"] + " " + filtered_courses["description"].fillna("")
-    tfidf = TfidfVectorizer(stop_words="english")
-    tfidf_matrix = tfidf.fit_transform(filtered_courses["text"])
+    with stage("personalized.similarity"):
+        # User profile vector = mean of the candidate course vectors
+        user_vector = state.matrix[rows].mean(axis=0)
 
-    # User profile vector
-    if len(filtered_courses) > 0:
-        user_vector = tfidf_matrix.mean(axis=0)
-    else:
-        user_vector = tfidf_matrix[0]
+        # Cosine similarity
+        similarity = state.similarity(user_vector, rows)[0]
+        top_indices = similarity.argsort()[-top_n:][::-1]
+        top_ids = [state.course_ids[rows[i]] for i in top_indices]
+
+    with stage("personalized.fetch_courses"):
+        return db.query(models.Course).filter(models.Course.id.in_(top_ids)).all()
+
+
+def recommend_courses_for_users(user_ids: Sequence[int], db: Session, top_n: int = 3,
+                                state: Optional[IndexState] = None) -> Dict[int, List[int]]:
+    """
+    Batch version of `recommend_courses_for_user`: same ranking, but progress
+    for every user is loaded with one query and scored in one vectorized pass.
+    Returns {user_id: [course_id, ...]} ranked best first.
+    """
+    state = state or shared_index.sync(db)
+    user_ids = list(dict.fromkeys(user_ids))
+    if state.is_empty or not user_ids:
+        return {uid: [] for uid in user_ids}
+
+    # One query for every user's incomplete courses
+    progress = (
+        db.query(models.Progress.user_id, models.Progress.course_id)
+        .filter(models.Progress.user_id.in_(user_ids))
+        .filter(func.coalesce(models.Progress.completion_percentage, 0) < 100)
+        .all()
+    )
+    user_row = {uid: i for i, uid in enumerate(user_ids)}
+    pairs = sorted({(user_row[p.user_id], state.row_of[p.course_id])
+                    for p in progress if p.course_id in state.row_of})
+    u_idx = np.array([u for u, _ in pairs], dtype=np.int64)
+    c_idx = np.array([c for _, c in pairs], dtype=np.int64)
+
+    # Users with no incomplete course fall back to the whole catalog, which
+    # gives the same profile (and ranking) for all of them - compute it once.
+    global_scores = state.similarity(state.matrix.mean(axis=0))[0]
+    default_ids = [state.course_ids[i] for i in global_scores.argsort()[-top_n:][::-1]]
 
-    # Cosine similarity
-    similarity = cosine_similarity(user_vector, tfidf_matrix).flatten()
-    top_indices = similarity.argsort()[-3:][::-1]
-    top_courses = filtered_courses.iloc[top_indices]
+    results = {uid: list(default_ids) for uid in user_ids}
+    if not pairs:
+        return results
 
-    return db.query(models.Course).filter(models.Course.id.in_(top_courses["id"].tolist())).all()
+    # Sparse user x course membership, rows averaged -> user profiles (one sparse product)
+    counts = np.bincount(u_idx, minlength=len(user_ids)).astype(np.float64)
+    membership = sparse.csr_matrix(
+        (1.0 / counts[u_idx], (u_idx, c_idx)), shape=(len(user_ids), len(state.course_ids))
+    )
+    profiles = membership @ state.matrix
+
+    # Cosine score of every (user, candidate course) pair
+    scores = np.asarray(profiles[u_idx].multiply(state.matrix[c_idx]).sum(axis=1)).ravel()
+
+    # Top-N per user: sort by user then score desc, keep the first N of each group
+    order = np.lexsort((-scores, u_idx))
+    u_sorted, c_sorted = u_idx[order], c_idx[order]
+    group_start = np.searchsorted(u_sorted, u_sorted, side="left")
+    keep = (np.arange(len(order)) - group_start) < top_n
+    ranked: Dict[int, List[int]] = {}
+    for u, c in zip(u_sorted[keep].tolist(), c_sorted[keep].tolist()):
+        ranked.setdefault(user_ids[u], []).append(state.course_ids[c])
+    results.update(ranked)
+    return results
+
+
+def _all_user_id_chunks(db: Session, chunk_size: int) -> Iterator[List[int]]:
+    last_id = 0
+    while True:
+        chunk = [
+            uid for (uid,) in db.query(models.User.id)
+            .filter(models.User.id > last_id)
+            .order_by(models.User.id)
+            .limit(chunk_size)
+        ]
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1]
+
+
+def iter_recommendations_for_users(user_ids: Optional[Sequence[int]], db: Session, top_n: int = 3,
+                                   chunk_size: int = 5000) -> Iterator[dict]:
+    """
+    Stream batch recommendations, one dict per user. `user_ids=None` means
+    every user. Work is done `chunk_size` users at a time so memory stays flat.
+    """
+    state = shared_index.sync(db)
+    if user_ids is None:
+        id_chunks = _all_user_id_chunks(db, chunk_size)
+    else:
+        user_ids = list(user_ids)
+        id_chunks = (user_ids[i:i + chunk_size] for i in range(0, len(user_ids), chunk_size))
+
+    for chunk in id_chunks:
+        ranked = recommend_courses_for_users(chunk, db, top_n, state=state)
+        wanted = {cid for ids in ranked.values() for cid in ids}
+        courses = {
+            c.id: c for c in db.query(models.Course).filter(models.Course.id.in_(wanted)).all()
+        } if wanted else {}
+        for uid in chunk:
+            yield {
+                "user_id": uid,
+                "recommendations": [
+                    {"id": c.id, "title": c.title, "description": c.description, "category": c.category}
+                    for c in (courses.get(cid) for cid in ranked.get(uid, [])) if c is not None
+                ],
+            }
 
 
 # -------------------------------------------------------
@@ -93,9 +208,9 @@ def recommend_courses_for_user(user_id: int, db: Session) -> List[models.Course]
 # -------------------------------------------------------
 def recommend_courses_by_category(category: str, db: Session) -> List[models.Course]:
     """
-    Return top 3 courses for a given category.
+    Return top 3 courses for a given category (full-text index, see app/course_search.py).
     """
-    return db.query(models.Course).filter(models.Course.category.ilike(f"%{category}%")).limit(3).all()
+    return course_search.courses_in_category(db, category, limit=3)
 
 
 # -------------------------------------------------------
@@ -103,49 +218,45 @@ def recommend_courses_by_category(category: str, db: Session) -> List[models.Cou
 # -------------------------------------------------------
 def ml_recommend_courses(user_id: int, db: Session, top_n=3) -> List[models.Course]:
     """
-    ML-based recommendation using Nearest Neighbors on TF-IDF embeddings.
+    ML-based recommendation using k-nearest neighbours on TF-IDF embeddings.
+    All completed courses are queried in one batched k-NN call against the
+    trained neighbour graph or the configured vector-search backend.
     """
-    # Fetch courses
-    courses = db.query(models.Course).all()
-    courses_df = pd.DataFrame([{
-        "id": c.id,
-        "title": c.title,
-        "category": c.category,
-        "description": c.description
-    } for c in courses])
-
-    if courses_df.empty:
+    with stage("ml.index_sync"):
+        state = shared_index.sync(db)
+    if state.is_empty:
         return []
 
-    # TF-IDF features
-    courses_df["text"] = courses_df["category"] + " " + courses_df["description"].fillna("")
-    tfidf = TfidfVectorizer(stop_words="english")
-    tfidf_matrix = tfidf.fit_transform(courses_df["text"])
-
     # User progress
-    progress = db.query(models.Progress).filter(models.Progress.user_id == user_id).all()
-    completed_course_ids = [p.course_id for p in progress if p.completion_percentage >= 50]
+    with stage("ml.progress_query"):
+        progress = (
+            db.query(models.Progress.course_id, models.Progress.completion_percentage)
+            .filter(models.Progress.user_id == user_id)
+            .all()
+        )
+    completed_course_ids = [p.course_id for p in progress if (p.completion_percentage or 0) >= 50]
 
-    # Fallback: new user
-    if not completed_course_ids:
-        return courses[:top_n]
-
-    # Nearest Neighbors
-    nn = NearestNeighbors(n_neighbors=top_n, metric="cosine")
-    nn.fit(tfidf_matrix)
-
-    user_course_idx = [
-        courses_df[courses_df["id"] == cid].index[0]
-        for cid in completed_course_ids if cid in courses_df["id"].values
-    ]
+    # Fallback: new user -> most popular courses (trained priors) or catalog order
+    user_course_idx = state.rows_for(completed_course_ids)
     if not user_course_idx:
-        return courses[:top_n]
+        popular_ids = state.popular_ids(top_n)
+        if popular_ids is None:
+            return db.query(models.Course).order_by(models.Course.id).limit(top_n).all()
+        courses = db.query(models.Course).filter(models.Course.id.in_(popular_ids)).all()
+        return sorted(courses, key=lambda c: popular_ids.index(c.id))
 
-    distances, indices = nn.kneighbors(tfidf_matrix[user_course_idx])
-    recommended_ids = list(set(courses_df.iloc[indices.flatten()]["id"].tolist()))
-    recommended_ids = [cid for cid in recommended_ids if cid not in completed_course_ids][:top_n]
+    # One batched k-NN lookup; ask for extra neighbours since completed ones are dropped
+    with stage("ml.knn"):
+        scores, neighbour_ids = state.nearest(user_course_idx, top_n + len(user_course_idx))
+        flat_ids, flat_scores = neighbour_ids.ravel(), scores.ravel()
+        keep = (flat_ids >= 0) & ~np.isin(flat_ids, completed_course_ids)
+        candidate_ids, inverse = np.unique(flat_ids[keep], return_inverse=True)
+        totals = np.bincount(inverse, weights=flat_scores[keep], minlength=len(candidate_ids))
+        recommended_ids = candidate_ids[np.argsort(-totals, kind="stable")[:top_n]].tolist()
 
-    return db.query(models.Course).filter(models.Course.id.in_(recommended_ids)).all()
+    with stage("ml.fetch_courses"):
+        courses = db.query(models.Course).filter(models.Course.id.in_(recommended_ids)).all()
+    return sorted(courses, key=lambda c: recommended_ids.index(c.id))
 
 
 # -------------------------------------------------------
@@ -154,19 +265,99 @@ def ml_recommend_courses(user_id: int, db: Session, top_n=3) -> List[models.Cour
 router = APIRouter(prefix="/ai", tags=["AI Assistant"])
 
 
-@router.get("/recommendations/{user_id}")
-def get_ai_recommendations(user_id: int, db: Session = Depends(database.get_db)):
+def _progress_summary(user_id: int, db: Session) -> Optional[tuple]:
     """
-    Generate AI-based personalized learning suggestions using user's course progress.
+    (username, "course:completion%, ...") for the prompt, or None if no such user.
     """
     user = db.query(models.User).filter(models.User.id == user_id).first()
     if not user:
-        return {"error": "User not found"}
+        return None
 
     progress_entries = db.query(models.Progress).filter(models.Progress.user_id == user_id).all()
     summary = ", ".join(
         [f"{p.course_id}:{p.completion_percentage}%" for p in progress_entries]
     ) or "No progress yet."
+    return user.username, summary
+
+
+@router.get("/recommendations/{user_id}")
+async def get_ai_recommendations(user_id: int, db: Session = Depends(database.get_db)):
+    """
+    Generate AI-based personalized learning suggestions using user's course progress.
+    DB reads run in the threadpool; the LLM call is awaited without blocking the loop.
+    """
+    user_summary = await run_in_threadpool(_progress_summary, user_id, db)
+    if user_summary is None:
+        return {"error": "User not found"}
+    username, summary = user_summary
+
+    ai_message = await generate_ai_recommendation(username, summary, user_id=user_id)
+    return {"user": username, "ai_recommendations": ai_message}
+
+
+def persist_recommendation(user_id: int):
+    """on_complete hook: store the finished AI recommendation as a chat message."""
+    async def on_complete(reply: str) -> dict:
+        (message_id,) = await run_in_threadpool(save_chat_messages, user_id, [("ai", reply)])
+        return {"message_id": message_id}
+    return on_complete
+
+
+@router.get("/recommendations/{user_id}/stream")
+async def stream_ai_recommendations(user_id: int, request: Request, db: Session = Depends(database.get_db),
+                                    current_user: models.User = Depends(get_current_user)):
+    """
+    Server-Sent Events version of `get_ai_recommendations`. The reply is saved
+    to the user's chat history, so only that user may request it.
+    """
+    if current_user.id != user_id:
+        raise HTTPException(status_code=403, detail="Not allowed to write to another user's history")
+    user_summary = await run_in_threadpool(_progress_summary, user_id, db)
+    if user_summary is None:
+        return {"error": "User not found"}
+    username, summary = user_summary
+
+    return sse_response(
+        stream_ai_recommendation(username, summary, user_id=user_id), request, persist_recommendation(user_id)
+    )
+
+
+# -------------------------------------------------------
+# 🌟 6️⃣ Career Path Recommender (course -> skill -> career)
+# -------------------------------------------------------
+def recommend_career_paths(completed_courses: Dict[int, float], db: Session, top_n: int = 3) -> List[dict]:
+    """
+    Rank career paths for one learner from {course_id: completion %}.
+    """
+    return career_paths.shared_engine.sync(db).recommend([completed_courses], top_n)[0]
+
+
+def user_course_progress(user_id: int, db: Session) -> List[tuple]:
+    """
+    (course_id, title, completion) for every course the user started - one joined query.
+    """
+    return (
+        db.query(models.Progress.course_id, models.Course.title, models.Progress.completion_percentage)
+        .join(models.Course, models.Course.id == models.Progress.course_id)
+        .filter(models.Progress.user_id == user_id)
+        .all()
+    )
+
+
+def iter_career_paths_for_users(user_ids: Optional[Sequence[int]], db: Session, top_n: int = 3,
+                                chunk_size: int = 5000) -> Iterator[dict]:
+    """
+    Batch mode: one dict per user, `chunk_size` users per query + matrix product.
+    """
+    engine = career_paths.shared_engine.sync(db)
+    if user_ids is None:
+        id_chunks = _all_user_id_chunks(db, chunk_size)
+    else:
+        user_ids = list(user_ids)
+        id_chunks = (user_ids[i:i + chunk_size] for i in range(0, len(user_ids), chunk_size))
 
-    ai_message = generate_ai_recommendation(user.username, summary)
-    return {"user": user.username, "ai_recommendations": ai_message}
+    for chunk in id_chunks:
+        completed = career_paths.completed_courses_for_users(db, chunk)
+        ranked = engine.recommend([completed[uid] for uid in chunk], top_n)
+        for uid, careers in zip(chunk, ranked):
+            yield {"user_id": uid, "career_recommendations": careers}
@@ -1,65 +1,57 @@
 # backend/routers/analytics.py
 from fastapi import (
-    APIRouter, WebSocket, WebSocketDisconnect, Depends, Query
+    APIRouter, WebSocket, WebSocketDisconnect, Depends, Query, HTTPException
 )
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from datetime import datetime
-import asyncio
-import random
-import io
-import csv
-import pandas as pd
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+import os
+import re
+import tempfile
 
 # Import your app modules correctly
-from app.core.database import get_db
-from app.crud.metrics_crud import save_metric, get_metric_history
+from app.database import get_db
 from app.models.metrics import AIMetric
+from app.metrics_broadcaster import metrics_broadcaster
+from app import export_jobs, metric_rollups
+from app.schemas import ExportJobRequest
+from app.metrics_export import (
+    EXPORT_COLUMNS, SPOOL_MAX_BYTES, iter_csv_chunks, iter_file, write_metrics_excel, write_metrics_pdf
+)
 
 # -----------------------------------------------------------------------------
 # Initialize Router
 # -----------------------------------------------------------------------------
 router = APIRouter(prefix="/analytics", tags=["AI Analytics"])
 
-# Store active websocket connections
-active_connections = []
-
 # -----------------------------------------------------------------------------
 # 1️⃣ Real-Time WebSocket Metrics Stream
 # -----------------------------------------------------------------------------
 @router.websocket("/ws/ai-metrics")
-async def websocket_ai_metrics(websocket: WebSocket, db: Session = Depends(get_db)):
+async def websocket_ai_metrics(websocket: WebSocket):
+    """
+    Every client subscribes to the one shared producer (see
+    app/metrics_broadcaster.py) instead of sampling and inserting on its own.
+    """
     await websocket.accept()
-    active_connections.append(websocket)
+    subscription = metrics_broadcaster.subscribe()
     try:
         while True:
-            # Simulated AI performance data (replace with real ML logs later)
-            data = {
-                "timestamp": datetime.now().isoformat(),
-                "accuracy": round(random.uniform(0.85, 0.99), 3),
-                "loss": round(random.uniform(0.01, 0.15), 3),
-                "latency_ms": random.randint(50, 250),
-                "users_active": random.randint(10, 300),
-                "api_calls_today": random.randint(500, 5000)
-            }
-
-            # Save metrics into database
-            save_metric(db, {
-                "accuracy": data["accuracy"],
-                "loss": data["loss"],
-                "latency_ms": data["latency_ms"],
-                "users_active": data["users_active"],
-                "api_calls_today": data["api_calls_today"]
-            })
-
-            # Send metrics to all connected clients
+            data = await subscription.get()
+            if data is None:
+                # Too slow to keep up (or server shutting down)
+                await websocket.close(code=1013 if subscription.dropped else 1001)
+                break
             await websocket.send_json(data)
-            await asyncio.sleep(3)
     except WebSocketDisconnect:
-        active_connections.remove(websocket)
+        pass
+    finally:
+        metrics_broadcaster.unsubscribe(subscription)
+
+@router.get("/ws/ai-metrics/stats")
+def ai_metrics_stream_stats():
+    return metrics_broadcaster.stats()
 
 # -----------------------------------------------------------------------------
 # 2️⃣ Get Metrics History (with optional date range filter)
@@ -69,18 +61,33 @@ def get_metrics_history(
     start_date: str = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: str = Query(None, description="End date (YYYY-MM-DD)"),
     limit: int = Query(100, description="Limit number of records"),
+    resolution: str = Query(
+        "raw", description="raw | 1m | 1h | 1d | auto (finest rollup that fits the range in `limit` points)"
+    ),
     db: Session = Depends(get_db)
 ):
-    query = db.query(AIMetric)
+    if resolution not in ("raw", "auto", *metric_rollups.RESOLUTIONS):
+        raise HTTPException(status_code=400, detail="resolution must be raw, auto, 1m, 1h or 1d")
 
+    start = end = None
     if start_date and end_date:
         try:
             start = datetime.strptime(start_date, "%Y-%m-%d")
             end = datetime.strptime(end_date, "%Y-%m-%d")
-            query = query.filter(AIMetric.created_at.between(start, end))
         except ValueError:
             return {"error": "Invalid date format. Use YYYY-MM-DD."}
 
+    # Rollup points have a different shape (min/max/p95, no users_active),
+    # so they are opt-in; `auto` without a range still returns raw samples
+    if resolution == "auto":
+        max_points = min(limit, metric_rollups.HISTORY_MAX_POINTS)
+        resolution = metric_rollups.choose_resolution(start, end, max_points) if start is not None else "raw"
+    if resolution != "raw":
+        return metric_rollups.get_rollup_history(db, resolution, start, end, limit)
+
+    query = db.query(AIMetric)
+    if start is not None:
+        query = query.filter(AIMetric.created_at.between(start, end))
     metrics = query.order_by(AIMetric.created_at.asc()).limit(limit).all()
 
     return [
@@ -89,68 +96,77 @@ def get_metrics_history(
             "accuracy": m.accuracy,
             "loss": m.loss,
             "latency_ms": m.latency_ms,
+            "success_rate": m.success_rate,
+            "llm_error_rate": m.llm_error_rate,
             "users_active": m.users_active,
             "api_calls_today": m.api_calls_today
         }
         for m in metrics
     ]
 
+# -----------------------------------------------------------------------------
+# Export Filters (shared by the CSV / Excel / PDF exports and export jobs)
+# -----------------------------------------------------------------------------
+def parse_export_filters(
+    start_date: Optional[str], end_date: Optional[str], columns: Optional[str]
+) -> Tuple[Optional[datetime], Optional[datetime], List[str]]:
+    """
+    Validate the query-string filters. `end_date` is inclusive (whole day).
+    """
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d") if start_date else None
+        end = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1) if end_date else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD.")
+
+    keys = [c.strip() for c in columns.split(",") if c.strip()] if columns else list(EXPORT_COLUMNS)
+    unknown = [k for k in keys if k not in EXPORT_COLUMNS]
+    if unknown or not keys:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown columns: {', '.join(unknown)}. Choose from: {', '.join(EXPORT_COLUMNS)}",
+        )
+    return start, end, keys
+
 # -----------------------------------------------------------------------------
 # 3️⃣ Export Metrics as CSV
 # -----------------------------------------------------------------------------
 @router.get("/export/csv")
-def export_metrics_csv(db: Session = Depends(get_db)):
-    metrics = db.query(AIMetric).order_by(AIMetric.created_at.asc()).all()
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["Timestamp", "Accuracy", "Loss", "Latency (ms)", "Users Active", "API Calls"])
-
-    for m in metrics:
-        writer.writerow([
-            m.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-            m.accuracy,
-            m.loss,
-            m.latency_ms,
-            m.users_active,
-            m.api_calls_today
-        ])
-
-    output.seek(0)
+def export_metrics_csv(
+    start_date: str = Query(None, description="Start date (YYYY-MM-DD)"),
+    end_date: str = Query(None, description="End date, inclusive (YYYY-MM-DD)"),
+    columns: str = Query(None, description="Comma-separated columns, e.g. timestamp,accuracy,loss"),
+    gzip: bool = Query(False, description="Gzip the response body (Content-Encoding: gzip)"),
+    db: Session = Depends(get_db)
+):
+    start, end, keys = parse_export_filters(start_date, end_date, columns)
+
+    headers = {"Content-Disposition": "attachment; filename=ai_metrics.csv"}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    # No Content-Length: the body goes out with chunked transfer encoding
     return StreamingResponse(
-        output,
+        iter_csv_chunks(db, start, end, keys, gzip=gzip),
         media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=ai_metrics.csv"}
+        headers=headers,
     )
 
 # -----------------------------------------------------------------------------
 # 4️⃣ Export Metrics as Excel
 # -----------------------------------------------------------------------------
 @router.get("/export/excel")
-def export_metrics_excel(db: Session = Depends(get_db)):
-    metrics = db.query(AIMetric).order_by(AIMetric.created_at.asc()).all()
-
-    data = [
-        {
-            "Timestamp": m.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-            "Accuracy": m.accuracy,
-            "Loss": m.loss,
-            "Latency (ms)": m.latency_ms,
-            "Users Active": m.users_active,
-            "API Calls": m.api_calls_today
-        }
-        for m in metrics
-    ]
-
-    df = pd.DataFrame(data)
-    output = io.BytesIO()
-
-    with pd.ExcelWriter(output, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name="AI Metrics")
+def export_metrics_excel(
+    start_date: str = Query(None, description="Start date (YYYY-MM-DD)"),
+    end_date: str = Query(None, description="End date, inclusive (YYYY-MM-DD)"),
+    columns: str = Query(None, description="Comma-separated columns, e.g. timestamp,accuracy,loss"),
+    db: Session = Depends(get_db)
+):
+    start, end, keys = parse_export_filters(start_date, end_date, columns)
 
-    output.seek(0)
+    output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    write_metrics_excel(db, start, end, keys, output)
     return StreamingResponse(
-        output,
+        iter_file(output),
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         headers={"Content-Disposition": "attachment; filename=ai_metrics.xlsx"}
     )
@@ -159,33 +175,73 @@ def export_metrics_excel(db: Session = Depends(get_db)):
 # 5️⃣ Export Metrics as PDF
 # -----------------------------------------------------------------------------
 @router.get("/export/pdf")
-def export_metrics_pdf(db: Session = Depends(get_db)):
-    metrics = db.query(AIMetric).order_by(AIMetric.created_at.asc()).all()
-
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4)
-    styles = getSampleStyleSheet()
-    elements = [Paragraph("AI Metrics Report", styles["Title"]), Spacer(1, 12)]
-
-    # Table header
-    data = [["Timestamp", "Accuracy", "Loss", "Latency (ms)", "Users Active", "API Calls"]]
-    for m in metrics:
-        data.append([
-            m.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-            round(m.accuracy, 3),
-            round(m.loss, 3),
-            m.latency_ms,
-            m.users_active,
-            m.api_calls_today
-        ])
-
-    table = Table(data)
-    elements.append(table)
-    doc.build(elements)
-    buffer.seek(0)
+def export_metrics_pdf(
+    start_date: str = Query(None, description="Start date (YYYY-MM-DD)"),
+    end_date: str = Query(None, description="End date, inclusive (YYYY-MM-DD)"),
+    columns: str = Query(None, description="Comma-separated columns, e.g. timestamp,accuracy,loss"),
+    db: Session = Depends(get_db)
+):
+    start, end, keys = parse_export_filters(start_date, end_date, columns)
 
+    output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    write_metrics_pdf(db, start, end, keys, output)
     return StreamingResponse(
-        buffer,
+        iter_file(output),
         media_type="application/pdf",
         headers={"Content-Disposition": "attachment; filename=ai_metrics.pdf"}
     )
+
+# -----------------------------------------------------------------------------
+# 6️⃣ Background Export Jobs (submit -> poll -> download)
+# -----------------------------------------------------------------------------
+def _job_status_or_404(job_id: str) -> dict:
+    status = export_jobs.read_status(job_id) if re.fullmatch(r"[0-9a-f]{32}", job_id) else None
+    if status is None:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return status
+
+
+def _with_links(status: dict) -> dict:
+    job_id = status["job_id"]
+    return {
+        **status,
+        "status_url": f"{router.prefix}/export/jobs/{job_id}",
+        "download_url": f"{router.prefix}/export/jobs/{job_id}/download",
+    }
+
+
+@router.post("/export/jobs", status_code=202)
+def submit_export_job(request: ExportJobRequest, db: Session = Depends(get_db)):
+    if request.format not in export_jobs.FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(export_jobs.FORMATS)}")
+    start, end, keys = parse_export_filters(request.start_date, request.end_date, request.columns)
+    try:
+        status = export_jobs.submit(db, request.format, start, end, keys, gzip=request.gzip)
+    except export_jobs.ExportQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return _with_links(status)
+
+
+@router.get("/export/jobs/{job_id}")
+def get_export_job(job_id: str):
+    return _with_links(_job_status_or_404(job_id))
+
+
+@router.get("/export/jobs/{job_id}/download")
+def download_export_job(job_id: str):
+    status = _job_status_or_404(job_id)
+    path = export_jobs.file_path(job_id, status["format"], status.get("gzip", False))
+    if status["status"] != "done" or not os.path.exists(path):
+        raise HTTPException(status_code=409, detail=f"Export is {status['status']}")
+    extension = os.path.basename(path).split(".", 1)[1]
+    return FileResponse(
+        path,
+        media_type="application/gzip" if extension.endswith(".gz") else export_jobs.FORMATS[status["format"]][1],
+        filename=f"ai_metrics.{extension}",
+    )
+
+
+@router.on_event("shutdown")
+async def stop_background_workers():
+    export_jobs.shutdown()
+    await metrics_broadcaster.stop()
@@ -1,69 +1,58 @@
 # backend/app/routes/chat_routes.py
 
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from app import models, schemas, database, ai_chat
+from starlette.concurrency import run_in_threadpool
+
+from app import models, schemas, database
 from app.auth.oauth2 import get_current_user
+from app.chat_context import build_context_window, refresh_summary
+from app.crud.chat_crud import decode_cursor, get_chat_page, save_chat_message
+from app.llm_client import LLMError, llm
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
 
 @router.post("/send", response_model=schemas.ChatMessageResponse)
-def send_message(
+async def send_message(
     msg: schemas.ChatMessageCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(database.get_db),
     current_user: models.User = Depends(get_current_user),
 ):
+    if not msg.message:
+        raise HTTPException(status_code=400, detail="Message is required")
+
+    # Bounded context: rolling summary + newest turns that fit the token budget
+    context, window_start_id = await run_in_threadpool(build_context_window, db, current_user.id, msg.message)
+
     # Save user message
-    user_message = models.ChatMessage(
-        user_id=current_user.id, sender="user", message=msg.message
-    )
-    db.add(user_message)
-    db.commit()
-    db.refresh(user_message)
+    await run_in_threadpool(save_chat_message, db, current_user.id, "user", msg.message)
 
     # Get AI response
-    ai_reply = ai_chat.get_ai_response(msg.message)
-
-    ai_message = models.ChatMessage(
-        user_id=current_user.id, sender="ai", message=ai_reply
-    )
-    db.add(ai_message)
-    db.commit()
-    db.refresh(ai_message)
+    try:
+        ai_reply = await llm.chat(context)
+    except LLMError as e:
+        raise HTTPException(status_code=502, detail=str(e))
 
+    ai_message = await run_in_threadpool(save_chat_message, db, current_user.id, "ai", ai_reply)
+    background_tasks.add_task(refresh_summary, current_user.id, window_start_id)
     return ai_message
 
 
-@router.get("/history", response_model=list[schemas.ChatMessageResponse])
+@router.get("/history", response_model=schemas.ChatHistoryPage)
 def get_chat_history(
+    limit: int = Query(50, ge=1, le=200, description="Messages per page"),
+    before: Optional[str] = Query(None, description="next_cursor from the previous page"),
     db: Session = Depends(database.get_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    messages = (
-        db.query(models.ChatMessage)
-        .filter(models.ChatMessage.user_id == current_user.id)
-        .order_by(models.ChatMessage.timestamp.asc())
-        .all()
-    )
-    return messages
-
-# backend/app/routes/chat_routes.py
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app import database, models, ai_chat
-from app.auth.oauth2 import get_current_user
-
-router = APIRouter(prefix="/chat", tags=["Chatbot"])
-
-@router.post("/send")
-def send_message(payload: dict, db: Session = Depends(database.get_db), current_user: models.User = Depends(get_current_user)):
-    user_message = payload.get("message")
-    if not user_message:
-        raise HTTPException(status_code=400, detail="Message is required")
-
-    db.add(models.ChatMessage(user_id=current_user.id, role="user", content=user_message))
-    db.commit()
+    try:
+        cursor = decode_cursor(before) if before else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-    ai_reply = ai_chat.generate_ai_response(db, current_user.id, user_message)
-    return {"reply": ai_reply}
+    messages, next_cursor = get_chat_page(db, current_user.id, limit, cursor)
+    return {"messages": messages, "next_cursor": next_cursor}
@@ -1,3 +1,5 @@
+from datetime import datetime
+from typing import List, Optional
 from pydantic import BaseModel, EmailStr
 
 class UserCreate(BaseModel):
@@ -29,6 +31,20 @@ class CourseResponse(BaseModel):
     class Config:
         orm_mode = True
 
+class CourseSearchHit(BaseModel):
+    id: int
+    title: str
+    description: Optional[str] = None
+    category: str
+    score: float
+
+class CourseSearchPage(BaseModel):
+    query: str
+    total: int
+    page: int
+    page_size: int
+    results: List[CourseSearchHit]
+
 class ProgressCreate(BaseModel):
     user_id: int
     course_id: int
@@ -43,3 +59,30 @@ class ProgressResponse(BaseModel):
     status: str
     class Config:
         orm_mode = True
+
+class BatchRecommendationRequest(BaseModel):
+    user_ids: Optional[List[int]] = None  # None = every user
+    top_n: int = 3
+
+class ChatMessageCreate(BaseModel):
+    message: str
+
+class ChatMessageResponse(BaseModel):
+    id: int
+    user_id: int
+    sender: str
+    message: str
+    timestamp: datetime
+    class Config:
+        orm_mode = True
+
+class ChatHistoryPage(BaseModel):
+    messages: List[ChatMessageResponse]  # oldest first within the page
+    next_cursor: Optional[str] = None    # pass as `before` to load older messages
+
+class ExportJobRequest(BaseModel):
+    format: str = "csv"                # csv | excel | pdf
+    start_date: Optional[str] = None   # YYYY-MM-DD
+    end_date: Optional[str] = None     # YYYY-MM-DD, inclusive
+    columns: Optional[str] = None      # comma-separated, e.g. "timestamp,accuracy"
+    gzip: bool = False                 # csv only
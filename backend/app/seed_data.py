@@ -1,38 +1,35 @@
-# backend/seed_data_day8.py
-from sqlalchemy.orm import Session
-from app import models, utils, database
-import random
+# backend/app/seed_data.py
+"""
+Synthetic data generator for development, load tests and migration rehearsals.
 
-# -------------------------
-# 1️⃣ Connect to Database
-# -------------------------
-db: Session = database.SessionLocal()
+    python -m app.seed_data                                   # small dev dataset
+    python -m app.seed_data --users 100000 --courses 500 \\
+        --progress-density 0.05 --chat-messages 20 --metrics-days 30
 
-# -------------------------
-# 2️⃣ Create Users
-# -------------------------
-users_data = [
-    {"username": "harish", "email": "harish@example.com", "password": "123456"},
-    {"username": "alice", "email": "alice@example.com", "password": "password1"},
-    {"username": "bob", "email": "bob@example.com", "password": "password2"},
-    {"username": "carol", "email": "carol@example.com", "password": "password3"},
-    {"username": "david", "email": "david@example.com", "password": "password4"},
-]
+Rows are generated in batches and written with bulk Core INSERTs (one
+executemany per batch, no ORM objects). Every generated user shares one
+password, hashed once. The same --seed always produces the same rows
+(timestamps are relative to the time of the run).
+
+Run it against a database the app is not writing to: ids are allocated
+up front (max(id) + 1) and rows land over many transactions.
+"""
+import argparse
+import math
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List
 
-users = []
-for u in users_data:
-    hashed_pw = utils.hash_password(u["password"])
-    user = models.User(username=u["username"], email=u["email"], password=hashed_pw)
-    db.add(user)
-    users.append(user)
+from sqlalchemy import func, insert, select, text
 
-db.commit()
-print(f"✅ Added {len(users)} users.")
+from app import aggregates, course_search, database, metric_rollups, models, utils  # course_search registers the search-index DDL
+from app.models.metrics import AIMetric
 
 # -------------------------
-# 3️⃣ Create Courses
+# 1️⃣ Catalog Templates
 # -------------------------
-courses_data = [
+COURSE_TEMPLATES = [
     {"title": "Python for Beginners", "category": "Programming", "description": "Learn Python programming from scratch."},
     {"title": "Advanced Python", "category": "Programming", "description": "Deep dive into OOP, decorators, and async programming."},
     {"title": "Machine Learning Fundamentals", "category": "Machine Learning", "description": "Supervised and unsupervised learning."},
@@ -47,55 +44,244 @@ courses_data = [
     {"title": "Statistics Fundamentals", "category": "Data Science", "description": "Probability and statistics for ML."},
     {"title": "Time Series Analysis", "category": "Data Science", "description": "Forecasting using Python."},
 ]
+LEVELS = ["", "II", "III", "Workshop", "Bootcamp", "Masterclass", "Projects", "Interview Prep"]
+
+COMPLETION_CHOICES = [0, 10, 25, 50, 75, 100]
+
+CHAT_PROMPTS = [
+    ("What should I learn after {course}?", "Since you're working on {course}, a good next step is a related project."),
+    ("Can you explain the key ideas in {course}?", "{course} covers the fundamentals first, then applies them to real data."),
+    ("I'm stuck on the exercises in {course}.", "Try breaking the exercise into smaller steps and re-reading the lesson notes."),
+    ("How long does {course} take?", "Most learners finish {course} in a few weeks with regular practice."),
+]
+
+DEFAULT_PASSWORD = "password123"
+
+
+def _status(completion: float) -> str:
+    if completion == 100:
+        return "completed"
+    return "in-progress" if completion > 0 else "not-started"
+
 
-courses = []
-for c in courses_data:
-    course = models.Course(**c)
-    db.add(course)
-    courses.append(course)
+def _batched(rows: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
 
-db.commit()
-print(f"✅ Added {len(courses)} courses.")
 
 # -------------------------
-# 4️⃣ Create Random Progress
+# 2️⃣ Row Generators
 # -------------------------
-progress_entries = []
-for user in users:
-    for course in courses:
-        completion = random.choice([0, 10, 25, 50, 75, 100])
-        if completion == 100:
-            status = "completed"
-        elif completion > 0:
-            status = "in-progress"
-        else:
-            status = "not-started"
-
-        progress = models.Progress(
-            user_id=user.id,
-            course_id=course.id,
-            completion_percentage=completion,
-            status=status
-        )
-        db.add(progress)
-        progress_entries.append(progress)
-
-db.commit()
-print(f"✅ Added {len(progress_entries)} progress entries.")
+def generate_users(first_id: int, count: int, password_hash: str) -> Iterator[dict]:
+    for user_id in range(first_id, first_id + count):
+        yield {"id": user_id, "username": f"user{user_id}", "email": f"user{user_id}@example.com",
+               "password": password_hash}
+
+
+def generate_courses(first_id: int, count: int) -> Iterator[dict]:
+    for i in range(count):
+        template = COURSE_TEMPLATES[i % len(COURSE_TEMPLATES)]
+        cycle = i // len(COURSE_TEMPLATES)
+        edition = cycle // len(LEVELS)  # past "Interview Prep": "... (2)", "... (3)"
+        title = " ".join(filter(None, [template["title"], LEVELS[cycle % len(LEVELS)],
+                                       f"({edition + 1})" if edition else ""]))
+        yield {"id": first_id + i, "title": title,
+               "category": template["category"], "description": template["description"]}
+
+
+def generate_progress(rng: random.Random, user_ids: range, course_ids: List[int],
+                      density: float) -> Iterator[dict]:
+    """
+    Each user gets progress on ~density x len(courses) distinct courses.
+    """
+    per_user = density * len(course_ids)
+    for user_id in user_ids:
+        k = min(len(course_ids), int(per_user) + (rng.random() < per_user - int(per_user)))
+        for course_id in rng.sample(course_ids, k):
+            completion = rng.choice(COMPLETION_CHOICES)
+            yield {"user_id": user_id, "course_id": course_id,
+                   "completion_percentage": completion, "status": _status(completion)}
+
+
+def generate_chat(rng: random.Random, user_ids: range, per_user: int, course_titles: List[str],
+                  end: datetime) -> Iterator[dict]:
+    """
+    `per_user` messages per user, alternating user / ai, over the last 30 days.
+    """
+    for user_id in user_ids:
+        timestamp = end - timedelta(days=30 * rng.random())
+        for i in range(0, per_user, 2):
+            question, answer = rng.choice(CHAT_PROMPTS)
+            course = rng.choice(course_titles)
+            yield {"user_id": user_id, "sender": "user", "message": question.format(course=course),
+                   "timestamp": timestamp}
+            timestamp += timedelta(seconds=rng.randint(2, 30))
+            if i + 1 < per_user:
+                yield {"user_id": user_id, "sender": "ai", "message": answer.format(course=course),
+                       "timestamp": timestamp}
+            timestamp += timedelta(seconds=rng.randint(30, 600))
+
+
+def generate_metrics(rng: random.Random, days: float, interval_seconds: int, end: datetime,
+                     users: int) -> Iterator[dict]:
+    """
+    One sample every `interval_seconds`, ending now: slow drift plus noise and
+    a daily traffic cycle.
+    """
+    samples = int(days * 86400 // interval_seconds)
+    start = end - timedelta(seconds=samples * interval_seconds)
+    accuracy, loss = 0.85, 0.35
+    for i in range(samples):
+        timestamp = start + timedelta(seconds=i * interval_seconds)
+        daily = 0.5 + 0.5 * math.sin(2 * math.pi * (timestamp.hour * 60 + timestamp.minute) / 1440)
+        accuracy = min(0.99, max(0.6, accuracy + rng.gauss(0, 0.002)))
+        loss = min(1.0, max(0.02, loss + rng.gauss(0, 0.003)))
+        yield {
+            "created_at": timestamp,
+            "accuracy": round(accuracy, 4),
+            "loss": round(loss, 4),
+            "latency_ms": round(max(5.0, rng.lognormvariate(4.0, 0.35) * (1 + daily)), 2),
+            "success_rate": round(1 - min(0.05, abs(rng.gauss(0, 0.004))), 4),
+            "llm_error_rate": round(min(0.2, abs(rng.gauss(0, 0.02))), 4),
+            "users_active": int(users * (0.02 + 0.08 * daily) * rng.uniform(0.9, 1.1)),
+            "api_calls_today": int((timestamp.hour * 60 + timestamp.minute) * users * 0.05),
+        }
+
 
 # -------------------------
-# 5️⃣ Verification Summary
+# 3️⃣ Bulk Writer
 # -------------------------
-user_count = db.query(models.User).count()
-course_count = db.query(models.Course).count()
-progress_count = db.query(models.Progress).count()
-print(f"\n📊 Summary:")
-print(f"Users: {user_count}")
-print(f"Courses: {course_count}")
-print(f"Progress Records: {progress_count}")
+def bulk_insert(table, rows: Iterable[dict], batch_size: int, label: str) -> int:
+    """
+    executemany per batch, each batch in its own short transaction.
+    """
+    written = 0
+    started = time.perf_counter()
+    for batch in _batched(rows, batch_size):
+        with database.engine.begin() as conn:
+            conn.execute(insert(table), batch)
+        written += len(batch)
+    elapsed = time.perf_counter() - started
+    print(f"✅ Added {written:,} {label} in {elapsed:.1f}s ({written / max(elapsed, 1e-9):,.0f} rows/s)")
+    return written
+
+
+def _next_id(column) -> int:
+    with database.engine.connect() as conn:
+        return (conn.execute(select(func.max(column))).scalar() or 0) + 1
+
+
+def _sync_sequences(*tables):
+    """
+    Ids were assigned explicitly; move Postgres sequences past them.
+    """
+    if database.engine.dialect.name != "postgresql":
+        return
+    with database.engine.begin() as conn:
+        for table in tables:
+            conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"COALESCE((SELECT MAX(id) FROM {table}), 1))"
+            ))
+
 
 # -------------------------
-# 6️⃣ Close DB
+# 4️⃣ Entry Point
 # -------------------------
-db.close()
-print("\n✅ Day 8 Dataset Seeding Complete!")
+def generate(
+    users: int = 100, courses: int = 13, progress_density: float = 0.5, chat_messages: int = 10,
+    metrics_days: float = 1.0, metrics_interval: int = 60, seed: int = 42, batch_size: int = 10000,
+    password: str = DEFAULT_PASSWORD, reset: bool = False,
+) -> Dict[str, int]:
+    """
+    Insert the dataset and rebuild the derived tables; returns row counts.
+    Ids are allocated up front from max(id) + 1 and written over many
+    transactions, so do not run it while the app is writing to the same
+    database (a user or course created meanwhile would collide).
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+
+    if reset:
+        models.Base.metadata.drop_all(bind=database.engine)
+    models.Base.metadata.create_all(bind=database.engine)
+
+    first_user = _next_id(models.User.id)
+    first_course = _next_id(models.Course.id)
+    user_ids = range(first_user, first_user + users)
+    course_rows = list(generate_courses(first_course, courses))
+    course_ids = [c["id"] for c in course_rows]
+
+    # One hash for everyone: bcrypt per user would dominate the run time
+    password_hash = utils.hash_password(password)
+
+    counts = {
+        "users": bulk_insert(models.User.__table__, generate_users(first_user, users, password_hash),
+                             batch_size, "users"),
+        "courses": bulk_insert(models.Course.__table__, course_rows, batch_size, "courses"),
+    }
+    counts["progress"] = bulk_insert(
+        models.Progress.__table__, generate_progress(rng, user_ids, course_ids, progress_density),
+        batch_size, "progress entries",
+    )
+    counts["chat_messages"] = bulk_insert(
+        models.ChatMessage.__table__,
+        generate_chat(rng, user_ids, chat_messages, [c["title"] for c in course_rows], now),
+        batch_size, "chat messages",
+    )
+    counts["metrics"] = bulk_insert(
+        AIMetric.__table__, generate_metrics(rng, metrics_days, metrics_interval, now, users),
+        batch_size, "metric samples",
+    )
+    _sync_sequences("users", "courses", "progress", "chat_messages", "ai_metrics")
+
+    # Derived tables, rebuilt set-based rather than row by row
+    db = database.SessionLocal()
+    try:
+        aggregates.rebuild(db)
+        metric_rollups.rebuild(db)
+    finally:
+        db.close()
+    print("✅ Rebuilt progress aggregates and metric rollups.")
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic dataset.")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--courses", type=int, default=13)
+    parser.add_argument("--progress-density", type=float, default=0.5,
+                        help="fraction of the catalog each user has progress on")
+    parser.add_argument("--chat-messages", type=int, default=10, help="chat messages per user")
+    parser.add_argument("--metrics-days", type=float, default=1.0, help="days of AI metric history")
+    parser.add_argument("--metrics-interval", type=int, default=60, help="seconds between metric samples")
+    parser.add_argument("--seed", type=int, default=42, help="RNG seed (same seed, same data)")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--password", default=DEFAULT_PASSWORD, help="password shared by generated users")
+    parser.add_argument("--reset", action="store_true", help="drop and recreate all tables first")
+    args = parser.parse_args()
+
+    if not 0 <= args.progress_density <= 1:
+        parser.error("--progress-density must be between 0 and 1")
+
+    started = time.perf_counter()
+    counts = generate(
+        users=args.users, courses=args.courses, progress_density=args.progress_density,
+        chat_messages=args.chat_messages, metrics_days=args.metrics_days,
+        metrics_interval=args.metrics_interval, seed=args.seed, batch_size=args.batch_size,
+        password=args.password, reset=args.reset,
+    )
+    print(f"\n📊 Summary ({time.perf_counter() - started:.1f}s):")
+    for name, count in counts.items():
+        print(f"{name}: {count:,}")
+    print(f"\n🔑 Generated users log in as userN@example.com / {args.password}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# backend/app/singleflight.py
+import asyncio
+from typing import Awaitable, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key into one upstream call.
+    The first caller (leader) starts the work as its own task; callers
+    that arrive while it is in flight await the same task. A cancelled
+    caller (e.g. client disconnect) never cancels the shared call.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.calls = 0      # every do() call
+        self.leaders = 0    # calls that went upstream
+        self.coalesced = 0  # calls served by someone else's in-flight request
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._finished(key, t))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finished(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved even if every waiter went away
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "upstream_calls": self.leaders,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+            "hit_ratio": round(self.coalesced / self.calls, 4) if self.calls else 0.0,
+        }
+
+
+_groups: Dict[str, SingleFlight] = {}
+
+
+def flight_group(name: str) -> SingleFlight:
+    if name not in _groups:
+        _groups[name] = SingleFlight(name)
+    return _groups[name]
+
+
+def coalescing_stats() -> dict:
+    return {name: group.stats() for name, group in _groups.items()}
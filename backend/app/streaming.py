@@ -0,0 +1,125 @@
+# backend/app/streaming.py
+import asyncio
+import json
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from fastapi import Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from app.llm_client import LLMError
+
+# Called with the full reply once the stream has finished; returns extra
+# fields for the final "done" event (e.g. the persisted message id).
+OnComplete = Callable[[str], Awaitable[Optional[dict]]]
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+# Sent for any frame other than a cancel that arrives while a reply is streaming
+BUSY_FRAME = {"type": "error", "code": "busy",
+              "detail": "A reply is still streaming; message ignored. Send {\"type\": \"cancel\"} to stop it."}
+
+
+def sse_event(data: dict, event: Optional[str] = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+# -------------------- Server-Sent Events --------------------
+async def sse_token_stream(tokens: AsyncIterator[str], request: Request,
+                           on_complete: Optional[OnComplete] = None) -> AsyncIterator[str]:
+    """
+    Forward LLM tokens as SSE `data:` events, then a `done` event with the
+    assembled reply. A client disconnect stops the upstream call and
+    nothing is persisted.
+    """
+    parts = []
+    try:
+        async for token in tokens:
+            if await request.is_disconnected():
+                return
+            parts.append(token)
+            yield sse_event({"token": token})
+        reply = "".join(parts)
+        extra = await on_complete(reply) if on_complete else None
+        yield sse_event({"content": reply, **(extra or {})}, event="done")
+    except LLMError as e:
+        yield sse_event({"detail": str(e)}, event="error")
+    finally:
+        await tokens.aclose()
+
+
+def sse_response(tokens: AsyncIterator[str], request: Request,
+                 on_complete: Optional[OnComplete] = None) -> StreamingResponse:
+    return StreamingResponse(
+        sse_token_stream(tokens, request, on_complete),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+# -------------------- WebSocket --------------------
+async def _wait_for_cancel(websocket: WebSocket, send: Callable[[dict], Awaitable[None]]) -> str:
+    """
+    Resolve when the client sends {"type": "cancel"} or disconnects. Any
+    other frame is answered with BUSY_FRAME instead of being dropped silently.
+    """
+    try:
+        while True:
+            message = await websocket.receive_json()
+            if isinstance(message, dict) and message.get("type") == "cancel":
+                return "cancel"
+            await send(BUSY_FRAME)
+    except WebSocketDisconnect:
+        return "disconnect"
+
+
+async def websocket_token_stream(websocket: WebSocket, tokens: AsyncIterator[str],
+                                 on_complete: Optional[OnComplete] = None) -> str:
+    """
+    Forward tokens as {"type": "token"} frames, then {"type": "done"}.
+    Returns "done", "cancel", "disconnect" or "error". On cancel/disconnect
+    the upstream call is aborted and nothing is persisted. Other messages
+    sent mid-stream get a BUSY_FRAME reply and are not processed.
+    """
+    parts = []
+    send_lock = asyncio.Lock()  # token frames and busy replies come from two tasks
+
+    async def send(frame: dict):
+        async with send_lock:
+            await websocket.send_json(frame)
+
+    async def pump():
+        async for token in tokens:
+            parts.append(token)
+            await send({"type": "token", "content": token})
+
+    pump_task = asyncio.create_task(pump())
+    cancel_task = asyncio.create_task(_wait_for_cancel(websocket, send))
+    try:
+        done, _ = await asyncio.wait({pump_task, cancel_task}, return_when=asyncio.FIRST_COMPLETED)
+        if cancel_task in done:
+            pump_task.cancel()
+            reason = cancel_task.result()
+            if reason == "cancel":
+                await send({"type": "cancelled", "content": "".join(parts)})
+            return reason
+
+        cancel_task.cancel()
+        try:
+            pump_task.result()
+        except LLMError as e:
+            await websocket.send_json({"type": "error", "detail": str(e)})
+            return "error"
+        except WebSocketDisconnect:
+            return "disconnect"
+
+        reply = "".join(parts)
+        extra = await on_complete(reply) if on_complete else None
+        await websocket.send_json({"type": "done", "content": reply, **(extra or {})})
+        return "done"
+    finally:
+        for task in (pump_task, cancel_task):
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(pump_task, cancel_task, return_exceptions=True)
+        await tokens.aclose()
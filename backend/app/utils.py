@@ -1,7 +1,73 @@
-from passlib.context import CryptContext
-pwd_context = CryptContext(schemes=["bcrypt"],deprecated = "auto")
+import asyncio
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
-def verify_password(plain_password: str,hashed_password:str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+import bcrypt
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# bcrypt cost factor for new hashes; older hashes are upgraded on login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Dedicated pool so a login burst can't starve the DB threadpool.
+# bcrypt releases the GIL, so threads hash in parallel.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(8, os.cpu_count() or 1))))
+
+_BCRYPT_COST = re.compile(r"^\$2[aby]?\$(\d\d)\$")
+_hash_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _hash_pool
+    if _hash_pool is None:
+        _hash_pool = ThreadPoolExecutor(PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+    return _hash_pool
+
+
+def _secret(password: str) -> bytes:
+    # bcrypt only uses the first 72 bytes (older versions truncated silently)
+    return password.encode("utf-8")[:72]
+
+
+# -------------------- Sync (scripts / worker threads) --------------------
+def hash_password(password: str, rounds: int = None) -> str:
+    return bcrypt.hashpw(_secret(password), bcrypt.gensalt(rounds or BCRYPT_ROUNDS)).decode()
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    try:
+        return bcrypt.checkpw(_secret(plain_password), hashed_password.encode())
+    except ValueError:  # not a bcrypt hash
+        return False
+
+def needs_rehash(hashed_password: str) -> bool:
+    """True when the hash was made with a different cost factor than BCRYPT_ROUNDS."""
+    match = _BCRYPT_COST.match(hashed_password or "")
+    return match is None or int(match.group(1)) != BCRYPT_ROUNDS
+
+def verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    (valid, new_hash). new_hash is set when the password was correct but the
+    stored hash uses an outdated cost factor.
+    """
+    if not verify_password(plain_password, hashed_password):
+        return False, None
+    return True, hash_password(plain_password) if needs_rehash(hashed_password) else None
+
+def hash_passwords(passwords: List[str], rounds: int = None) -> List[str]:
+    """Hash many passwords in parallel (bulk user import)."""
+    return list(_pool().map(lambda p: hash_password(p, rounds), passwords))
+
+
+# -------------------- Async (request handlers) --------------------
+async def hash_password_async(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(_pool(), hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await asyncio.get_running_loop().run_in_executor(_pool(), verify_password, plain_password, hashed_password)
+
+async def verify_and_update_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return await asyncio.get_running_loop().run_in_executor(
+        _pool(), verify_and_update, plain_password, hashed_password
+    )
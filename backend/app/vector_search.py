@@ -0,0 +1,282 @@
+# backend/app/vector_search.py
+import json
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# brute (alias: exact) | faiss-flat | faiss-ivf | faiss-hnsw
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "brute")
+_BACKEND_ALIASES = {"exact": "brute"}
+# Directory where the FAISS index and its id <-> row mapping are persisted
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR")
+# Dense dimension the TF-IDF vectors are projected to for FAISS
+VECTOR_DIM = int(os.getenv("VECTOR_DIM", "128"))
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Row-wise indices of the k largest scores, best first.
+    """
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, part, axis=1), axis=1)
+    return np.take_along_axis(part, order, axis=1)
+
+
+# -------------------- Backend Interface --------------------
+class VectorSearchBackend(ABC):
+    """
+    k-NN search over course vectors. `ids[row]` is the course id stored at
+    each row, so results come back as course ids rather than positions.
+    All methods take a batch of queries; padding slots have id -1.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self.ids = np.empty(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @abstractmethod
+    def build(self, matrix, ids: Sequence[int]) -> "VectorSearchBackend":
+        ...
+
+    @abstractmethod
+    def extended(self, matrix, ids: Sequence[int]) -> "VectorSearchBackend":
+        """
+        Return a new backend with extra rows appended (the original is untouched,
+        so readers holding it are never affected).
+        """
+
+    @abstractmethod
+    def search(self, queries, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return (scores, course_ids), both shaped (n_queries x k).
+        """
+
+    @abstractmethod
+    def _save_files(self, path: str, fingerprint: str):
+        """Write the index files into `path` (an empty staging directory)."""
+
+    def save(self, path: str, fingerprint: str = ""):
+        """
+        Write into a staging directory next to `path`, then rename it into
+        place, so a crash mid-write never leaves a half-written index behind.
+        (A load in the instant between the two renames finds no index and
+        rebuilds.)
+        """
+        path = os.path.abspath(path)
+        parent = os.path.dirname(path)
+        os.makedirs(parent, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f".{os.path.basename(path)}.staging-", dir=parent)
+        try:
+            self._save_files(staging, fingerprint)
+            if os.path.isdir(path):
+                # os.replace can't overwrite a non-empty directory: move the old one aside
+                retired = staging + "-old"
+                os.replace(path, retired)
+                os.replace(staging, path)
+                shutil.rmtree(retired, ignore_errors=True)
+            else:
+                os.replace(staging, path)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+    def _write_meta(self, path: str, fingerprint: str, **extra):
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "ids.npy"), self.ids)
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({"backend": self.name, "fingerprint": fingerprint, **extra}, f)
+
+
+# -------------------- Exact Brute Force --------------------
+class BruteForceBackend(VectorSearchBackend):
+    """
+    Exact cosine search with one sparse matrix product (rows are L2-normalised).
+    """
+
+    name = "brute"
+
+    def __init__(self):
+        super().__init__()
+        self.matrix = None
+
+    def build(self, matrix, ids):
+        self.matrix = sparse.csr_matrix(matrix)
+        self.ids = np.asarray(ids, dtype=np.int64)
+        return self
+
+    def extended(self, matrix, ids):
+        return BruteForceBackend().build(
+            sparse.vstack([self.matrix, matrix], format="csr"),
+            np.concatenate([self.ids, np.asarray(ids, dtype=np.int64)]),
+        )
+
+    def search(self, queries, k):
+        scores = queries @ self.matrix.T
+        scores = scores.toarray() if sparse.issparse(scores) else np.asarray(scores)
+        rows = _top_k(scores, k)
+        return np.take_along_axis(scores, rows, axis=1), self.ids[rows]
+
+    def _save_files(self, path, fingerprint):
+        self._write_meta(path, fingerprint)
+        sparse.save_npz(os.path.join(path, "matrix.npz"), self.matrix)
+
+    @classmethod
+    def load(cls, path):
+        backend = cls()
+        backend.matrix = sparse.load_npz(os.path.join(path, "matrix.npz")).tocsr()
+        backend.ids = np.load(os.path.join(path, "ids.npy"))
+        return backend
+
+
+# -------------------- FAISS (flat / IVF / HNSW) --------------------
+class FaissBackend(VectorSearchBackend):
+    """
+    Approximate search with FAISS. Sparse TF-IDF rows are projected to a
+    small dense space (truncated SVD) and searched by inner product.
+    """
+
+    def __init__(self, kind: str = "hnsw", dim: int = VECTOR_DIM, nlist: Optional[int] = None,
+                 nprobe: int = 8, hnsw_m: int = 32, ef_search: int = 64):
+        super().__init__()
+        self.kind = kind
+        self.name = f"faiss-{kind}"
+        self.dim = dim
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.hnsw_m = hnsw_m
+        self.ef_search = ef_search
+        self.projection: Optional[np.ndarray] = None  # (vocab x dim), from truncated SVD
+        self.index = None
+
+    def _project(self, matrix) -> np.ndarray:
+        import faiss
+
+        if self.projection is not None:
+            dense = matrix @ self.projection
+        else:
+            dense = matrix.toarray() if sparse.issparse(matrix) else matrix
+        dense = np.ascontiguousarray(np.asarray(dense), dtype=np.float32)
+        faiss.normalize_L2(dense)
+        return dense
+
+    def _new_index(self, vectors: np.ndarray):
+        import faiss
+
+        n, d = vectors.shape
+        if self.kind == "ivf":
+            # FAISS wants ~39 training points per centroid
+            nlist = max(1, min(self.nlist or int(4 * np.sqrt(n)), n // 39))
+            quantizer = faiss.IndexFlatIP(d)
+            index = faiss.IndexIVFFlat(quantizer, d, nlist, faiss.METRIC_INNER_PRODUCT)
+            index.train(vectors)
+            index.nprobe = min(self.nprobe, nlist)
+            return index
+        if self.kind == "hnsw":
+            index = faiss.IndexHNSWFlat(d, self.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efSearch = self.ef_search
+            return index
+        return faiss.IndexFlatIP(d)
+
+    def build(self, matrix, ids):
+        from sklearn.decomposition import TruncatedSVD
+
+        n, vocab = matrix.shape
+        if vocab > self.dim and n > self.dim:
+            svd = TruncatedSVD(n_components=self.dim, random_state=0).fit(matrix)
+            self.projection = np.ascontiguousarray(svd.components_.T, dtype=np.float32)
+        vectors = self._project(matrix)
+        self.index = self._new_index(vectors)
+        self.index.add(vectors)
+        self.ids = np.asarray(ids, dtype=np.int64)
+        return self
+
+    def extended(self, matrix, ids):
+        import faiss
+
+        clone = FaissBackend(self.kind, self.dim, self.nlist, self.nprobe, self.hnsw_m, self.ef_search)
+        clone.projection = self.projection
+        clone.index = faiss.clone_index(self.index)
+        if self.kind == "hnsw":
+            clone.index.hnsw.efSearch = self.ef_search
+        clone.index.add(self._project(matrix))
+        clone.ids = np.concatenate([self.ids, np.asarray(ids, dtype=np.int64)])
+        return clone
+
+    def search(self, queries, k):
+        k = min(k, len(self.ids))
+        scores, rows = self.index.search(self._project(queries), k)
+        ids = np.where(rows >= 0, self.ids[np.maximum(rows, 0)], -1)
+        return scores, ids
+
+    def _save_files(self, path, fingerprint):
+        import faiss
+
+        self._write_meta(path, fingerprint, kind=self.kind, dim=self.dim, nprobe=self.nprobe,
+                         hnsw_m=self.hnsw_m, ef_search=self.ef_search)
+        faiss.write_index(self.index, os.path.join(path, "courses.faiss"))
+        if self.projection is not None:
+            np.save(os.path.join(path, "projection.npy"), self.projection)
+
+    @classmethod
+    def load(cls, path):
+        import faiss
+
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        backend = cls(meta["kind"], meta["dim"], nprobe=meta["nprobe"],
+                      hnsw_m=meta["hnsw_m"], ef_search=meta["ef_search"])
+        backend.index = faiss.read_index(os.path.join(path, "courses.faiss"))
+        if meta["kind"] == "ivf":
+            backend.index.nprobe = meta["nprobe"]
+        elif meta["kind"] == "hnsw":
+            backend.index.hnsw.efSearch = meta["ef_search"]
+        projection = os.path.join(path, "projection.npy")
+        backend.projection = np.load(projection) if os.path.exists(projection) else None
+        backend.ids = np.load(os.path.join(path, "ids.npy"))
+        return backend
+
+
+# -------------------- Factory / Persistence --------------------
+def backend_name(name: str = VECTOR_BACKEND) -> str:
+    """Canonical name, as written to a saved index's meta.json."""
+    return _BACKEND_ALIASES.get(name, name)
+
+
+def make_backend(name: str = VECTOR_BACKEND) -> VectorSearchBackend:
+    name = backend_name(name)
+    if name == "brute":
+        return BruteForceBackend()
+    if name.startswith("faiss-"):
+        return FaissBackend(kind=name.split("-", 1)[1])
+    raise ValueError(f"Unknown vector backend: {name}")
+
+
+def load_backend(path: Optional[str], fingerprint: str) -> Optional[VectorSearchBackend]:
+    """
+    Load a persisted backend if it was built from the same catalog.
+    """
+    meta_path = os.path.join(path or "", "meta.json")
+    if not path or not os.path.exists(meta_path):
+        return None
+    with open(meta_path) as f:
+        meta = json.load(f)
+    if meta.get("fingerprint") != fingerprint or meta.get("backend") != backend_name():
+        return None
+    if meta["backend"].startswith("faiss-"):
+        return FaissBackend.load(path)
+    return BruteForceBackend.load(path)
@@ -0,0 +1,116 @@
+# backend/benchmarks/harness.py
+"""
+Timing helpers shared by the benchmark suites: in-process calls, concurrent
+requests through the ASGI app, and the JSON result / baseline comparison.
+"""
+import asyncio
+import math
+import time
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies_s: List[float], wall_s: float, concurrency: int = 1) -> Dict[str, float]:
+    values = sorted(v * 1000 for v in latencies_s)
+    return {
+        "iterations": len(values),
+        "concurrency": concurrency,
+        "mean_ms": round(sum(values) / len(values), 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 50), 3),
+        "p95_ms": round(percentile(values, 95), 3),
+        "p99_ms": round(percentile(values, 99), 3),
+        "max_ms": round(values[-1], 3) if values else 0.0,
+        "throughput_rps": round(len(values) / wall_s, 2) if wall_s > 0 else 0.0,
+    }
+
+
+# -------------------- In-process --------------------
+def measure(fn: Callable[[], object], iterations: int, warmup: int = 1) -> Dict[str, float]:
+    """
+    Call `fn` sequentially; each call timed on its own.
+    """
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - t0)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+# -------------------- Through the ASGI app --------------------
+async def measure_asgi(client: httpx.AsyncClient, method: str, paths: List[str], requests: int,
+                       concurrency: int, warmup: int = 1, json_body: Optional[dict] = None) -> Dict[str, float]:
+    """
+    `requests` requests from `concurrency` concurrent workers, cycling through
+    `paths`. Any non-2xx response fails the benchmark.
+    """
+    async def call(i: int) -> float:
+        t0 = time.perf_counter()
+        response = await client.request(method, paths[i % len(paths)], json=json_body)
+        if response.status_code >= 300:
+            raise RuntimeError(f"{method} {paths[i % len(paths)]} -> {response.status_code}: {response.text[:200]}")
+        return time.perf_counter() - t0
+
+    for i in range(warmup):
+        await call(i)
+
+    latencies: List[float] = []
+    counter = iter(range(requests))
+
+    async def worker():
+        for i in counter:
+            latencies.append(await call(i))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, requests))))
+    return summarize(latencies, time.perf_counter() - started, concurrency)
+
+
+# -------------------- Baseline Comparison --------------------
+def _key(result: dict) -> tuple:
+    return result["scale"], result["name"], result["mode"]
+
+
+def compare(current: dict, baseline: dict, metric: str = "p50_ms", threshold: float = 0.25,
+            min_delta_ms: float = 1.0) -> List[dict]:
+    """
+    One row per benchmark present in both runs. A benchmark regresses when
+    `metric` grew by more than `threshold` (relative) and `min_delta_ms`
+    (absolute, so sub-millisecond noise doesn't fail a run).
+    """
+    previous = {_key(r): r for r in baseline.get("results", [])}
+    rows = []
+    for result in current.get("results", []):
+        old = previous.get(_key(result))
+        if old is None or metric not in old:
+            continue
+        before, after = old[metric], result[metric]
+        change = (after - before) / before if before else 0.0
+        rows.append({
+            "scale": result["scale"], "name": result["name"], "mode": result["mode"],
+            "baseline": before, "current": after, "change": round(change, 4),
+            "regression": change > threshold and after - before > min_delta_ms,
+        })
+    return rows
+
+
+def format_comparison(rows: List[dict], metric: str) -> str:
+    lines = [f"{'scale':<6} {'mode':<10} {'benchmark':<34} {'baseline':>10} {'current':>10} {'change':>8}"]
+    for r in rows:
+        flag = "  ❌ REGRESSION" if r["regression"] else ""
+        lines.append(f"{r['scale']:<6} {r['mode']:<10} {r['name']:<34} {r['baseline']:>10.2f} "
+                     f"{r['current']:>10.2f} {r['change']:>+8.1%}{flag}")
+    lines.append(f"({metric}; lower is better)")
+    return "\n".join(lines)
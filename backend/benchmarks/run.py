@@ -0,0 +1,312 @@
+# backend/benchmarks/run.py
+"""
+End-to-end benchmarks for the recommender, analytics and export hot paths.
+
+    cd backend
+    python -m benchmarks.run                                  # all scales -> benchmarks/results.json
+    python -m benchmarks.run --scales 1k,100k --out new.json --baseline benchmarks/baseline.json
+
+Each scale gets its own synthetic database (app.seed_data, fixed seed),
+seeded on first use and reused afterwards (only if that seed completed). A scale runs in its own process
+with DATABASE_URL pointed at that database, and is measured twice:
+  - in-process: the recommender / analytics / export functions called directly
+  - asgi:       the same paths as HTTP requests through the FastAPI app at a
+                fixed concurrency (httpx ASGI transport, no network)
+
+--baseline compares against an earlier results file and exits non-zero
+when any benchmark regressed.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from benchmarks.harness import compare, format_comparison, measure, measure_asgi
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# progress rows: 1k / 100k / 1M
+SCALES = {
+    "1k": {"users": 100, "courses": 20, "progress_density": 0.5, "chat_messages": 4, "metrics_days": 1},
+    "100k": {"users": 10_000, "courses": 50, "progress_density": 0.2, "chat_messages": 4, "metrics_days": 7},
+    "1m": {"users": 50_000, "courses": 200, "progress_density": 0.1, "chat_messages": 4, "metrics_days": 30},
+}
+SEED = 42
+
+INTERESTS = ["python programming", "machine learning", "data visualization", "neural networks",
+             "sql queries", "chatbots and transformers"]
+
+
+# -------------------- Fixtures --------------------
+_MARKER_TABLE = "benchmark_dataset"
+
+
+def _dataset_marker(connection) -> str:
+    from sqlalchemy import inspect, text
+
+    if not inspect(connection).has_table(_MARKER_TABLE):
+        return ""
+    row = connection.execute(text(f"SELECT params FROM {_MARKER_TABLE}")).first()
+    return row[0] if row else ""
+
+
+def ensure_dataset(scale: str, reseed: bool = False):
+    """
+    Seed the scale's database unless it holds a completed seed with the same
+    parameters. The marker row is written only after generate() returns, so
+    an interrupted seed (or a change to SCALES / SEED) is re-seeded.
+    """
+    from sqlalchemy import text
+    from app import database, models, seed_data
+
+    params = json.dumps({"scale": scale, "seed": SEED, **SCALES[scale]}, sort_keys=True)
+    models.Base.metadata.create_all(bind=database.engine)
+    with database.engine.connect() as connection:
+        if not reseed and _dataset_marker(connection) == params:
+            return
+
+    print(f"🌱 Seeding {scale} dataset ({database.SQLALCHEMY_DATABASE_URL})", file=sys.stderr)
+    with database.engine.begin() as connection:
+        connection.execute(text(f"CREATE TABLE IF NOT EXISTS {_MARKER_TABLE} (params TEXT NOT NULL)"))
+        connection.execute(text(f"DELETE FROM {_MARKER_TABLE}"))
+    seed_data.generate(**SCALES[scale], seed=SEED, reset=True)
+    with database.engine.begin() as connection:
+        connection.execute(text(f"INSERT INTO {_MARKER_TABLE} (params) VALUES (:params)"), {"params": params})
+
+
+def sample_user_ids(count: int = 50) -> List[int]:
+    """Users that have progress rows, so every endpoint has work to do."""
+    from app import database, models
+
+    db = database.SessionLocal()
+    try:
+        ids = [r[0] for r in db.query(models.UserStats.user_id).order_by(models.UserStats.user_id).all()]
+    finally:
+        db.close()
+    return random.Random(SEED).sample(ids, min(count, len(ids)))
+
+
+def history_range() -> Dict[str, str]:
+    from app import database
+    from app.models.metrics import AIMetric
+    from sqlalchemy import func
+
+    db = database.SessionLocal()
+    try:
+        first, last = db.query(func.min(AIMetric.created_at), func.max(AIMetric.created_at)).one()
+    finally:
+        db.close()
+    return {"start_date": first.strftime("%Y-%m-%d"), "end_date": (last + timedelta(days=1)).strftime("%Y-%m-%d")}
+
+
+def _cycle(values: list) -> Callable[[], object]:
+    state = {"i": -1}
+
+    def next_value():
+        state["i"] = (state["i"] + 1) % len(values)
+        return values[state["i"]]
+    return next_value
+
+
+# -------------------- In-process Suite --------------------
+def in_process_suite(user_ids: List[int], dates: Dict[str, str], iterations: int) -> Dict[str, dict]:
+    from app import aggregates, database, recommender
+    from app.course_index import shared_index
+    from app.metrics_export import EXPORT_COLUMNS, write_metrics_csv, write_metrics_excel, write_metrics_pdf
+    from app.routes.analytics import get_metrics_history
+
+    keys = list(EXPORT_COLUMNS)
+    next_user, next_interest = _cycle(user_ids), _cycle(INTERESTS)
+
+    def with_session(fn):
+        # A fresh Session per call, as per request: nothing is served from a warm identity map
+        def call():
+            db = database.SessionLocal()
+            try:
+                return fn(db)
+            finally:
+                db.close()
+        return call
+
+    db = database.SessionLocal()
+    try:
+        shared_index.warm_start(db)
+    finally:
+        db.close()
+
+    export_iterations = max(3, iterations // 10)
+    cases = {
+        "recommend_courses_by_interest": (lambda db: recommender.recommend_courses_by_interest(next_interest(), db),
+                                          iterations),
+        "recommend_courses_for_user": (lambda db: recommender.recommend_courses_for_user(next_user(), db),
+                                       iterations),
+        "ml_recommend_courses": (lambda db: recommender.ml_recommend_courses(next_user(), db), iterations),
+        "analytics.top_courses": (lambda db: aggregates.top_courses(db, 5), iterations),
+        "analytics.active_users": (lambda db: aggregates.active_users(db, 5), iterations),
+        "analytics.history": (lambda db: get_metrics_history(start_date=dates["start_date"],
+                                                             end_date=dates["end_date"], limit=500,
+                                                             resolution="auto", db=db), iterations),
+        "export.csv": (lambda db: write_metrics_csv(db, None, None, keys, io.BytesIO()), export_iterations),
+        "export.excel": (lambda db: write_metrics_excel(db, None, None, keys, io.BytesIO()), export_iterations),
+        "export.pdf": (lambda db: write_metrics_pdf(db, None, None, keys, io.BytesIO()), export_iterations),
+    }
+    results = {}
+    for name, (fn, n) in cases.items():
+        results[name] = measure(with_session(fn), n)
+        print(f"  in-process {name:<32} p50 {results[name]['p50_ms']:>9.2f} ms", file=sys.stderr)
+    return results
+
+
+# -------------------- ASGI Suite --------------------
+async def asgi_suite(user_ids: List[int], dates: Dict[str, str], requests: int,
+                     concurrency: int) -> Dict[str, dict]:
+    import httpx
+    from app.main import app
+
+    query = f"start_date={dates['start_date']}&end_date={dates['end_date']}&limit=500&resolution=auto"
+    export_requests = max(3, requests // 20)
+    cases = {
+        "GET /recommend/interest/": ([f"/recommend/interest/?interest={i}" for i in INTERESTS], requests),
+        "GET /recommend/personalized/{id}": ([f"/recommend/personalized/{u}" for u in user_ids], requests),
+        "GET /analytics/top-courses/": (["/analytics/top-courses/"], requests),
+        "GET /analytics/active-users/": (["/analytics/active-users/"], requests),
+        "GET /analytics/user-progress/{id}": ([f"/analytics/user-progress/{u}" for u in user_ids], requests),
+        "GET /analytics/history": ([f"/analytics/history?{query}"], requests),
+        "GET /analytics/export/csv": (["/analytics/export/csv"], export_requests),
+        "GET /analytics/export/excel": (["/analytics/export/excel"], export_requests),
+        "GET /analytics/export/pdf": (["/analytics/export/pdf"], export_requests),
+    }
+
+    await app.router.startup()
+    results = {}
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            for name, (paths, n) in cases.items():
+                results[name] = await measure_asgi(client, "GET", paths, n, concurrency)
+                print(f"  asgi       {name:<32} p50 {results[name]['p50_ms']:>9.2f} ms "
+                      f"({results[name]['throughput_rps']:.1f} req/s)", file=sys.stderr)
+    finally:
+        await app.router.shutdown()
+    return results
+
+
+def run_worker(scale: str, args) -> List[dict]:
+    """
+    Runs inside the per-scale process (DATABASE_URL already points at the scale's database).
+    """
+    ensure_dataset(scale, args.reseed)
+    user_ids = sample_user_ids()
+    dates = history_range()
+    results = []
+    for name, stats in in_process_suite(user_ids, dates, args.iterations).items():
+        results.append({"scale": scale, "name": name, "mode": "in-process", **stats})
+    asgi = asyncio.run(asgi_suite(user_ids, dates, args.requests, args.concurrency))
+    for name, stats in asgi.items():
+        results.append({"scale": scale, "name": name, "mode": "asgi", **stats})
+    return results
+
+
+# -------------------- Driver --------------------
+def _git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_scale(scale: str, args) -> List[dict]:
+    database_url = args.database_url.format(scale=scale, data_dir=os.path.abspath(args.data_dir))
+    env = dict(os.environ, DATABASE_URL=database_url)
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        out = f.name
+    try:
+        command = [sys.executable, "-m", "benchmarks.run", "--worker", scale, "--worker-out", out,
+                   "--iterations", str(args.iterations), "--requests", str(args.requests),
+                   "--concurrency", str(args.concurrency)] + (["--reseed"] if args.reseed else [])
+        print(f"\n⏱️  Scale {scale}", file=sys.stderr)
+        subprocess.run(command, cwd=BACKEND_DIR, env=env, check=True)
+        with open(out) as f:
+            return json.load(f)
+    finally:
+        os.unlink(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark recommender, analytics and export hot paths.")
+    parser.add_argument("--scales", default=",".join(SCALES), help=f"comma-separated, from {', '.join(SCALES)}")
+    parser.add_argument("--iterations", type=int, default=50, help="in-process calls per benchmark")
+    parser.add_argument("--requests", type=int, default=200, help="ASGI requests per benchmark")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent ASGI clients")
+    parser.add_argument("--data-dir", default="benchmarks/.data", help="where the scale databases live")
+    parser.add_argument("--database-url", default="sqlite:///{data_dir}/bench_{scale}.db",
+                        help="per-scale database URL; {scale} and {data_dir} are substituted")
+    parser.add_argument("--reseed", action="store_true", help="regenerate the datasets")
+    parser.add_argument("--out", default="benchmarks/results.json")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument("--metric", default="p50_ms", choices=["mean_ms", "p50_ms", "p95_ms", "p99_ms"])
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore slowdowns smaller than this")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--worker-out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        results = run_worker(args.worker, args)
+        with open(args.worker_out, "w") as f:
+            json.dump(results, f)
+        return
+
+    scales = [s.strip() for s in args.scales.split(",") if s.strip()]
+    unknown = [s for s in scales if s not in SCALES]
+    if unknown:
+        parser.error(f"unknown scale(s): {', '.join(unknown)}")
+    os.makedirs(args.data_dir, exist_ok=True)
+
+    started = time.perf_counter()
+    results = [r for scale in scales for r in run_scale(scale, args)]
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database_url": args.database_url.split("://")[0],
+            "scales": {s: SCALES[s] for s in scales},
+            "iterations": args.iterations,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "duration_s": round(time.perf_counter() - started, 1),
+        },
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ {len(results)} results written to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows = compare(report, baseline, args.metric, args.threshold, args.min_delta_ms)
+        print(format_comparison(rows, args.metric))
+        regressions = [r for r in rows if r["regression"]]
+        if regressions:
+            print(f"\n❌ {len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+        print("\n✅ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# backend/tests/conftest.py
+"""
+Shared fixtures. The app runs against a throwaway SQLite database (or
+TEST_DATABASE_URL) seeded by app.seed_data, so tests never touch
+ai_learning.db.
+
+    cd backend && python -m pytest -q
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Before anything imports app.database (the engine is built at import time)
+_DB_DIR = tempfile.mkdtemp(prefix="ai_learning_tests_")
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL", f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}")
+os.environ["STARTUP_WARMUP"] = "off"
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app import query_profiler, seed_data  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def seeded():
+    """Small synthetic dataset: user 1 has progress, chat history and metrics exist."""
+    return seed_data.generate(users=20, courses=26, progress_density=0.5, chat_messages=4,
+                              metrics_days=0.1, reset=True)
+
+
+@pytest.fixture(scope="session")
+def client(seeded):
+    return TestClient(app)
+
+
+@pytest.fixture
+def query_budget():
+    """`with query_budget(n): ...` fails when the block runs more than n statements."""
+    return query_profiler.query_budget
+
+
+@pytest.fixture
+def route_budget():
+    """`with route_budget("GET", path): ...` enforces the budget declared on that route."""
+    def enforce(method: str, path: str):
+        return query_profiler.enforce_route_budget(app, method, path)
+    return enforce
@@ -0,0 +1,32 @@
+# backend/tests/test_chat_context.py
+"""
+Context window edges: what is left out of the window stays reachable by the
+rolling summary.
+"""
+from app import chat_context, database
+from app.crud.chat_crud import save_chat_messages
+
+
+def build(user_id: int, budget: int):
+    db = database.SessionLocal()
+    try:
+        return chat_context.build_context_window(db, user_id, "next question", budget=budget)
+    finally:
+        db.close()
+
+
+def test_window_starts_at_oldest_included_message(seeded):
+    ids = save_chat_messages(2, [("user", "short one"), ("ai", "short two")])
+    messages, window_start_id = build(2, budget=20)
+    assert [m["content"] for m in messages[-3:]] == ["short one", "short two", "next question"]
+    assert window_start_id == ids[0]
+
+
+def test_oversized_newest_message_is_left_to_the_summary(seeded):
+    ids = save_chat_messages(3, [("user", "earlier"), ("ai", "x" * 4000)])
+    messages, window_start_id = build(3, budget=100)
+    assert "x" * 4000 not in [m["content"] for m in messages]
+    assert window_start_id == ids[-1] + 1
+
+    _, pending = chat_context._pending_for_summary(3, window_start_id)
+    assert [m.id for m in pending][-2:] == ids
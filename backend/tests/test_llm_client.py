@@ -0,0 +1,149 @@
+# backend/tests/test_llm_client.py
+"""
+AsyncLLMClient against a mock upstream (httpx.MockTransport): retries,
+streaming, and cancellation closing the upstream response.
+"""
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.instrumentation import llm_requests
+from app.llm_client import AsyncLLMClient, LLMError
+
+
+def make_client(handler) -> AsyncLLMClient:
+    # backoff_base=0: retries sleep 0s
+    return AsyncLLMClient(base_url="http://llm.test", api_key="test", max_retries=2,
+                          backoff_base=0, transport=httpx.MockTransport(handler))
+
+
+def completion(text: str) -> httpx.Response:
+    return httpx.Response(200, json={"choices": [{"message": {"content": text}}]})
+
+
+def sse(*tokens: str) -> bytes:
+    events = [f"data: {json.dumps({'choices': [{'delta': {'content': t}}]})}\n\n" for t in tokens]
+    return ("".join(events) + "data: [DONE]\n\n").encode()
+
+
+class TrackedStream(httpx.AsyncByteStream):
+    """Response body that records whether the client closed it."""
+
+    def __init__(self, chunks, fail_after: bool = False):
+        self.chunks = chunks
+        self.fail_after = fail_after
+        self.closed = False
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+            await asyncio.sleep(0)
+        if self.fail_after:
+            raise httpx.ReadError("connection reset")
+
+    async def aclose(self):
+        self.closed = True
+
+
+async def collect(client: AsyncLLMClient, limit=None):
+    """Consume the stream; stop after `limit` tokens the way a departing consumer does (aclose)."""
+    tokens = []
+    stream = client.stream_chat([{"role": "user", "content": "hi"}])
+    try:
+        async for token in stream:
+            tokens.append(token)
+            if limit is not None and len(tokens) >= limit:
+                break
+    finally:
+        await stream.aclose()
+        await client.aclose()
+    return tokens
+
+
+def test_chat_retries_retryable_status():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503) if len(calls) == 1 else completion(" hello ")
+
+    async def run():
+        client = make_client(handler)
+        try:
+            return await client.chat([{"role": "user", "content": "hi"}])
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(run()) == "hello"
+    assert len(calls) == 2
+    assert calls[0].headers["authorization"] == "Bearer test"
+
+
+def test_chat_does_not_retry_client_errors():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(400, text="bad request")
+
+    async def run():
+        client = make_client(handler)
+        try:
+            await client.chat([{"role": "user", "content": "hi"}])
+        finally:
+            await client.aclose()
+
+    with pytest.raises(LLMError):
+        asyncio.run(run())
+    assert len(calls) == 1
+
+
+def test_stream_yields_tokens():
+    def handler(request):
+        assert json.loads(request.content)["stream"] is True
+        return httpx.Response(200, content=sse("Hel", "lo", "!"))
+
+    assert asyncio.run(collect(make_client(handler))) == ["Hel", "lo", "!"]
+
+
+def test_stream_retries_before_first_token():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            raise httpx.ConnectError("refused")
+        if len(calls) == 2:
+            return httpx.Response(429, headers={"retry-after": "0"})
+        return httpx.Response(200, content=sse("ok"))
+
+    assert asyncio.run(collect(make_client(handler))) == ["ok"]
+    assert len(calls) == 3
+
+
+def test_stream_does_not_retry_after_first_token():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, stream=TrackedStream([sse("partial")[:-len("data: [DONE]\n\n")]],
+                                                        fail_after=True))
+
+    with pytest.raises(LLMError):
+        asyncio.run(collect(make_client(handler)))
+    assert len(calls) == 1
+
+
+def test_cancelling_stream_closes_upstream():
+    streams = []
+
+    def handler(request):
+        streams.append(TrackedStream([sse("a")[:-len("data: [DONE]\n\n")], sse("b"), sse("c")]))
+        return httpx.Response(200, stream=streams[-1])
+
+    cancelled_before = llm_requests.collect().get(("stream", "cancelled"), 0)
+    assert asyncio.run(collect(make_client(handler), limit=1)) == ["a"]
+    assert streams[0].closed
+    assert llm_requests.collect().get(("stream", "cancelled"), 0) == cancelled_before + 1
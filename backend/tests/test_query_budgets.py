@@ -0,0 +1,43 @@
+# backend/tests/test_query_budgets.py
+"""
+Every route with a @query_budget_limit stays within it (first, cold request).
+"""
+import pytest
+
+from app import query_profiler
+from app.main import app
+
+# route path -> a concrete request against the seeded data
+BUDGETED_REQUESTS = {
+    "/courses/search": "/courses/search?q=python",
+    "/courses/suggest": "/courses/suggest?q=dat",
+    "/progress/user/{user_id}": "/progress/user/1",
+    "/recommend/interest/": "/recommend/interest/?interest=machine learning",
+    "/recommend/personalized/{user_id}": "/recommend/personalized/1",
+    "/analytics/top-courses/": "/analytics/top-courses/",
+    "/analytics/active-users/": "/analytics/active-users/",
+    "/analytics/user-progress/{user_id}": "/analytics/user-progress/1",
+    "/career/recommend/{user_id}": "/career/recommend/1",
+    "/learning/insights/{user_id}": "/learning/insights/1",
+}
+
+
+def test_every_budgeted_route_is_covered():
+    budgeted = {
+        route.path for route in app.routes
+        if getattr(getattr(route, "endpoint", None), "__query_budget__", None)
+    }
+    assert budgeted == set(BUDGETED_REQUESTS)
+
+
+@pytest.mark.parametrize("path", sorted(BUDGETED_REQUESTS))
+def test_route_stays_within_its_query_budget(client, route_budget, path):
+    with route_budget("GET", path):
+        response = client.get(BUDGETED_REQUESTS[path])
+    assert response.status_code == 200, response.text
+
+
+def test_query_budget_fails_when_exceeded(client, query_budget):
+    with pytest.raises(query_profiler.QueryBudgetExceeded):
+        with query_budget(0):
+            client.get("/progress/user/1")
@@ -0,0 +1,38 @@
+# backend/tests/test_websocket_chat.py
+"""
+/chat/ws against a scripted token stream (no LLM upstream).
+"""
+import asyncio
+
+from app.api import websocket as websocket_routes
+
+
+def scripted_stream(*tokens: str, delay: float = 0.2):
+    async def stream_chat(messages, **params):
+        for token in tokens:
+            await asyncio.sleep(delay)
+            yield token
+    return stream_chat
+
+
+def test_message_sent_mid_stream_gets_busy_error(client, monkeypatch):
+    monkeypatch.setattr(websocket_routes.llm, "stream_chat", scripted_stream("Hel", "lo"))
+    with client.websocket_connect("/chat/ws") as ws:
+        ws.send_json({"message": "hi"})
+        assert ws.receive_json() == {"type": "token", "content": "Hel"}
+
+        ws.send_json({"message": "are you there?"})
+        busy = ws.receive_json()
+        assert busy["type"] == "error" and busy["code"] == "busy"
+
+        assert ws.receive_json() == {"type": "token", "content": "lo"}
+        assert ws.receive_json() == {"type": "done", "content": "Hello"}
+
+
+def test_cancel_mid_stream(client, monkeypatch):
+    monkeypatch.setattr(websocket_routes.llm, "stream_chat", scripted_stream("a", "b", "c"))
+    with client.websocket_connect("/chat/ws") as ws:
+        ws.send_json({"message": "hi"})
+        assert ws.receive_json() == {"type": "token", "content": "a"}
+        ws.send_json({"type": "cancel"})
+        assert ws.receive_json() == {"type": "cancelled", "content": "a"}
@@ -0,0 +1,138 @@
+# ml_models/train_recommender.py
+"""
+Offline training for the course recommender.
+
+Reads the course / progress tables, fits the TF-IDF vocabulary, and writes a
+new versioned artifact directory (vocabulary, course vectors, neighbour graph,
+popularity priors + manifest). The API memory-maps the CURRENT version at
+startup and hot-swaps when a newer one is published.
+
+Usage (from backend/, like the API):
+    python ../ml_models/train_recommender.py
+    python ../ml_models/train_recommender.py --database-url postgresql://... --neighbors 50
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from sqlalchemy import create_engine, func, select
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from app import models  # noqa: E402
+from app.artifacts import ARTIFACT_DIR, write_artifacts  # noqa: E402
+from app.course_index import catalog_fingerprint, course_text  # noqa: E402
+from app.vector_search import VECTOR_BACKEND, make_backend  # noqa: E402
+
+
+# -------------------- Data Loading --------------------
+def load_courses(engine):
+    query = select(
+        models.Course.id, models.Course.title, models.Course.category, models.Course.description
+    ).order_by(models.Course.id)
+    with engine.connect() as conn:
+        rows = conn.execute(query).all()
+    return [r.id for r in rows], [r.title for r in rows], [course_text(r.category, r.description) for r in rows]
+
+
+def load_progress_stats(engine):
+    """
+    learners / summed completion per course, in one GROUP BY.
+    """
+    query = select(
+        models.Progress.course_id,
+        func.count(models.Progress.id),
+        func.coalesce(func.sum(models.Progress.completion_percentage), 0.0),
+    ).group_by(models.Progress.course_id)
+    with engine.connect() as conn:
+        return {course_id: (count, total) for course_id, count, total in conn.execute(query)}
+
+
+# -------------------- Model Building --------------------
+def build_neighbor_graph(matrix, course_ids, k: int):
+    """
+    k nearest courses for every course (self excluded), as course ids + scores.
+    Also returns the search backend used, so it can be shipped with the version.
+    """
+    n = len(course_ids)
+    k = min(k, max(n - 1, 0))
+    neighbors = np.full((n, k), -1, dtype=np.int64)
+    scores = np.zeros((n, k), dtype=np.float32)
+    backend = make_backend().build(matrix, course_ids)
+    if k == 0:
+        return neighbors, scores, backend
+
+    # Keep each (batch x n) score block around 20M floats
+    batch_size = max(1, min(1024, 20_000_000 // n))
+    ids = np.asarray(course_ids, dtype=np.int64)
+    for start in range(0, n, batch_size):
+        stop = min(start + batch_size, n)
+        batch_scores, batch_ids = backend.search(matrix[start:stop], k + 1)
+        for i, row in enumerate(range(start, stop)):
+            keep = batch_ids[i] != ids[row]
+            found_ids, found_scores = batch_ids[i][keep][:k], batch_scores[i][keep][:k]
+            neighbors[row, :len(found_ids)] = found_ids
+            scores[row, :len(found_scores)] = found_scores
+    return neighbors, scores, backend
+
+
+def build_popularity(course_ids, stats, smoothing: float = 5.0):
+    """
+    Popularity prior: Bayesian-smoothed mean completion weighted by log(learners),
+    scaled to [0, 1].
+    """
+    counts = np.array([stats.get(cid, (0, 0.0))[0] for cid in course_ids], dtype=np.float64)
+    totals = np.array([stats.get(cid, (0, 0.0))[1] for cid in course_ids], dtype=np.float64)
+    global_mean = totals.sum() / counts.sum() if counts.sum() else 0.0
+    smoothed = (totals + smoothing * global_mean) / (counts + smoothing)
+    prior = smoothed / 100.0 * np.log1p(counts)
+    return (prior / prior.max()).astype(np.float32) if len(prior) and prior.max() > 0 else prior.astype(np.float32)
+
+
+def train(database_url: str, out_dir: str, k: int = 20, keep: int = 3) -> str:
+    started = time.time()
+    engine = create_engine(database_url)
+
+    course_ids, titles, texts = load_courses(engine)
+    if not course_ids:
+        raise SystemExit("No courses found - nothing to train.")
+    print(f"Loaded {len(course_ids)} courses.")
+
+    vectorizer = TfidfVectorizer(stop_words="english")
+    matrix = vectorizer.fit_transform(texts).tocsr()
+    print(f"Vocabulary: {len(vectorizer.idf_)} terms, {matrix.nnz} non-zeros.")
+
+    neighbors, neighbor_scores, backend = build_neighbor_graph(matrix, course_ids, k)
+    popularity = build_popularity(course_ids, load_progress_stats(engine))
+
+    fingerprint = catalog_fingerprint(course_ids, texts)
+    version = write_artifacts(
+        out_dir, vectorizer, matrix, course_ids, titles, neighbors, neighbor_scores, popularity,
+        fingerprint=fingerprint,
+        # Ship the ANN index too, so workers don't rebuild it at load time
+        search=backend if VECTOR_BACKEND != "brute" else None,
+        extra={"vector_backend": VECTOR_BACKEND, "database_url": engine.url.render_as_string()},
+        keep=keep,
+    )
+
+    print(f"✅ Published {version} to {os.path.abspath(out_dir)} in {time.time() - started:.1f}s")
+    return version
+
+
+def main():
+    from app.database import SQLALCHEMY_DATABASE_URL
+
+    parser = argparse.ArgumentParser(description="Train recommender artifacts.")
+    parser.add_argument("--database-url", default=SQLALCHEMY_DATABASE_URL)
+    parser.add_argument("--out", default=ARTIFACT_DIR, help="artifact root directory")
+    parser.add_argument("--neighbors", type=int, default=20, help="neighbours stored per course")
+    parser.add_argument("--keep", type=int, default=3, help="artifact versions to keep")
+    args = parser.parse_args()
+    train(args.database_url, args.out, args.neighbors, args.keep)
+
+
+if __name__ == "__main__":
+    main()